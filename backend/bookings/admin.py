@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Room, Booking
+from .models import Room, Booking, BookingSeries
 
 
 @admin.register(Room)
@@ -52,3 +52,14 @@ class BookingAdmin(admin.ModelAdmin):
             return self.readonly_fields + ['room', 'user', 'booking_date', 
                                           'start_time', 'end_time']
         return self.readonly_fields
+
+
+@admin.register(BookingSeries)
+class BookingSeriesAdmin(admin.ModelAdmin):
+    list_display = ['id', 'room', 'user', 'frequency', 'interval', 'start_date',
+                    'until', 'start_time', 'end_time', 'status', 'expanded_until']
+    list_filter = ['status', 'frequency', 'room']
+    search_fields = ['room__name', 'user__username', 'purpose']
+    ordering = ['-created_at']
+    
+    readonly_fields = ['expanded_until', 'created_at', 'cancelled_at']
@@ -0,0 +1,151 @@
+"""Асинхронные версии самых нагруженных представлений чтения (профиль ASGI).
+
+DRF 3.14 не поддерживает асинхронные представления, и под ASGI каждое
+синхронное представление выполняется через sync_to_async в общем потоке
+воркера. Запросы GET к расписанию, списку комнат и бронированию по токену
+отмены вместо этого обслуживаются корутинами: пользователь берётся из
+claims токена, кэш расписания читается одним переходом в поток, а база —
+через async ORM Django, поэтому в поток уходят только сами SQL-запросы.
+
+Ответы совпадают с ответами DRF-представлений: те же данные, пагинация,
+ETag и формат ошибок. Остальные методы тех же адресов (создание комнаты,
+отмена по токену) и браузерный API остаются за DRF — см. async_read().
+Включается настройкой ASYNC_READ_VIEWS (по умолчанию — под config/asgi.py).
+"""
+import asyncio
+import functools
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import close_old_connections, connections
+from django.http import HttpResponse, JsonResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from users.authentication import ClaimsJWTAuthentication
+from .listing import booking_rows, format_rows
+from .models import Booking
+from .schedule import aload_bases
+from .views import RoomViewSet, ScheduleParamsError, ScheduleView
+
+
+def json_response(data, status=200, headers=None):
+    """JSON как у JSONRenderer DRF: компактный, без экранирования кириллицы"""
+    return JsonResponse(
+        data, status=status, headers=headers, safe=False, encoder=JSONEncoder,
+        json_dumps_params={'ensure_ascii': False, 'allow_nan': False, 'separators': (',', ':')}
+    )
+
+
+def error_response(exc):
+    """Ответ на исключение DRF в формате его обработчика исключений"""
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    headers = None
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers = {'WWW-Authenticate': ClaimsJWTAuthentication().authenticate_header(None)}
+    return json_response(data, status=exc.status_code, headers=headers)
+
+
+async def authenticate(request, required=True):
+    """Пользователь по access-токену; request.user задаётся, как это делает DRF.
+
+    Неверный токен — 401 и там, где вход не обязателен (как в DRF).
+    """
+    result = await ClaimsJWTAuthentication().aauthenticate(request)
+    if result is None:
+        if required:
+            raise exceptions.NotAuthenticated()
+        request.user = AnonymousUser()
+    else:
+        request.user = result[0]
+    return request.user
+
+
+def drf_request(request):
+    """Request DRF поверх запроса Django: query_params и ссылки пагинации без аутентификации"""
+    wrapped = Request(request)
+    wrapped.user = request.user
+    return wrapped
+
+
+_db_slots = weakref.WeakKeyDictionary()
+
+
+def db_slots():
+    """Семафор обработчиков, работающих с БД, в цикле событий воркера"""
+    loop = asyncio.get_running_loop()
+    if loop not in _db_slots:
+        _db_slots[loop] = asyncio.Semaphore(settings.ASYNC_DB_CONCURRENCY)
+    return _db_slots[loop]
+
+
+async def release_connections():
+    """Закрыть (вернуть PgBouncer) соединения, открытые обработчиком"""
+    if any(connection.connection is not None for connection in connections.all(initialized_only=True)):
+        await sync_to_async(close_old_connections)()
+
+
+def async_read(sync_view, handler):
+    """Представление, в котором GET обслуживает корутина handler, а остальные методы — sync_view.
+
+    Атрибуты sync_view (cls, actions, csrf_exempt) переносятся на обёртку,
+    поэтому схема API, метки метрик и CSRF остаются как у DRF-представления.
+    Запросы браузерного API (Accept: text/html) тоже идут в DRF.
+
+    Соединение с БД у Django 4.2 под ASGI своё у каждого запроса и живёт до
+    его завершения, поэтому сотни одновременных запросов исчерпали бы
+    max_connections. Одновременно работают не больше ASYNC_DB_CONCURRENCY
+    обработчиков, и каждый закрывает соединения до того, как уступить место.
+    """
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET' or 'text/html' in request.headers.get('Accept', ''):
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+        async with db_slots():
+            try:
+                return await handler(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return error_response(exc)
+            finally:
+                await release_connections()
+    return functools.update_wrapper(view, sync_view)
+
+
+async def schedule(request):
+    """ScheduleView.get"""
+    await authenticate(request)
+    try:
+        dates, wrap = ScheduleView.parse_dates(request.GET)
+    except ScheduleParamsError as exc:
+        return json_response({'error': str(exc)}, status=400)
+
+    bases, version = await aload_bases(dates)
+    data, headers = ScheduleView.render(bases, version, request, wrap)
+    if data is None:
+        return HttpResponse(status=304, headers=headers)
+    return json_response(data, headers=headers)
+
+
+async def room_list(request):
+    """RoomViewSet.list: страница — COUNT и LIMIT/OFFSET в SQL, как у пагинатора DRF"""
+    await authenticate(request)
+    view = RoomViewSet(request=drf_request(request), format_kwarg=None, action='list', args=(), kwargs={})
+    queryset = view.filter_queryset(view.get_queryset())
+    # Пагинатор DRF синхронный: оба его запроса выполняются за один переход в поток
+    page = await sync_to_async(view.paginate_queryset)(queryset) if view.paginator is not None else None
+    if page is not None:
+        return json_response(view.get_paginated_response(view.get_serializer(page, many=True).data).data)
+    rooms = [room async for room in queryset]
+    return json_response(view.get_serializer(rooms, many=True).data)
+
+
+async def cancel_booking(request, token):
+    """CancelBookingView.get: доступ по токену отмены, вход не обязателен"""
+    await authenticate(request, required=False)
+    rows = [row async for row in booking_rows(Booking.objects.filter(cancellation_token=token))]
+    if not rows:
+        return json_response({'error': 'Бронирование не найдено'}, status=404)
+    return json_response(format_rows(rows)[0])
+
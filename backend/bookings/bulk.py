@@ -0,0 +1,131 @@
+"""Массовые операции администратора с бронированиями.
+
+Весь пакет проверяется вместе: комнаты и пользователи загружаются одним
+запросом каждый, пересечения с существующими бронированиями — одним
+запросом по всем парам (комната, дата), пересечения внутри пакета —
+в памяти. Запись выполняется в одной транзакции через
+Booking.objects.create_many() и BookingQuerySet.cancel().
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+from core import metrics
+from users.models import User
+from .models import Room, Booking
+
+
+def check_overlaps(bookings, errors):
+    """Дополнить errors пересечениями бронирований пакета.
+
+    Бронирования с уже найденными ошибками не проверяются. Из двух
+    пересекающихся бронирований пакета отклоняется более позднее.
+    """
+    candidates = [(index, booking) for index, booking in enumerate(bookings) if index not in errors]
+    keys = {(booking.room_id, booking.booking_date) for _, booking in candidates}
+    if not keys:
+        return errors
+
+    key_filter = Q()
+    for room_id, booking_date in keys:
+        key_filter |= Q(room_id=room_id, booking_date=booking_date)
+
+    busy = defaultdict(list)
+    for room_id, booking_date, start_time, end_time in Booking.objects.filter(
+        key_filter, status='active'
+    ).order_by('start_time').values_list('room_id', 'booking_date', 'start_time', 'end_time'):
+        busy[(room_id, booking_date)].append((start_time, end_time, None))
+
+    for index, booking in candidates:
+        intervals = busy[(booking.room_id, booking.booking_date)]
+        overlapping = next((
+            interval for interval in intervals
+            if interval[0] < booking.end_time and interval[1] > booking.start_time
+        ), None)
+        if overlapping is None:
+            intervals.append((booking.start_time, booking.end_time, index))
+            continue
+
+        start_time, end_time, other = overlapping
+        metrics.record_conflict('bulk')
+        if other is None:
+            errors[index] = {'time': f'Это время уже забронировано ({start_time}-{end_time})'}
+        else:
+            errors[index] = {'time': f'Пересекается с бронированием №{other} из этого же запроса'}
+    return errors
+
+
+def create_bookings(items, default_user, partial=False):
+    """Создать бронирования по проверенным сериализатором данным.
+
+    Возвращает (бронирования по индексам, {индекс: ошибки}); на месте
+    отклонённых бронирований — None. Без partial при любой ошибке ничего
+    не создаётся. Пересечение с параллельной записью — ValidationError.
+    """
+    rooms = Room.objects.in_bulk({item['room'] for item in items})
+    users = User.objects.in_bulk({item['user'] for item in items if item.get('user')})
+
+    bookings = []
+    errors = {}
+    for index, item in enumerate(items):
+        booking = Booking(
+            booking_date=item['booking_date'],
+            start_time=item['start_time'],
+            end_time=item['end_time'],
+            purpose=item.get('purpose')
+        )
+        item_errors = booking.get_time_errors()
+
+        room = rooms.get(item['room'])
+        if room is None:
+            item_errors['room'] = 'Комната не найдена'
+        else:
+            booking.room = room
+
+        user = users.get(item['user']) if item.get('user') else default_user
+        if user is None:
+            item_errors['user'] = 'Пользователь не найден'
+        else:
+            booking.user = user
+
+        if item_errors:
+            errors[index] = item_errors
+        bookings.append(booking)
+
+    check_overlaps(bookings, errors)
+    if errors and not partial:
+        return [None] * len(bookings), errors
+
+    accepted = [booking for index, booking in enumerate(bookings) if index not in errors]
+    Booking.objects.create_many(accepted)
+    return [None if index in errors else booking for index, booking in enumerate(bookings)], errors
+
+
+def cancel_bookings(queryset, ids=None, partial=False):
+    """Отменить бронирования выборки (или её бронирования с указанными id).
+
+    Возвращает (отменённые бронирования, {id: причина}). Без ids
+    в выборку попадают только активные бронирования. Без partial при
+    любой ошибке ничего не отменяется.
+    """
+    targets = queryset.filter(id__in=ids) if ids is not None else queryset.filter(status='active')
+
+    with transaction.atomic():
+        cancelled = targets.cancellable().cancel()
+        cancelled_ids = {booking.id for booking in cancelled}
+
+        errors = {
+            booking_id: 'Бронирование уже началось' if booking_status == 'active'
+            else 'Бронирование уже отменено'
+            for booking_id, booking_status in targets.exclude(id__in=cancelled_ids)
+            .values_list('id', 'status')
+        }
+        for booking_id in set(ids or ()) - cancelled_ids - errors.keys():
+            errors[booking_id] = 'Бронирование не найдено'
+
+        if errors and not partial:
+            # Откат отмены вместе с картами занятости; сброс кэша не выполнится
+            transaction.set_rollback(True)
+            return [], errors
+    return cancelled, errors
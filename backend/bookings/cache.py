@@ -0,0 +1,60 @@
+"""Версии кэша расписания.
+
+Кэш расписания адресуется версиями: общей версией комнат и версией
+каждой даты. Любая запись меняет соответствующую версию, и старые записи
+кэша просто перестают запрашиваться. Версии меняются только после
+фиксации транзакции, чтобы в кэш не попали незафиксированные данные.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+ROOMS_VERSION_KEY = 'schedule:version:rooms'
+
+
+def get_cache():
+    return caches[settings.SCHEDULE_CACHE_ALIAS]
+
+
+def _date_version_key(value):
+    return f'schedule:version:{value.isoformat()}'
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def get_versions(dates):
+    """Версия комнат и версии указанных дат: (rooms_version, {date: version})"""
+    cache = get_cache()
+    keys = {value: _date_version_key(value) for value in dates}
+    stored = cache.get_many([ROOMS_VERSION_KEY, *keys.values()])
+
+    # Отсутствующие версии создаются заново; add() не перезапишет
+    # версию, которую параллельно успел создать другой процесс
+    missing = [key for key in [ROOMS_VERSION_KEY, *keys.values()] if key not in stored]
+    for key in missing:
+        cache.add(key, _new_version(), timeout=None)
+    if missing:
+        stored.update(cache.get_many(missing))
+
+    return stored[ROOMS_VERSION_KEY], {value: stored[key] for value, key in keys.items()}
+
+
+def _bump(keys):
+    get_cache().set_many({key: _new_version() for key in keys}, timeout=None)
+
+
+def bump_dates(*dates):
+    """Сбросить кэш расписания на указанные даты после фиксации транзакции"""
+    keys = {_date_version_key(value) for value in dates if value is not None}
+    if keys:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def bump_rooms():
+    """Сбросить кэш расписания на все даты после фиксации транзакции"""
+    transaction.on_commit(lambda: _bump([ROOMS_VERSION_KEY]))
@@ -0,0 +1,81 @@
+"""Инкрементальная синхронизация бронирований ("изменения после токена").
+
+Каждая запись строки bookings получает номер своей транзакции
+(change_txid, триггер БД), удаления попадают в booking_deletions.
+Токен синхронизации — xmin снимка PostgreSQL, взятого до выборки: все
+транзакции, которые на этот момент ещё не зафиксированы, имеют номер не
+меньше xmin, поэтому следующий запрос с этим токеном их не пропустит.
+Ценой этого бывают повторы строк, изменённых одновременно с запросом;
+клиент применяет изменения по id, и повторы ему не мешают.
+
+Большой набор изменений отдаётся страницами: токен продолжения хранит
+нижнюю границу первой страницы и позицию (change_txid, id) последней строки.
+"""
+from django.db import connections
+from django.db.models import Q
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+def parse_token(token):
+    """(floor, after) из токена; after — (change_txid, id) или None"""
+    if not token:
+        return 0, None
+    try:
+        parts = [int(part) for part in token.split('-')]
+    except ValueError:
+        raise InvalidSyncToken(token)
+    if len(parts) == 1 and parts[0] >= 0:
+        return parts[0], None
+    if len(parts) == 3 and min(parts) >= 0:
+        return parts[0], (parts[1], parts[2])
+    raise InvalidSyncToken(token)
+
+
+def format_token(floor, after=None):
+    if after is None:
+        return str(floor)
+    return f'{floor}-{after[0]}-{after[1]}'
+
+
+def snapshot_xmin(using):
+    """Наименьший номер транзакции, ещё не зафиксированной на данный момент"""
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+        return cursor.fetchone()[0]
+
+
+def get_changes(bookings, deletions, token, limit):
+    """Изменения выборки bookings и удаления из deletions после токена.
+
+    Возвращает (изменённые бронирования, id удалённых, новый токен, есть ли ещё).
+    """
+    floor, after = parse_token(token)
+    if after is None:
+        # Новая граница берётся до выборки, чтобы не пропустить транзакции,
+        # зафиксированные между запросами
+        next_floor = snapshot_xmin(bookings.db)
+        changed = bookings.filter(change_txid__gte=floor)
+    else:
+        next_floor = floor
+        changed = bookings.filter(
+            Q(change_txid__gt=after[0]) | Q(change_txid=after[0], id__gt=after[1])
+        )
+
+    changed = list(changed.order_by('change_txid', 'id')[:limit + 1])
+    has_more = len(changed) > limit
+    changed = changed[:limit]
+
+    deleted = []
+    if after is None:
+        deleted = list(
+            deletions.filter(change_txid__gte=floor)
+            .order_by('booking_id').values_list('booking_id', flat=True).distinct()
+        )
+
+    if has_more:
+        last = changed[-1]
+        return changed, deleted, format_token(next_floor, (last.change_txid, last.id)), True
+    return changed, deleted, format_token(next_floor), False
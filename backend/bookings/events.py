@@ -0,0 +1,247 @@
+"""События изменения бронирований для live-обновления расписания.
+
+Изменения бронирований публикуются после фиксации транзакции через
+брокер из settings.BOOKING_EVENTS_BROKER. Брокер рассылает событие
+подписчикам дат, которых оно касается; подписчики — асинхронные
+потоки Server-Sent Events (ScheduleEventsView).
+
+InProcessBroker работает в пределах одного процесса. При нескольких
+воркерах нужен общий брокер: PostgresBroker пересылает события через
+LISTEN/NOTIFY той же базы данных.
+
+EventSource не передаёт заголовки, поэтому поток открывается по билету
+из make_ticket(): он подписан, годен SCHEDULE_EVENTS_TICKET_MAX_AGE
+секунд и подходит только для потока событий. Access-токен в URL не
+попадает.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.authentication import check_token_state
+
+
+logger = logging.getLogger(__name__)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+TICKET_SALT = 'bookings.events'
+
+
+def make_ticket(user):
+    """Билет потока событий: id пользователя и версия его токенов"""
+    return signing.dumps([user.id, user.token_version], salt=TICKET_SALT)
+
+
+def ticket_user_id(ticket):
+    """Пользователь билета или None: билет истёк, подделан или токены отозваны"""
+    try:
+        user_id, version = signing.loads(
+            ticket, salt=TICKET_SALT, max_age=settings.SCHEDULE_EVENTS_TICKET_MAX_AGE
+        )
+        check_token_state(user_id, version)
+    except (signing.BadSignature, ValueError, TypeError, AuthenticationFailed):
+        return None
+    return user_id
+
+
+def get_broker():
+    """Брокер событий процесса (создаётся при первом обращении)"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.BOOKING_EVENTS_BROKER)()
+    return _broker
+
+
+class Subscription:
+    """Очередь событий одного подписчика в его цикле событий"""
+
+    def __init__(self, dates, maxsize):
+        self.dates = frozenset(dates)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, message):
+        """Положить событие в очередь; вызывается в цикле подписчика"""
+        if self.queue.full():
+            # Подписчик не успевает читать: вместо потерянных событий
+            # он получит одно указание перезагрузить расписание
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = (message[0], {'type': 'resync'})
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        """Следующее событие (id, данные) или None по истечении timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    """Рассылка событий подписчикам текущего процесса.
+
+    publish() можно вызывать из любого потока: событие передаётся
+    в цикл событий подписчика через call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._sequence = itertools.count(1)
+
+    def subscribe(self, dates):
+        """Подписаться на события дат (строки YYYY-MM-DD)"""
+        subscription = Subscription(dates, settings.BOOKING_EVENTS_QUEUE_SIZE)
+        with self._lock:
+            for value in subscription.dates:
+                self._subscribers[value].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for value in subscription.dates:
+                subscribers = self._subscribers.get(value)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[value]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(set().union(*self._subscribers.values()))
+
+    def publish(self, event, dates):
+        """Разослать событие подписчикам указанных дат"""
+        self._fan_out(event, dates)
+
+    def _fan_out(self, event, dates):
+        message = (next(self._sequence), event)
+        with self._lock:
+            targets = set().union(*(self._subscribers.get(value, ()) for value in dates))
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # Цикл подписчика уже закрыт
+                self.unsubscribe(subscription)
+
+
+class PostgresBroker(InProcessBroker):
+    """Общий брокер для нескольких воркеров на PostgreSQL LISTEN/NOTIFY.
+
+    Событие отправляется через pg_notify; каждый процесс слушает канал
+    в отдельном потоке (с отдельным соединением) и рассылает полученные
+    события своим подписчикам.
+    """
+
+    CHANNEL = 'booking_events'
+    RECONNECT_DELAY = 5
+
+    def __init__(self, using='default'):
+        super().__init__()
+        self.using = using
+        self._listener = None
+
+    def subscribe(self, dates):
+        self._ensure_listener()
+        return super().subscribe(dates)
+
+    def publish(self, event, dates):
+        payload = json.dumps({'event': event, 'dates': sorted(dates)})
+        with connections[self.using].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.CHANNEL, payload])
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name='booking-events-listener', daemon=True
+                )
+                self._listener.start()
+
+    def _listen_params(self, wrapper):
+        """Параметры соединения LISTEN: мимо PgBouncer, если задан BOOKING_EVENTS_LISTEN_HOST"""
+        params = wrapper.get_connection_params()
+        if settings.BOOKING_EVENTS_LISTEN_HOST:
+            host, _, port = settings.BOOKING_EVENTS_LISTEN_HOST.partition(':')
+            params['host'] = host
+            if port:
+                params['port'] = port
+        return params
+
+    def _listen(self):
+        wrapper = connections[self.using]
+        while True:
+            connection = None
+            try:
+                connection = wrapper.get_new_connection(self._listen_params(wrapper))
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.CHANNEL}')
+                while True:
+                    if select.select([connection], [], [], self.RECONNECT_DELAY) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        message = json.loads(notify.payload)
+                        self._fan_out(message['event'], message['dates'])
+            except Exception:
+                logger.exception('Ошибка прослушивания канала %s', self.CHANNEL)
+                time.sleep(self.RECONNECT_DELAY)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+def _booking_event(kind, booking):
+    return {
+        'type': kind,
+        'id': booking.id,
+        'room_id': booking.room_id,
+        'date': booking.booking_date.isoformat(),
+        'start_time': booking.start_time.strftime('%H:%M'),
+        'end_time': booking.end_time.strftime('%H:%M'),
+    }
+
+
+def publish_bookings(kind, bookings, extra_dates=()):
+    """Опубликовать события бронирований после фиксации транзакции.
+
+    kind: created, updated, cancelled или deleted. extra_dates —
+    дополнительные даты, подписчики которых тоже получат события
+    (например, прежняя дата перенесённого бронирования).
+    """
+    events = [
+        (_booking_event(kind, booking), {booking.booking_date.isoformat(), *extra_dates})
+        for booking in bookings
+    ]
+    if not events:
+        return
+
+    def send():
+        broker = get_broker()
+        for event, dates in events:
+            try:
+                broker.publish(event, dates)
+            except Exception:
+                # Доставка событий не должна ломать запись бронирования
+                logger.exception('Не удалось опубликовать событие бронирования')
+
+    transaction.on_commit(send)
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:02
+
+import bookings.models
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+    ]
+
+    operations = [
+        # Оператор = для integer в GiST-индексе ограничения
+        BtreeGistExtension(),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status', 'active')), expressions=[('room', '='), (bookings.models.TsRange(django.db.models.expressions.CombinedExpression(models.F('booking_date'), '+', models.F('start_time')), django.db.models.expressions.CombinedExpression(models.F('booking_date'), '+', models.F('end_time')), models.Value('[)')), '&&')], name='bookings_no_overlap'),
+        ),
+    ]
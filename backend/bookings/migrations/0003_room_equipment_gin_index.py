@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:06
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_booking_no_overlap_constraint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='room',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['equipment'], name='rooms_equipment_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
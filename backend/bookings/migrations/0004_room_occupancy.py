@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from bookings import occupancy
+
+
+def build_occupancy(apps, schema_editor):
+    """Карты занятости для уже существующих активных бронирований"""
+    Booking = apps.get_model('bookings', 'Booking')
+    RoomOccupancy = apps.get_model('bookings', 'RoomOccupancy')
+    minutes = settings.BOOKING_SLOT_MINUTES
+    
+    rows = Booking.objects.filter(status='active').values_list(
+        'room_id', 'booking_date', 'start_time', 'end_time'
+    )
+    grouped = occupancy.group_intervals(rows.iterator(chunk_size=5000))
+    RoomOccupancy.objects.bulk_create([
+        RoomOccupancy(
+            room_id=room_id, booking_date=booking_date, slot_minutes=minutes,
+            bits=occupancy.to_bytes(occupancy.compute_bits(intervals, minutes), minutes)
+        )
+        for (room_id, booking_date), intervals in grouped.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_room_equipment_gin_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomOccupancy',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('booking_date', models.DateField(verbose_name='Дата')),
+                ('slot_minutes', models.PositiveSmallIntegerField(verbose_name='Длина слота, мин')),
+                ('bits', models.BinaryField(verbose_name='Занятые слоты')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='bookings.room', verbose_name='Комната')),
+            ],
+            options={
+                'verbose_name': 'Занятость комнаты',
+                'verbose_name_plural': 'Занятость комнат',
+                'db_table': 'room_occupancy',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='roomoccupancy',
+            constraint=models.UniqueConstraint(fields=('room', 'booking_date'), name='room_occupancy_room_date_uniq'),
+        ),
+        migrations.RunPython(build_occupancy, migrations.RunPython.noop),
+    ]
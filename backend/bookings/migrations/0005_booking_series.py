@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0004_room_occupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSeries',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('frequency', models.CharField(choices=[('daily', 'Ежедневно'), ('weekly', 'Еженедельно')], max_length=10, verbose_name='Повторение')),
+                ('interval', models.PositiveSmallIntegerField(default=1, verbose_name='Шаг повторения')),
+                ('weekdays', models.JSONField(blank=True, default=list, verbose_name='Дни недели (0 — понедельник)')),
+                ('start_date', models.DateField(verbose_name='Дата начала')),
+                ('until', models.DateField(verbose_name='Дата окончания')),
+                ('start_time', models.TimeField(verbose_name='Время начала')),
+                ('end_time', models.TimeField(verbose_name='Время окончания')),
+                ('purpose', models.TextField(blank=True, null=True, verbose_name='Цель бронирования')),
+                ('status', models.CharField(choices=[('active', 'Активно'), ('cancelled', 'Отменено')], db_index=True, default='active', max_length=20, verbose_name='Статус')),
+                ('expanded_until', models.DateField(blank=True, null=True, verbose_name='Развёрнута до')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('cancelled_at', models.DateTimeField(blank=True, null=True, verbose_name='Отменена')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='series', to='bookings.room', verbose_name='Комната')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_series', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Серия бронирований',
+                'verbose_name_plural': 'Серии бронирований',
+                'db_table': 'booking_series',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='bookings.bookingseries', verbose_name='Серия'),
+        ),
+    ]
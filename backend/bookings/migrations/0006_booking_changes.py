@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:20
+
+from django.db import migrations, models
+
+
+# Номер транзакции изменения и журнал удалений ведутся триггерами, чтобы
+# их не обходили ни QuerySet.update(), ни каскадное удаление
+CHANGE_TRIGGERS_SQL = """
+CREATE FUNCTION bookings_set_change_txid() RETURNS trigger AS $$
+BEGIN
+    NEW.change_txid := txid_current();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER bookings_set_change_txid
+BEFORE INSERT OR UPDATE ON bookings
+FOR EACH ROW EXECUTE FUNCTION bookings_set_change_txid();
+
+CREATE FUNCTION bookings_record_deletion() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO booking_deletions (booking_id, room_id, user_id, booking_date, change_txid, deleted_at)
+    VALUES (OLD.id, OLD.room_id, OLD.user_id, OLD.booking_date, txid_current(), now());
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER bookings_record_deletion
+AFTER DELETE ON bookings
+FOR EACH ROW EXECUTE FUNCTION bookings_record_deletion();
+"""
+
+DROP_CHANGE_TRIGGERS_SQL = """
+DROP TRIGGER bookings_record_deletion ON bookings;
+DROP FUNCTION bookings_record_deletion();
+DROP TRIGGER bookings_set_change_txid ON bookings;
+DROP FUNCTION bookings_set_change_txid();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_booking_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDeletion',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('booking_id', models.IntegerField(verbose_name='Бронирование')),
+                ('room_id', models.IntegerField(verbose_name='Комната')),
+                ('user_id', models.IntegerField(verbose_name='Пользователь')),
+                ('booking_date', models.DateField(verbose_name='Дата бронирования')),
+                ('change_txid', models.BigIntegerField(db_index=True, verbose_name='Транзакция удаления')),
+                ('deleted_at', models.DateTimeField(verbose_name='Удалено')),
+            ],
+            options={
+                'verbose_name': 'Удалённое бронирование',
+                'verbose_name_plural': 'Удалённые бронирования',
+                'db_table': 'booking_deletions',
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='change_txid',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Транзакция изменения'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['change_txid', 'id'], name='bookings_change__ec10c3_idx'),
+        ),
+        migrations.RunSQL(CHANGE_TRIGGERS_SQL, DROP_CHANGE_TRIGGERS_SQL),
+    ]
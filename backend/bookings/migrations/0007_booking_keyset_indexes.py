@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:35
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся без блокировки записи в большую таблицу bookings
+    atomic = False
+
+    dependencies = [
+        ('bookings', '0006_booking_changes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['booking_date', 'start_time', 'id'], name='bookings_booking_bdc295_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['user', 'booking_date', 'start_time', 'id'], name='bookings_user_id_0f7690_idx'),
+        ),
+    ]
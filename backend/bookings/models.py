@@ -1,9 +1,22 @@
-from django.db import models
+from django.db import models, router, transaction, IntegrityError
+from django.db.models import Exists, F, Func, OuterRef, Q, Value
+from django.db.models.lookups import GreaterThan
+from django.db.models.query import RawQuerySet
+from django.db.models.sql import UpdateQuery
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import datetime, timedelta, date, time as dt_time
+import functools
+import operator
 import uuid
+from asgiref.local import Local
+from core import metrics
 from users.models import User
+from .cache import bump_dates, bump_rooms
+from . import events, occupancy
 
 
 class Room(models.Model):
@@ -31,9 +44,89 @@ class Room(models.Model):
         verbose_name = 'Комната'
         verbose_name_plural = 'Комнаты'
         ordering = ['name']
+        indexes = [
+            # Поиск комнат по оборудованию: equipment @> '["..."]'
+            GinIndex(fields=['equipment'], name='rooms_equipment_gin', opclasses=['jsonb_path_ops']),
+        ]
     
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        bump_rooms()
+
+
+# Ограничение БД, запрещающее пересечение активных бронирований одной комнаты
+OVERLAP_CONSTRAINT = 'bookings_no_overlap'
+
+# На сколько дней вперёд можно бронировать
+BOOKING_HORIZON_DAYS = 30
+
+
+class TsRange(models.Func):
+    """Диапазон timestamp без часового пояса: TSRANGE(lower, upper, bounds)"""
+    function = 'TSRANGE'
+    output_field = DateTimeRangeField()
+
+
+class BookingQuerySet(models.QuerySet):
+    """Выборки и массовые операции над бронированиями"""
+    
+    def cancellable(self, now=None):
+        """Активные бронирования, которые ещё не начались"""
+        now = timezone.localtime(now)
+        return self.filter(status='active').filter(
+            Q(booking_date__gt=now.date()) |
+            Q(booking_date=now.date(), start_time__gt=now.time())
+        )
+    
+    def cancel(self):
+        """Отменить бронирования одним UPDATE ... RETURNING.
+        
+        Условия выборки проверяются в том же запросе, что и обновление,
+        поэтому параллельная отмена не пройдёт дважды. Возвращает список
+        отменённых бронирований (пустой, если ни одно не подошло).
+        """
+        query = self.filter(status='active').order_by().query.chain(UpdateQuery)
+        query.add_update_values({'status': 'cancelled', 'cancelled_at': timezone.now()})
+        using = self._db or router.db_for_write(self.model, **self._hints)
+        update_sql, params = query.get_compiler(using).as_sql()
+        
+        with transaction.atomic(using=using):
+            cancelled = list(RawQuerySet(
+                f'{update_sql} RETURNING *', model=self.model, params=params, using=using
+            ))
+            RoomOccupancy.objects.db_manager(using).sync(
+                (booking.room_id, booking.booking_date) for booking in cancelled
+            )
+            events.publish_bookings('cancelled', cancelled)
+        bump_dates(*{booking.booking_date for booking in cancelled})
+        return cancelled
+    
+    def create_many(self, bookings, batch_size=500):
+        """bulk_create с обновлением карт занятости и кэша расписания.
+        
+        Проверки Booking.clean() не выполняются — их делает вызывающий код.
+        Пересечение с параллельной записью отклоняется ограничением БД
+        и превращается в ValidationError; в этом случае ничего не создаётся.
+        """
+        using = self._db or router.db_for_write(self.model, **self._hints)
+        try:
+            with transaction.atomic(using=using):
+                created = self.bulk_create(bookings, batch_size=batch_size)
+                RoomOccupancy.objects.db_manager(using).sync(
+                    (booking.room_id, booking.booking_date) for booking in created
+                )
+                events.publish_bookings('created', created)
+                metrics.record_created(len(created), using=using)
+        except IntegrityError as exc:
+            if OVERLAP_CONSTRAINT not in str(exc):
+                raise
+            metrics.record_conflict('constraint')
+            raise ValidationError({'time': 'Это время уже забронировано'}) from exc
+        bump_dates(*{booking.booking_date for booking in created})
+        return created
 
 
 class Booking(models.Model):
@@ -44,6 +137,9 @@ class Booking(models.Model):
         ('cancelled', 'Отменено'),
     ]
     
+    # Поля, изменение которых через save(update_fields=...) требует валидации
+    VALIDATED_FIELDS = frozenset({'room', 'room_id', 'booking_date', 'start_time', 'end_time'})
+    
     id = models.AutoField(primary_key=True)
     room = models.ForeignKey(
         Room, 
@@ -77,6 +173,20 @@ class Booking(models.Model):
     )
     created_at = models.DateTimeField('Создано', auto_now_add=True)
     cancelled_at = models.DateTimeField('Отменено', null=True, blank=True)
+    series = models.ForeignKey(
+        'BookingSeries',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bookings',
+        verbose_name='Серия'
+    )
+    
+    # Номер транзакции последнего изменения (txid_current()); заполняется
+    # триггером БД при любой вставке или обновлении строки
+    change_txid = models.BigIntegerField('Транзакция изменения', default=0, editable=False)
+    
+    objects = BookingQuerySet.as_manager()
     
     class Meta:
         db_table = 'bookings'
@@ -87,6 +197,29 @@ class Booking(models.Model):
             models.Index(fields=['room', 'booking_date', 'status']),
             models.Index(fields=['user', 'status']),
             models.Index(fields=['booking_date', 'start_time', 'end_time']),
+            # Изменения "после токена" — диапазонное сканирование
+            models.Index(fields=['change_txid', 'id']),
+            # Постраничная выдача по ключу (bookings.pagination): все бронирования
+            # и бронирования пользователя в порядке (дата, начало, id)
+            models.Index(fields=['booking_date', 'start_time', 'id']),
+            models.Index(fields=['user', 'booking_date', 'start_time', 'id']),
+        ]
+        constraints = [
+            ExclusionConstraint(
+                name=OVERLAP_CONSTRAINT,
+                expressions=[
+                    ('room', RangeOperators.EQUAL),
+                    (
+                        TsRange(
+                            F('booking_date') + F('start_time'),
+                            F('booking_date') + F('end_time'),
+                            Value('[)'),
+                        ),
+                        RangeOperators.OVERLAPS,
+                    ),
+                ],
+                condition=Q(status='active'),
+            ),
         ]
     
     def __str__(self):
@@ -94,6 +227,28 @@ class Booking(models.Model):
     
     def clean(self):
         """Валидация бронирования"""
+        errors = self.get_time_errors()
+        
+        # Проверка пересечений с другими бронированиями: сначала по карте
+        # занятости, по таблице бронирований — только при пересечении слотов.
+        # Обе читаются из БД записи: реплика может не знать о свежих бронированиях
+        using = router.db_for_write(Booking, instance=self)
+        if self.room_id and self.status == 'active' and not RoomOccupancy.objects.db_manager(using).is_free(
+            self.room_id, self.booking_date, self.start_time, self.end_time
+        ):
+            overlap_error = self.get_overlap_error(using)
+            if overlap_error:
+                errors['time'] = overlap_error
+                metrics.record_conflict('clean')
+        
+        if errors:
+            raise ValidationError(errors)
+        
+        # Запоминаем проверенное состояние, чтобы save() не повторял проверку
+        self._validated_state = self._validation_state()
+    
+    def get_time_errors(self):
+        """Ошибки даты и времени, не требующие запросов к БД"""
         errors = {}
         
         # Проверка времени
@@ -112,40 +267,103 @@ class Booking(models.Model):
                 errors['start_time'] = 'Нельзя бронировать на прошедшее время'
         
         # Проверка максимального срока (30 дней вперёд)
-        max_date = today + timedelta(days=30)
+        max_date = today + timedelta(days=BOOKING_HORIZON_DAYS)
         if self.booking_date > max_date:
-            errors['booking_date'] = 'Можно бронировать не более чем на 30 дней вперёд'
+            errors['booking_date'] = f'Можно бронировать не более чем на {BOOKING_HORIZON_DAYS} дней вперёд'
         
         # Проверка максимальной длительности (24 часа)
         duration = datetime.combine(date.min, self.end_time) - datetime.combine(date.min, self.start_time)
         if duration > timedelta(hours=24):
             errors['end_time'] = 'Максимальная длительность бронирования - 24 часа'
         
-        # Проверка пересечений с другими бронированиями
-        if self.room_id:
-            overlapping = Booking.objects.filter(
-                room=self.room,
-                booking_date=self.booking_date,
-                status='active'
-            ).exclude(id=self.id)
-            
-            for booking in overlapping:
-                if (self.start_time < booking.end_time and self.end_time > booking.start_time):
-                    errors['time'] = f'Это время уже забронировано ({booking.start_time}-{booking.end_time})'
-                    break
+        return errors
+    
+    def _validation_state(self):
+        """Значения полей, от которых зависит результат clean()"""
+        return (self.id, self.room_id, self.booking_date, self.start_time,
+                self.end_time, self.status)
+    
+    def get_overlap_error(self, using=None):
+        """Сообщение о пересечении с активным бронированием или None"""
+        using = using or router.db_for_write(Booking, instance=self)
+        overlapping = Booking.objects.using(using).filter(
+            room_id=self.room_id,
+            booking_date=self.booking_date,
+            status='active',
+            start_time__lt=self.end_time,
+            end_time__gt=self.start_time
+        ).exclude(id=self.id).order_by('start_time').values_list('start_time', 'end_time').first()
         
-        if errors:
-            raise ValidationError(errors)
+        if overlapping:
+            start_time, end_time = overlapping
+            return f'Это время уже забронировано ({start_time}-{end_time})'
+        return None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Исходные комната и дата нужны, чтобы при их изменении обновить
+        # карту занятости и сбросить кэш расписания
+        instance._loaded_key = (instance.__dict__.get('room_id'), instance.__dict__.get('booking_date'))
+        return instance
+    
+    def _occupancy_keys(self):
+        """Пары (room_id, booking_date), которые затрагивает запись"""
+        return {(self.room_id, self.booking_date), getattr(self, '_loaded_key', (None, None))}
     
     def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
+        # Проверка нужна, только если меняются проверяемые поля и состояние
+        # ещё не было проверено (например, в сериализаторе).
+        # Переходы статуса и прочие поля не затрагивают время и комнату
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or not self.VALIDATED_FIELDS.isdisjoint(update_fields):
+            if getattr(self, '_validated_state', None) != self._validation_state():
+                self.clean()
+        # Событие для live-обновления расписания; подписчики прежней даты
+        # перенесённого бронирования тоже его получат
+        if self._state.adding:
+            kind = 'created'
+        elif self.status == 'cancelled':
+            kind = 'cancelled'
+        else:
+            kind = 'updated'
+        event_dates = {
+            booking_date.isoformat() for _, booking_date in self._occupancy_keys() if booking_date
+        }
+        try:
+            # Точка сохранения: после ошибки ограничения транзакция остаётся рабочей
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                RoomOccupancy.objects.sync(self._occupancy_keys())
+                events.publish_bookings(kind, [self], extra_dates=event_dates)
+                if kind == 'created':
+                    metrics.record_created(1)
+        except IntegrityError as exc:
+            # Параллельная запись успела занять это время между проверкой и вставкой
+            if OVERLAP_CONSTRAINT not in str(exc):
+                raise
+            metrics.record_conflict('constraint')
+            raise ValidationError({
+                'time': self.get_overlap_error() or 'Это время уже забронировано'
+            }) from exc
+        bump_dates(*(booking_date for _, booking_date in self._occupancy_keys()))
+        self._loaded_key = (self.room_id, self.booking_date)
+    
+    def delete(self, *args, **kwargs):
+        keys = self._occupancy_keys()
+        with transaction.atomic():
+            events.publish_bookings('deleted', [self])
+            result = super().delete(*args, **kwargs)
+            RoomOccupancy.objects.sync(keys)
+        bump_dates(*(booking_date for _, booking_date in keys))
+        return result
     
     def cancel(self):
         """Отмена бронирования"""
         self.status = 'cancelled'
         self.cancelled_at = timezone.now()
-        self.save()
+        # Переход статуса: обновляем только изменённые поля, без повторной валидации
+        self.save(update_fields=['status', 'cancelled_at'])
     
     @property
     def can_cancel(self):
@@ -167,3 +385,396 @@ class Booking(models.Model):
         """Длительность бронирования в минутах"""
         duration = datetime.combine(date.min, self.end_time) - datetime.combine(date.min, self.start_time)
         return int(duration.total_seconds() / 60)
+
+
+class BookingDeletion(models.Model):
+    """Удалённое бронирование (для синхронизации изменений).
+    
+    Записывается триггером БД при удалении строки bookings, в том числе
+    каскадном. Ссылки — просто числа: комнаты и пользователя может уже не быть.
+    """
+    
+    id = models.AutoField(primary_key=True)
+    booking_id = models.IntegerField('Бронирование')
+    room_id = models.IntegerField('Комната')
+    user_id = models.IntegerField('Пользователь')
+    booking_date = models.DateField('Дата бронирования')
+    change_txid = models.BigIntegerField('Транзакция удаления', db_index=True)
+    deleted_at = models.DateTimeField('Удалено')
+    
+    class Meta:
+        db_table = 'booking_deletions'
+        verbose_name = 'Удалённое бронирование'
+        verbose_name_plural = 'Удалённые бронирования'
+    
+    def __str__(self):
+        return f"{self.booking_id} - {self.booking_date}"
+
+
+class RoomOccupancyManager(models.Manager):
+    """Поддержка карт занятости в согласованном с бронированиями виде"""
+    
+    def is_free(self, room_id, booking_date, start_time, end_time):
+        """True, если по карте занятости интервал точно свободен"""
+        row = self.filter(room_id=room_id, booking_date=booking_date).values_list(
+            'slot_minutes', 'bits'
+        ).first()
+        if row is None:
+            return True
+        minutes, bits = row
+        if minutes != occupancy.slot_minutes():
+            # Карта построена с другим шагом — решение по таблице бронирований
+            return False
+        return not occupancy.from_bytes(bits) & occupancy.slot_mask(start_time, end_time, minutes)
+    
+    def free_rooms(self, rooms, date_from, date_to, start_time, end_time):
+        """Комнаты из QuerySet rooms, свободные в интервал времени на всех датах периода.
+        
+        Сначала по картам выбираются комнаты, у которых слоты интервала
+        заняты хотя бы на одну дату (или карта построена с другим шагом).
+        Только для них таблица бронирований проверяет настоящее пересечение:
+        оно может оказаться лишь на границе слота.
+        """
+        minutes = occupancy.slot_minutes()
+        mask = occupancy.to_bytes(occupancy.slot_mask(start_time, end_time, minutes), minutes)
+        # Пересечение со слотами проверяется в БД побайтно: get_byte(bits, i) & маска
+        collides = functools.reduce(operator.or_, [
+            Q(GreaterThan(
+                Func('bits', Value(index), function='get_byte', output_field=models.IntegerField()).bitand(byte),
+                0
+            ))
+            for index, byte in enumerate(mask) if byte
+        ], ~Q(slot_minutes=minutes))
+        colliding = set(
+            self.filter(collides, room__in=rooms, booking_date__range=(date_from, date_to))
+            .order_by().values_list('room_id', flat=True).distinct()
+        )
+        if not colliding:
+            return rooms
+        conflicts = Booking.objects.filter(
+            room=OuterRef('pk'),
+            booking_date__range=(date_from, date_to),
+            status='active',
+            start_time__lt=end_time,
+            end_time__gt=start_time
+        )
+        busy = Room.objects.using(self.db).filter(id__in=colliding).filter(Exists(conflicts))
+        return rooms.exclude(id__in=set(busy.values_list('id', flat=True)))
+    
+    def sync(self, keys):
+        """Пересчитать карты для пар (room_id, booking_date).
+        
+        Вызывается в транзакции записи бронирования. Строки карт
+        блокируются до пересчёта, поэтому параллельные записи в одну
+        комнату и дату применяются последовательно.
+        """
+        keys = sorted({key for key in keys if None not in key})
+        if not keys:
+            return
+        
+        minutes = occupancy.slot_minutes()
+        self.bulk_create([
+            self.model(room_id=room_id, booking_date=booking_date, slot_minutes=minutes,
+                       bits=occupancy.to_bytes(0, minutes))
+            for room_id, booking_date in keys
+        ], ignore_conflicts=True)
+        
+        key_filter = Q()
+        for room_id, booking_date in keys:
+            key_filter |= Q(room_id=room_id, booking_date=booking_date)
+        
+        locked = list(
+            self.select_for_update().filter(key_filter)
+            .order_by('room_id', 'booking_date').only('id', 'room_id', 'booking_date')
+        )
+        intervals = occupancy.group_intervals(
+            Booking.objects.using(self.db).filter(key_filter, status='active')
+            .values_list('room_id', 'booking_date', 'start_time', 'end_time')
+        )
+        for row in locked:
+            bits = occupancy.compute_bits(intervals[(row.room_id, row.booking_date)], minutes)
+            row.slot_minutes = minutes
+            row.bits = occupancy.to_bytes(bits, minutes)
+        self.bulk_update(locked, ['slot_minutes', 'bits'], batch_size=500)
+    
+    def _expected(self, date_from=None, date_to=None):
+        bookings = Booking.objects.using(self.db).filter(status='active')
+        if date_from:
+            bookings = bookings.filter(booking_date__gte=date_from)
+        if date_to:
+            bookings = bookings.filter(booking_date__lte=date_to)
+        rows = bookings.values_list('room_id', 'booking_date', 'start_time', 'end_time')
+        return occupancy.group_intervals(rows.iterator(chunk_size=5000))
+    
+    def _in_range(self, date_from=None, date_to=None):
+        queryset = self.all()
+        if date_from:
+            queryset = queryset.filter(booking_date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(booking_date__lte=date_to)
+        return queryset
+    
+    def rebuild(self, date_from=None, date_to=None):
+        """Перестроить карты за период по таблице бронирований; возвращает число карт"""
+        minutes = occupancy.slot_minutes()
+        with transaction.atomic(using=self.db):
+            self._in_range(date_from, date_to).delete()
+            grouped = self._expected(date_from, date_to)
+            self.bulk_create([
+                self.model(
+                    room_id=room_id, booking_date=booking_date, slot_minutes=minutes,
+                    bits=occupancy.to_bytes(occupancy.compute_bits(intervals, minutes), minutes)
+                )
+                for (room_id, booking_date), intervals in grouped.items()
+            ], batch_size=1000)
+        return len(grouped)
+    
+    def find_mismatches(self, date_from=None, date_to=None):
+        """Расхождения карт с таблицей бронирований: [((room_id, date), ожидаемо, в БД)]"""
+        minutes = occupancy.slot_minutes()
+        expected = {
+            key: occupancy.compute_bits(intervals, minutes)
+            for key, intervals in self._expected(date_from, date_to).items()
+        }
+        stored = {
+            (room_id, booking_date): (stored_minutes, occupancy.from_bytes(bits))
+            for room_id, booking_date, stored_minutes, bits in self._in_range(date_from, date_to)
+            .values_list('room_id', 'booking_date', 'slot_minutes', 'bits').iterator(chunk_size=5000)
+        }
+        
+        mismatches = []
+        for key in sorted(expected.keys() | stored.keys()):
+            expected_bits = expected.get(key, 0)
+            stored_minutes, stored_bits = stored.get(key, (minutes, 0))
+            if stored_minutes != minutes or stored_bits != expected_bits:
+                mismatches.append((key, expected_bits, stored_bits))
+        return mismatches
+
+
+class RoomOccupancy(models.Model):
+    """Карта занятости комнаты на дату (битовая маска слотов)"""
+    
+    id = models.AutoField(primary_key=True)
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='occupancy',
+        verbose_name='Комната'
+    )
+    booking_date = models.DateField('Дата')
+    slot_minutes = models.PositiveSmallIntegerField('Длина слота, мин')
+    bits = models.BinaryField('Занятые слоты')
+    
+    objects = RoomOccupancyManager()
+    
+    class Meta:
+        db_table = 'room_occupancy'
+        verbose_name = 'Занятость комнаты'
+        verbose_name_plural = 'Занятость комнат'
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'booking_date'], name='room_occupancy_room_date_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.room_id} - {self.booking_date}"
+
+
+class BookingSeries(models.Model):
+    """Серия повторяющихся бронирований.
+    
+    Правило повторения (ежедневно или еженедельно по выбранным дням недели
+    с шагом interval) хранится в серии, а сами бронирования создаются только
+    в пределах BOOKING_HORIZON_DAYS; более поздние даты разворачиваются
+    командой expand_series по мере приближения.
+    """
+    
+    FREQUENCY_CHOICES = [
+        ('daily', 'Ежедневно'),
+        ('weekly', 'Еженедельно'),
+    ]
+    
+    id = models.AutoField(primary_key=True)
+    room = models.ForeignKey(
+        Room,
+        on_delete=models.CASCADE,
+        related_name='series',
+        verbose_name='Комната'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='booking_series',
+        verbose_name='Пользователь'
+    )
+    frequency = models.CharField('Повторение', max_length=10, choices=FREQUENCY_CHOICES)
+    interval = models.PositiveSmallIntegerField('Шаг повторения', default=1)
+    weekdays = models.JSONField('Дни недели (0 — понедельник)', default=list, blank=True)
+    start_date = models.DateField('Дата начала')
+    until = models.DateField('Дата окончания')
+    start_time = models.TimeField('Время начала')
+    end_time = models.TimeField('Время окончания')
+    purpose = models.TextField('Цель бронирования', blank=True, null=True)
+    status = models.CharField(
+        'Статус',
+        max_length=20,
+        choices=Booking.STATUS_CHOICES,
+        default='active',
+        db_index=True
+    )
+    expanded_until = models.DateField('Развёрнута до', null=True, blank=True)
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+    cancelled_at = models.DateTimeField('Отменена', null=True, blank=True)
+    
+    class Meta:
+        db_table = 'booking_series'
+        verbose_name = 'Серия бронирований'
+        verbose_name_plural = 'Серии бронирований'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.room.name} - {self.get_frequency_display()} {self.start_time}-{self.end_time}"
+    
+    def occurrence_dates(self, date_from, date_to):
+        """Даты повторений в интервале [date_from, date_to]"""
+        date_from = max(date_from, self.start_date)
+        date_to = min(date_to, self.until)
+        
+        if self.frequency == 'daily':
+            step = timedelta(days=self.interval)
+            current = self.start_date
+            if date_from > current:
+                # Первое повторение не раньше date_from
+                periods = -(-(date_from - current).days // self.interval)
+                current += step * periods
+            while current <= date_to:
+                yield current
+                current += step
+            return
+        
+        weekdays = sorted(set(self.weekdays)) or [self.start_date.weekday()]
+        week_start = self.start_date - timedelta(days=self.start_date.weekday())
+        if date_from > week_start:
+            weeks = (date_from - week_start).days // 7
+            week_start += timedelta(weeks=weeks - weeks % self.interval)
+        while week_start <= date_to:
+            for weekday in weekdays:
+                current = week_start + timedelta(days=weekday)
+                if date_from <= current <= date_to:
+                    yield current
+            week_start += timedelta(weeks=self.interval)
+    
+    def find_conflicts(self, dates):
+        """Пересечения повторений с активными бронированиями — один запрос"""
+        overlapping = Booking.objects.using(router.db_for_write(Booking)).filter(
+            room_id=self.room_id,
+            booking_date__in=dates,
+            status='active',
+            start_time__lt=self.end_time,
+            end_time__gt=self.start_time
+        ).order_by('booking_date', 'start_time').values_list('booking_date', 'start_time', 'end_time')
+        
+        conflicts = {}
+        for booking_date, start_time, end_time in overlapping:
+            conflicts.setdefault(
+                booking_date, f'Это время уже забронировано ({start_time}-{end_time})'
+            )
+        return conflicts
+    
+    def expand(self, skip_conflicts=True):
+        """Создать бронирования серии до горизонта бронирования.
+        
+        Возвращает (созданные бронирования, {дата: причина пропуска}).
+        При skip_conflicts=False любое пересечение — ValidationError,
+        и ничего не создаётся.
+        """
+        now = timezone.localtime()
+        today = now.date()
+        horizon = today + timedelta(days=BOOKING_HORIZON_DAYS)
+        date_from = today
+        if self.expanded_until:
+            date_from = max(date_from, self.expanded_until + timedelta(days=1))
+        
+        dates = [
+            value for value in self.occurrence_dates(date_from, horizon)
+            # Сегодняшнее повторение, которое уже началось, пропускается
+            if value > today or self.start_time > now.time()
+        ]
+        conflicts = self.find_conflicts(dates)
+        metrics.record_conflict('series', len(conflicts))
+        if conflicts and not skip_conflicts:
+            raise ValidationError({
+                'conflicts': [f'{value}: {error}' for value, error in sorted(conflicts.items())]
+            })
+        
+        with transaction.atomic():
+            created = Booking.objects.create_many([
+                Booking(
+                    room_id=self.room_id,
+                    user_id=self.user_id,
+                    series=self,
+                    booking_date=value,
+                    start_time=self.start_time,
+                    end_time=self.end_time,
+                    purpose=self.purpose
+                )
+                for value in dates if value not in conflicts
+            ])
+            self.expanded_until = min(horizon, self.until)
+            self.save(update_fields=['expanded_until'])
+        return created, conflicts
+    
+    def cancel(self):
+        """Отменить серию: будущие бронирования — одним UPDATE"""
+        with transaction.atomic():
+            cancelled = Booking.objects.filter(series=self).cancellable().cancel()
+            self.status = 'cancelled'
+            self.cancelled_at = timezone.now()
+            self.save(update_fields=['status', 'cancelled_at'])
+        return cancelled
+
+
+# Пары (комната, дата) бронирований, удалённых в текущей транзакции мимо
+# Booking.delete(); хранилище как у соединений с БД — своё у каждого потока и запроса
+_deleted = Local()
+
+
+def booking_deleted(sender, instance, origin=None, using=None, **kwargs):
+    """Бронирование удалено каскадом (с пользователем или комнатой) или QuerySet.delete().
+
+    Booking.delete() сам обновляет карты занятости и сбрасывает кэш
+    расписания. Остальные удаления собираются на транзакцию и
+    обрабатываются один раз после фиксации. До этого карта лишь считает
+    освободившиеся слоты занятыми, и решение принимается по таблице
+    бронирований.
+    """
+    if isinstance(origin, Booking):
+        return
+    if not hasattr(_deleted, 'keys'):
+        _deleted.keys = set()
+    _deleted.keys.add((using, instance.room_id, instance.booking_date))
+    events.publish_bookings('deleted', [instance])
+    transaction.on_commit(_flush_deleted, using=using)
+
+
+def _flush_deleted():
+    keys, _deleted.keys = getattr(_deleted, 'keys', set()), set()
+    for using in {using for using, _, _ in keys}:
+        pairs = {(room_id, booking_date) for alias, room_id, booking_date in keys if alias == using}
+        # Карты удалённой комнаты удалены вместе с ней
+        rooms = set(Room.objects.using(using).filter(
+            id__in={room_id for room_id, _ in pairs}
+        ).values_list('id', flat=True))
+        with transaction.atomic(using=using):
+            RoomOccupancy.objects.db_manager(using).sync(
+                (room_id, booking_date) for room_id, booking_date in pairs if room_id in rooms
+            )
+    bump_dates(*{booking_date for _, _, booking_date in keys})
+
+
+def room_deleted(sender, instance, **kwargs):
+    """Комната удалена (в том числе через QuerySet.delete())"""
+    bump_rooms()
+
+
+models.signals.post_delete.connect(booking_deleted, sender=Booking)
+models.signals.post_delete.connect(room_deleted, sender=Room)
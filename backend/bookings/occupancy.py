@@ -0,0 +1,61 @@
+"""Битовые карты занятости комнат.
+
+Сутки делятся на слоты по settings.BOOKING_SLOT_MINUTES минут; бит i
+установлен, если слот i занят хотя бы одним активным бронированием.
+Бронирование занимает все слоты, с которыми пересекается, поэтому карта
+даёт точный ответ "свободно", а при пересечении битов на границе слота
+окончательное решение принимается по таблице бронирований.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def slot_minutes():
+    minutes = settings.BOOKING_SLOT_MINUTES
+    if minutes <= 0 or MINUTES_PER_DAY % minutes:
+        raise ImproperlyConfigured('BOOKING_SLOT_MINUTES должен делить сутки (1440 минут) нацело')
+    return minutes
+
+
+def slot_mask(start_time, end_time, minutes=None):
+    """Маска слотов, которые занимает интервал [start_time, end_time)"""
+    minutes = minutes or slot_minutes()
+    start = start_time.hour * 60 + start_time.minute
+    end = end_time.hour * 60 + end_time.minute
+    if end_time.second or end_time.microsecond:
+        end += 1
+    first = start // minutes
+    last = -(-end // minutes)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def compute_bits(intervals, minutes=None):
+    """Карта занятости по списку интервалов (start_time, end_time)"""
+    bits = 0
+    for start_time, end_time in intervals:
+        bits |= slot_mask(start_time, end_time, minutes)
+    return bits
+
+
+def to_bytes(bits, minutes=None):
+    minutes = minutes or slot_minutes()
+    return bits.to_bytes(-(-MINUTES_PER_DAY // minutes // 8), 'little')
+
+
+def from_bytes(data):
+    return int.from_bytes(bytes(data), 'little')
+
+
+def group_intervals(rows):
+    """Интервалы по (room_id, booking_date) из строк (room_id, booking_date, start, end)"""
+    grouped = defaultdict(list)
+    for room_id, booking_date, start_time, end_time in rows:
+        grouped[(room_id, booking_date)].append((start_time, end_time))
+    return grouped
@@ -0,0 +1,143 @@
+"""Постраничная выдача бронирований по ключу (keyset).
+
+Страница продолжается с позиции (booking_date, start_time, id) последней
+строки предыдущей страницы: условие ROW(...) < ROW(...) идёт по
+составному индексу, поэтому глубина страницы не влияет на время ответа,
+а COUNT(*) не выполняется. Вместо общего числа ответ сообщает has_more.
+С параметром page выдача прежняя, по номеру страницы (с count).
+"""
+import base64
+import binascii
+from datetime import date, time
+
+from django.db.models import DateField, F, Field, Func, IntegerField, TimeField, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+KEY_FIELDS = ('booking_date', 'start_time', 'id')
+
+
+def _row(*expressions):
+    return Func(*expressions, function='ROW', output_field=Field())
+
+
+class BookingKeysetPagination(BasePagination):
+    """Страницы по (booking_date, start_time, id); descending — от новых к старым"""
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 500
+    invalid_cursor_message = 'Неверный курсор'
+
+    def __init__(self, descending=True):
+        self.descending = descending
+        self.page_number_pagination = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Полный ключ и в режиме page: без id строки с одинаковыми датой и
+        # временем OFFSET раскладывал бы по страницам в произвольном порядке
+        prefix = '-' if self.descending else ''
+        queryset = queryset.order_by(*(prefix + field for field in KEY_FIELDS))
+        if PageNumberPagination.page_query_param in request.query_params:
+            # Совместимость: постраничная выдача по номеру с COUNT(*) и OFFSET
+            self.page_number_pagination = PageNumberPagination()
+            return self.page_number_pagination.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            key = _row(*(F(field) for field in KEY_FIELDS))
+            after = _row(
+                Value(position[0], output_field=DateField()),
+                Value(position[1], output_field=TimeField()),
+                Value(position[2], output_field=IntegerField()),
+            )
+            lookup = 'position__lt' if self.descending else 'position__gt'
+            queryset = queryset.alias(position=key).filter(**{lookup: after})
+
+        rows = list(queryset[:page_size + 1])
+        self.has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_position = self.get_position(rows[-1]) if self.has_more else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    @staticmethod
+    def get_position(row):
+        """Позиция строки: row — словарь values() или объект Booking"""
+        if isinstance(row, dict):
+            return tuple(row[field] for field in KEY_FIELDS)
+        return tuple(getattr(row, field) for field in KEY_FIELDS)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            booking_date, start_time, booking_id = base64.urlsafe_b64decode(
+                cursor + '=' * (-len(cursor) % 4)
+            ).decode().split('|')
+            return date.fromisoformat(booking_date), time.fromisoformat(start_time), int(booking_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        value = '|'.join(part.isoformat() if hasattr(part, 'isoformat') else str(part) for part in position)
+        return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), PageNumberPagination.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_page_data(self, data, key='results'):
+        """Данные страницы и ссылки продолжения под ключом key"""
+        return {
+            'next': self.get_next_link(),
+            'has_more': self.has_more,
+            key: data,
+        }
+
+    def get_paginated_response(self, data):
+        if self.page_number_pagination is not None:
+            return self.page_number_pagination.get_paginated_response(data)
+        return Response(self.get_page_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'has_more': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param, 'required': False, 'in': 'query',
+                'description': 'Курсор следующей страницы (из ссылки next)', 'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param, 'required': False, 'in': 'query',
+                'description': f'Размер страницы (до {self.max_page_size})', 'schema': {'type': 'integer'},
+            },
+            {
+                'name': PageNumberPagination.page_query_param, 'required': False, 'in': 'query',
+                'description': 'Номер страницы (устаревший режим с count)', 'schema': {'type': 'integer'},
+            },
+        ]
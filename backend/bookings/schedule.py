@@ -0,0 +1,218 @@
+"""Построение расписания комнат.
+
+Бронирования выбираются одним запросом через values() и раскладываются
+по (room_id, booking_date) за один проход. Результат сразу формируется
+в виде готового JSON-совместимого словаря, поэтому ScheduleSerializer
+используется только для описания схемы API.
+
+Расписание на дату строится в два слоя: общая для всех пользователей
+основа, которая кэшируется по версиям из bookings.cache, и наложение
+полей конкретного пользователя (is_own, can_cancel) при каждом запросе.
+"""
+import hashlib
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from rest_framework.settings import api_settings
+
+from users.models import User
+from .cache import get_cache, get_versions
+from .models import Room, Booking
+
+
+ROOM_FIELDS = ('id', 'name', 'capacity', 'description', 'floor')
+
+BOOKING_FIELDS = (
+    'id', 'room_id', 'user_id', 'booking_date', 'start_time', 'end_time', 'purpose',
+    'user__username', 'user__first_name', 'user__last_name', 'user__patronymic',
+)
+
+
+def _format(value, fmt):
+    return value.strftime(fmt) if value is not None else None
+
+
+def _seconds(value):
+    return value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+
+
+def date_range(date_from, date_to):
+    """Даты от date_from до date_to включительно"""
+    return [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+
+
+def rooms_query(using=None):
+    """Активные комнаты в порядке отображения (values()-выборка)"""
+    return Room.objects.using(using).filter(is_active=True).order_by('name').values(*ROOM_FIELDS)
+
+
+def get_rooms(using=None):
+    """Активные комнаты в порядке отображения"""
+    return list(rooms_query(using))
+
+
+def get_bookings(dates, using=None):
+    """Активные бронирования на указанные даты в виде словарей"""
+    return Booking.objects.using(using).filter(
+        booking_date__in=dates,
+        room__is_active=True,
+        status='active'
+    ).values(*BOOKING_FIELDS)
+
+
+def build_bases(dates, rooms, bookings):
+    """Общая для всех пользователей основа расписания на каждую дату"""
+    time_format = api_settings.TIME_FORMAT
+
+    grouped = defaultdict(list)
+    for row in bookings:
+        grouped[(row['room_id'], row['booking_date'])].append({
+            'id': row['id'],
+            'start_time': _format(row['start_time'], time_format),
+            'end_time': _format(row['end_time'], time_format),
+            'user_name': User.compose_full_name(
+                row['user__last_name'], row['user__first_name'], row['user__patronymic']
+            ),
+            'user_username': row['user__username'],
+            'purpose': row['purpose'],
+            'user_id': row['user_id'],
+            'start_seconds': _seconds(row['start_time']),
+        })
+
+    return {
+        value: {
+            'date': _format(value, api_settings.DATE_FORMAT),
+            # Даты сравниваются по номеру дня: строка DATE_FORMAT не обязана
+            # сортироваться как дата (например, '%d.%m.%Y')
+            'ordinal': value.toordinal(),
+            'rooms': [
+                {**room, 'bookings': grouped.get((room['id'], value), [])}
+                for room in rooms
+            ],
+        }
+        for value in dates
+    }
+
+
+def _cached_bases(dates):
+    """Ключи кэша, найденные в кэше основы и версия набора"""
+    cache = get_cache()
+    rooms_version, date_versions = get_versions(dates)
+    keys = {
+        value: f'schedule:day:{value.isoformat()}:{rooms_version}:{date_versions[value]}'
+        for value in dates
+    }
+    cached = cache.get_many(keys.values())
+    bases = {value: cached[key] for value, key in keys.items() if key in cached}
+    version = ':'.join([rooms_version, *(date_versions[value] for value in dates)])
+    return keys, bases, version
+
+
+def _store_bases(keys, built):
+    get_cache().set_many(
+        {keys[value]: base for value, base in built.items()},
+        timeout=settings.SCHEDULE_CACHE_TIMEOUT
+    )
+
+
+def load_bases(dates):
+    """Основы расписания на даты (из кэша или одним запросом) и версия набора"""
+    keys, bases, version = _cached_bases(dates)
+
+    missing = [value for value in dates if value not in bases]
+    if missing:
+        # Основа строится по основной БД: отставшая реплика закэшировала бы
+        # прежнее расписание под новой версией на весь срок кэша
+        built = build_bases(
+            missing, get_rooms(DEFAULT_DB_ALIAS), get_bookings(missing, DEFAULT_DB_ALIAS)
+        )
+        _store_bases(keys, built)
+        bases.update(built)
+
+    return [bases[value] for value in dates], version
+
+
+async def aload_bases(dates):
+    """load_bases() для асинхронных представлений.
+
+    Кэш читается одним переходом в поток: async API кэша Django 4.2 — это
+    sync_to_async на каждый ключ. Промахи выбираются через async ORM.
+    """
+    keys, bases, version = await sync_to_async(_cached_bases)(dates)
+
+    missing = [value for value in dates if value not in bases]
+    if missing:
+        rooms = [room async for room in rooms_query(DEFAULT_DB_ALIAS)]
+        bookings = [row async for row in get_bookings(missing, DEFAULT_DB_ALIAS)]
+        built = build_bases(missing, rooms, bookings)
+        await sync_to_async(_store_bases)(keys, built)
+        bases.update(built)
+
+    return [bases[value] for value in dates], version
+
+
+def _cancel_threshold(ordinal, today, now_seconds):
+    """Начало, после которого бронирование ещё можно отменить (в секундах от полуночи)"""
+    if ordinal > today:
+        return -1
+    if ordinal == today:
+        return now_seconds
+    return None
+
+
+def personalize(base, user_id, now):
+    """Наложить поля пользователя на основу расписания"""
+    threshold = _cancel_threshold(base['ordinal'], now.date().toordinal(), _seconds(now.time()))
+    return {
+        'date': base['date'],
+        'rooms': [
+            {
+                **room,
+                'bookings': [
+                    {
+                        'id': slot['id'],
+                        'start_time': slot['start_time'],
+                        'end_time': slot['end_time'],
+                        'status': 'booked',
+                        'user_name': slot['user_name'],
+                        'user_username': slot['user_username'],
+                        'is_own': slot['user_id'] == user_id,
+                        'purpose': slot['purpose'],
+                        # Аналог Booking.can_cancel с одним значением "сейчас" на запрос
+                        'can_cancel': threshold is not None and slot['start_seconds'] > threshold,
+                    }
+                    for slot in room['bookings']
+                ],
+            }
+            for room in base['rooms']
+        ],
+    }
+
+
+def schedule_etag(bases, version, user_id, now):
+    """Сильный ETag персонального расписания.
+
+    Зависит от версий данных, пользователя и момента, до которого
+    бронирования на сегодня перестали быть отменяемыми.
+    """
+    today = now.date().toordinal()
+    now_seconds = _seconds(now.time())
+    started = sum(
+        1
+        for base in bases if base['ordinal'] == today
+        for room in base['rooms']
+        for slot in room['bookings'] if slot['start_seconds'] <= now_seconds
+    )
+    digest = hashlib.sha1(f'{version}:{user_id}:{today}:{started}'.encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def build_schedule(date_from, date_to, user):
+    """Расписание на период: список дней от date_from до date_to включительно"""
+    now = timezone.localtime()
+    bases, _ = load_bases(date_range(date_from, date_to))
+    return [personalize(base, user.id, now) for base in bases]
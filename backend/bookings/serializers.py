@@ -1,5 +1,11 @@
+import copy
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from rest_framework import serializers
-from .models import Room, Booking
+from rest_framework.serializers import as_serializer_error
+from datetime import timedelta
+from django.utils import timezone
+from .models import Room, Booking, BookingSeries
 from users.serializers import UserSerializer
 
 
@@ -13,7 +19,59 @@ class RoomSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingValidationMixin:
+    """Однократная валидация бронирования.
+    
+    Booking.clean() выполняется в validate() на том же объекте, который
+    затем сохраняется, поэтому Booking.save() проверку не повторяет.
+    Ошибки валидации модели при сохранении (в т.ч. конфликт в БД) — ответ 400.
+    """
+    
+    def validate(self, data):
+        """Валидация данных бронирования"""
+        # Получаем текущего пользователя из контекста
+        request = self.context.get('request')
+        if request and hasattr(request, 'user'):
+            data['user'] = request.user
+        
+        if self.instance:
+            # Обновление: копия объекта с новыми значениями
+            booking = copy.copy(self.instance)
+            for field, value in data.items():
+                setattr(booking, field, value)
+        else:
+            booking = Booking(**data)
+        
+        booking.clean()
+        self._validated_booking = booking
+        
+        return data
+    
+    def create(self, validated_data):
+        """Сохранение проверенного бронирования"""
+        return self._save_validated(validated_data)
+    
+    def update(self, instance, validated_data):
+        """Сохранение проверенной копии бронирования"""
+        return self._save_validated(validated_data)
+    
+    def _save_validated(self, validated_data):
+        # Значения из save(**kwargs); если они меняют проверяемые поля,
+        # Booking.save() выполнит проверку заново
+        booking = self._validated_booking
+        for field, value in validated_data.items():
+            setattr(booking, field, value)
+        booking.save()
+        return booking
+    
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(as_serializer_error(exc))
+
+
+class BookingSerializer(BookingValidationMixin, serializers.ModelSerializer):
     """Сериализатор для бронирования"""
     room_name = serializers.CharField(source='room.name', read_only=True)
     user_name = serializers.CharField(source='user.full_name', read_only=True)
@@ -29,50 +87,147 @@ class BookingSerializer(serializers.ModelSerializer):
                   'created_at', 'cancelled_at']
         read_only_fields = ['id', 'user', 'cancellation_token', 'status', 
                             'created_at', 'cancelled_at']
-    
-    def validate(self, data):
-        """Валидация данных бронирования"""
-        # Получаем текущего пользователя из контекста
-        request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            data['user'] = request.user
-        
-        # Создаём временный объект для валидации
-        booking = Booking(**data)
-        
-        # Если это обновление, сохраняем ID
-        if self.instance:
-            booking.id = self.instance.id
-        
-        # Вызываем метод clean для валидации
-        booking.clean()
-        
-        return data
 
 
-class BookingCreateSerializer(serializers.ModelSerializer):
+class BookingCreateSerializer(BookingValidationMixin, serializers.ModelSerializer):
     """Сериализатор для создания бронирования"""
     
     class Meta:
         model = Booking
         fields = ['room', 'booking_date', 'start_time', 'end_time', 'purpose']
+
+
+class BookingSeriesSerializer(serializers.ModelSerializer):
+    """Сериализатор для серии повторяющихся бронирований"""
+    room_name = serializers.CharField(source='room.name', read_only=True)
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6), required=False
+    )
+    skip_conflicts = serializers.BooleanField(write_only=True, default=False)
+    
+    # Максимальная длительность серии
+    MAX_SERIES_DAYS = 365
+    
+    class Meta:
+        model = BookingSeries
+        fields = ['id', 'room', 'room_name', 'frequency', 'interval', 'weekdays',
+                  'start_date', 'until', 'start_time', 'end_time', 'purpose',
+                  'status', 'expanded_until', 'created_at', 'cancelled_at',
+                  'skip_conflicts']
+        read_only_fields = ['id', 'status', 'expanded_until', 'created_at', 'cancelled_at']
+    
+    def validate_interval(self, value):
+        if value < 1:
+            raise serializers.ValidationError('Шаг повторения должен быть не меньше 1')
+        return value
     
     def validate(self, data):
-        """Валидация данных бронирования"""
-        request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            data['user'] = request.user
-        
-        booking = Booking(**data)
-        booking.clean()
-        
+        """Валидация правила повторения"""
+        if data['start_time'] >= data['end_time']:
+            raise serializers.ValidationError({
+                'end_time': 'Время окончания должно быть позже времени начала'
+            })
+        if data['start_date'] < timezone.localdate():
+            raise serializers.ValidationError({
+                'start_date': 'Нельзя бронировать на прошедшую дату'
+            })
+        if data['until'] < data['start_date']:
+            raise serializers.ValidationError({
+                'until': 'Дата окончания не может быть раньше даты начала'
+            })
+        if data['until'] > data['start_date'] + timedelta(days=self.MAX_SERIES_DAYS):
+            raise serializers.ValidationError({
+                'until': f'Серия не может быть длиннее {self.MAX_SERIES_DAYS} дней'
+            })
+        if not data['room'].is_active:
+            raise serializers.ValidationError({'room': 'Комната недоступна для бронирования'})
         return data
     
     def create(self, validated_data):
-        """Создание бронирования"""
-        request = self.context.get('request')
-        validated_data['user'] = request.user
-        return super().create(validated_data)
+        """Создание серии и её бронирований в пределах горизонта"""
+        skip_conflicts = validated_data.pop('skip_conflicts')
+        try:
+            with transaction.atomic():
+                series = super().create(validated_data)
+                self.created_bookings, self.conflicts = series.expand(skip_conflicts)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(as_serializer_error(exc))
+        return series
+
+
+# Режимы массовых операций
+BULK_MODE_CHOICES = [
+    ('atomic', 'Всё или ничего'),
+    ('partial', 'Частичное выполнение'),
+]
+
+# Максимальное число бронирований в одном массовом запросе
+BULK_MAX_ITEMS = 500
+
+
+class BookingBulkItemSerializer(serializers.Serializer):
+    """Бронирование в массовом запросе.
+    
+    Комната и пользователь передаются по id и загружаются одним запросом
+    на весь пакет, а не отдельным запросом на каждый элемент.
+    """
+    room = serializers.IntegerField()
+    user = serializers.IntegerField(required=False, allow_null=True)
+    booking_date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    purpose = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class BookingBulkCreateSerializer(serializers.Serializer):
+    """Массовое создание бронирований"""
+    bookings = BookingBulkItemSerializer(many=True, allow_empty=False, max_length=BULK_MAX_ITEMS)
+    mode = serializers.ChoiceField(choices=BULK_MODE_CHOICES, default='atomic')
+
+
+class BookingBulkCancelSerializer(serializers.Serializer):
+    """Массовая отмена бронирований по списку id или по фильтру"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False,
+        max_length=BULK_MAX_ITEMS
+    )
+    room_id = serializers.IntegerField(required=False)
+    user_id = serializers.IntegerField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    mode = serializers.ChoiceField(choices=BULK_MODE_CHOICES, default='atomic')
+    
+    FILTER_FIELDS = ('room_id', 'user_id', 'date_from', 'date_to')
+    
+    def validate(self, data):
+        """Отмена без условий затронула бы все бронирования"""
+        if 'ids' not in data and not any(field in data for field in self.FILTER_FIELDS):
+            raise serializers.ValidationError(
+                'Необходимо указать ids или хотя бы один фильтр: room_id, user_id, date_from, date_to'
+            )
+        if 'date_from' in data and 'date_to' in data and data['date_to'] < data['date_from']:
+            raise serializers.ValidationError({
+                'date_to': 'date_to не может быть раньше date_from'
+            })
+        return data
+
+
+class BookingExportSerializer(serializers.Serializer):
+    """Параметры выгрузки бронирований: формат и фильтры администраторского списка"""
+    # Не format: этот параметр DRF использует для выбора рендерера
+    output = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+    room_id = serializers.IntegerField(required=False)
+    user_id = serializers.IntegerField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    status = serializers.ChoiceField(choices=Booking.STATUS_CHOICES, required=False)
+
+    def validate(self, data):
+        if 'date_from' in data and 'date_to' in data and data['date_to'] < data['date_from']:
+            raise serializers.ValidationError({
+                'date_to': 'date_to не может быть раньше date_from'
+            })
+        return data
 
 
 class ScheduleSlotSerializer(serializers.Serializer):
@@ -102,3 +257,4 @@ class ScheduleSerializer(serializers.Serializer):
     """Сериализатор для расписания"""
     date = serializers.DateField()
     rooms = ScheduleRoomSerializer(many=True)
+
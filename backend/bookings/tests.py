@@ -0,0 +1,982 @@
+import csv
+import io
+import json
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connection
+from django.test import (
+    AsyncClient, AsyncRequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.management.commands.benchmark_schedule import legacy_schedule
+
+from users.authentication import ClaimsRefreshToken, token_versions
+from users.models import User
+from . import async_views, export, occupancy, schedule
+from .listing import serialize_bookings
+from .cache import get_cache
+from .events import make_ticket
+from .models import BOOKING_HORIZON_DAYS, Booking, BookingSeries, Room, RoomOccupancy
+from .serializers import BookingSerializer, ScheduleSerializer
+from .views import BookingViewSet
+
+
+def frozen_now(day, hour):
+    """timezone.now() в указанный час дня по местному времени"""
+    return mock.patch.object(
+        timezone, 'now', return_value=timezone.make_aware(datetime.combine(day, time(hour)))
+    )
+
+
+class BookingTestMixin:
+    """Пользователь, комната и бронирование на завтра"""
+
+    def setUp(self):
+        # Кэш расписания живёт в памяти процесса и переживает откат транзакции теста
+        get_cache().clear()
+        self.user = User.objects.create_user(
+            'ivanov', 'ivanov@example.com', 'password', first_name='Иван', last_name='Иванов'
+        )
+        self.room = Room.objects.create(name='Переговорная 1', capacity=6)
+        self.tomorrow = date.today() + timedelta(days=1)
+        self.booking = Booking.objects.create(
+            room=self.room, user=self.user, booking_date=self.tomorrow,
+            start_time=time(10, 0), end_time=time(11, 0), purpose='Планёрка'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class ScheduleCacheTests(BookingTestMixin, TestCase):
+    def get_schedule(self, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get('/api/schedule/', {'date': self.tomorrow.isoformat()}, headers=headers)
+
+    def booking_names(self, response):
+        return [
+            booking['user_name']
+            for room in response.json()['rooms'] for booking in room['bookings']
+        ]
+
+    def test_rename_invalidates_cached_schedule(self):
+        response = self.get_schedule()
+        self.assertEqual(self.booking_names(response), ['Иванов Иван'])
+        etag = response['ETag']
+        self.assertEqual(self.get_schedule(etag).status_code, 304)
+
+        user = User.objects.get(pk=self.user.pk)
+        user.last_name = 'Петров'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+        response = self.get_schedule(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.booking_names(response), ['Петров Иван'])
+
+    def assert_deletion_invalidates(self, delete):
+        etag = self.get_schedule()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            delete()
+        response = self.get_schedule(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.booking_names(response), [])
+
+    def test_user_delete_invalidates_cached_schedule(self):
+        # Бронирования удаляются каскадом, без Booking.delete()
+        self.assert_deletion_invalidates(User.objects.get(pk=self.user.pk).delete)
+
+    def test_queryset_delete_invalidates_cached_schedule(self):
+        self.assert_deletion_invalidates(Booking.objects.filter(room=self.room).delete)
+
+
+class ScheduleRangeTests(BookingTestMixin, TestCase):
+    """Расписание на несколько дней: ?week= и ?date_from=&date_to="""
+
+    def get_schedule(self, **params):
+        return self.client.get('/api/schedule/', params)
+
+    def booked_days(self, data):
+        return [day['date'] for day in data['days'] if day['rooms'][0]['bookings']]
+
+    def test_week(self):
+        response = self.get_schedule(week=self.tomorrow.isoformat())
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        monday = self.tomorrow - timedelta(days=self.tomorrow.weekday())
+        self.assertEqual(data['date_from'], monday.isoformat())
+        self.assertEqual(data['date_to'], (monday + timedelta(days=6)).isoformat())
+        self.assertEqual(
+            [day['date'] for day in data['days']],
+            [(monday + timedelta(days=offset)).isoformat() for offset in range(7)]
+        )
+        self.assertEqual(self.booked_days(data), [self.tomorrow.isoformat()])
+
+    def test_range_costs_as_much_as_one_day(self):
+        # Дни диапазона выбираются одним запросом, а не по запросу на день
+        with CaptureQueriesContext(connection) as day:
+            self.get_schedule(date=self.tomorrow.isoformat())
+        get_cache().clear()
+        date_to = self.tomorrow + timedelta(days=30)
+        with CaptureQueriesContext(connection) as days:
+            response = self.get_schedule(date_from=self.tomorrow.isoformat(), date_to=date_to.isoformat())
+        self.assertEqual(len(response.json()['days']), 31)
+        self.assertEqual(len(days), len(day))
+
+    def test_single_day_range(self):
+        data = self.get_schedule(date_from=self.tomorrow.isoformat()).json()
+        self.assertEqual(data['date_to'], self.tomorrow.isoformat())
+        self.assertEqual(self.booked_days(data), [self.tomorrow.isoformat()])
+
+    def test_limits(self):
+        date_from = self.tomorrow.isoformat()
+        for params, error in [
+            ({'date_from': date_from, 'date_to': (self.tomorrow + timedelta(days=31)).isoformat()},
+             'Диапазон не может превышать 31 дней'),
+            ({'date_from': date_from, 'date_to': (self.tomorrow - timedelta(days=1)).isoformat()},
+             'date_to не может быть раньше date_from'),
+            ({'date_to': date_from}, 'Необходимо указать date_from'),
+            ({'week': '2026-13-01'}, 'Неверный формат даты. Используйте YYYY-MM-DD'),
+        ]:
+            response = self.get_schedule(**params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertEqual(response.json(), {'error': error})
+
+
+class SchedulePayloadTests(BookingTestMixin, TestCase):
+    """Расписание из values()-выборки совпадает с прежним построением через ScheduleSerializer"""
+
+    def setUp(self):
+        super().setUp()
+        self.today = self.tomorrow - timedelta(days=1)
+        other = User.objects.create_user(
+            'petrov', 'petrov@example.com', 'password',
+            first_name='Пётр', last_name='Петров', patronymic='Петрович'
+        )
+        hall = Room.objects.create(name='Актовый зал', capacity=100, description='Сцена', floor=3)
+        closed = Room.objects.create(name='Склад', capacity=2, is_active=False)
+        for room, user, day, start_time, end_time in [
+            (hall, other, self.today, time(9, 0), time(10, 30)),
+            (hall, self.user, self.today, time(14, 0), time(15, 0)),
+            (self.room, other, self.tomorrow, time(8, 15), time(9, 45)),
+            (closed, self.user, self.tomorrow, time(12, 0), time(13, 0)),
+        ]:
+            Booking.objects.create(
+                room=room, user=user, booking_date=day, start_time=start_time, end_time=end_time
+            )
+        cancelled = Booking.objects.create(
+            room=hall, user=other, booking_date=self.tomorrow, start_time=time(16, 0), end_time=time(17, 0)
+        )
+        cancelled.cancel()
+
+    def test_matches_serializer(self):
+        with frozen_now(self.today, 12):
+            for day in (self.today, self.tomorrow):
+                response = self.client.get('/api/schedule/', {'date': day.isoformat()})
+                expected = ScheduleSerializer(legacy_schedule(day, self.user)).data
+                self.assertEqual(response.json(), json.loads(json.dumps(expected)))
+
+
+class BookingListPayloadTests(BookingTestMixin, TestCase):
+    """Списки из values()-выборки (bookings.listing) совпадают с BookingSerializer"""
+
+    def setUp(self):
+        super().setUp()
+        self.today = self.tomorrow - timedelta(days=1)
+        self.admin = User.objects.create_user(
+            'admin', 'admin@example.com', 'password',
+            first_name='Анна', last_name='Админова', patronymic='Сергеевна', role='admin'
+        )
+        for user, day, start_time, end_time in [
+            (self.admin, self.today, time(9, 0), time(9, 50)),
+            (self.admin, self.today, time(14, 0), time(15, 20)),
+            (self.user, self.tomorrow, time(12, 5), time(12, 35)),
+        ]:
+            Booking.objects.create(
+                room=self.room, user=user, booking_date=day, start_time=start_time, end_time=end_time
+            )
+        self.booking.cancel()
+
+    def expected(self):
+        bookings = Booking.objects.select_related('room', 'user').order_by('id')
+        return json.loads(json.dumps(BookingSerializer(bookings, many=True).data))
+
+    def assert_rows_match(self):
+        with frozen_now(self.today, 12):
+            rows = serialize_bookings(Booking.objects.order_by('id'))
+            self.assertEqual(json.loads(json.dumps(rows)), self.expected())
+
+    def test_format_rows(self):
+        self.assert_rows_match()
+
+    @override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK, 'DATETIME_FORMAT': '%d.%m.%Y %H:%M', 'TIME_FORMAT': '%H:%M'
+    })
+    def test_custom_formats(self):
+        # Формат моментов не по умолчанию форматируется через strftime
+        self.assert_rows_match()
+
+    def test_admin_list(self):
+        self.client.force_authenticate(self.admin)
+        with frozen_now(self.today, 12):
+            response = self.client.get('/api/admin/bookings/')
+            expected = self.expected()
+        self.assertEqual(sorted(response.json()['results'], key=lambda booking: booking['id']), expected)
+        self.assertEqual([booking['can_cancel'] for booking in expected], [False, False, True, True])
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DATE_FORMAT': '%d.%m.%Y'})
+class ScheduleDateFormatTests(SimpleTestCase):
+    """Отмена и ETag не зависят от того, сортируется ли строка DATE_FORMAT как дата"""
+
+    # '01.11.2026' < '31.10.2026' как строки
+    now = datetime(2026, 10, 31, 12, 0)
+
+    def build(self, *dates):
+        rooms = [{'id': 1, 'name': 'Переговорная 1', 'capacity': 6, 'description': '', 'floor': 1}]
+        bookings = [{
+            'id': number, 'room_id': 1, 'user_id': 1, 'booking_date': value,
+            'start_time': time(10, 0), 'end_time': time(11, 0), 'purpose': '',
+            'user__username': 'ivanov', 'user__first_name': 'Иван', 'user__last_name': 'Иванов',
+            'user__patronymic': None,
+        } for number, value in enumerate(dates)]
+        return schedule.build_bases(dates, rooms, bookings)
+
+    def can_cancel(self, value, now):
+        base = self.build(value)[value]
+        return schedule.personalize(base, 1, now)['rooms'][0]['bookings'][0]['can_cancel']
+
+    def test_can_cancel(self):
+        self.assertEqual(self.build(date(2026, 11, 1))[date(2026, 11, 1)]['date'], '01.11.2026')
+        self.assertTrue(self.can_cancel(date(2026, 11, 1), self.now))
+        self.assertFalse(self.can_cancel(date(2026, 10, 30), self.now))
+        self.assertTrue(self.can_cancel(date(2026, 10, 31), self.now.replace(hour=9)))
+        self.assertFalse(self.can_cancel(date(2026, 10, 31), self.now))
+
+    def test_etag_counts_started_today(self):
+        bases = list(self.build(date(2026, 10, 31), date(2026, 11, 1)).values())
+        before = schedule.schedule_etag(bases, 'v', 1, self.now.replace(hour=9))
+        self.assertNotEqual(schedule.schedule_etag(bases, 'v', 1, self.now), before)
+        # Завтрашние бронирования не начинаются сегодня
+        self.assertEqual(
+            schedule.schedule_etag(bases[1:], 'v', 1, self.now.replace(hour=9)),
+            schedule.schedule_etag(bases[1:], 'v', 1, self.now)
+        )
+
+
+class ScheduleEventsAuthTests(BookingTestMixin, TestCase):
+    """Подключение к потоку событий: access-токен в заголовке или билет в URL"""
+
+    def open_stream(self, ticket=None, headers=None):
+        params = {'date': self.tomorrow.isoformat()}
+        if ticket is not None:
+            params['ticket'] = ticket
+
+        async def get():
+            # Поток работает только с ASGIRequest; тело потока не читается
+            return await AsyncClient().get('/api/schedule/events/', params, headers=headers or {})
+        return async_to_sync(get)()
+
+    def revoke_tokens(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+
+    def test_ticket(self):
+        response = self.client.post('/api/schedule/events/ticket/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.open_stream(response.json()['ticket']).status_code, 200)
+
+    def test_ticket_required(self):
+        self.assertEqual(self.client.post('/api/schedule/events/ticket/').status_code, 200)
+        self.assertEqual(self.open_stream().status_code, 401)
+        self.assertEqual(self.open_stream('forged').status_code, 401)
+        self.assertEqual(APIClient().post('/api/schedule/events/ticket/').status_code, 401)
+
+    def test_access_token_in_url_rejected(self):
+        token = str(ClaimsRefreshToken.for_user(self.user).access_token)
+        self.assertEqual(self.open_stream(token).status_code, 401)
+
+    def test_revoked_ticket(self):
+        ticket = make_ticket(self.user)
+        self.revoke_tokens()
+        self.assertEqual(self.open_stream(ticket).status_code, 401)
+
+    def test_revoked_access_token(self):
+        header = {'Authorization': f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}'}
+        self.assertEqual(self.open_stream(headers=header).status_code, 200)
+        self.revoke_tokens()
+        token_versions.clear()
+        self.assertEqual(self.open_stream(headers=header).status_code, 401)
+
+
+class RoomOccupancyTests(BookingTestMixin, TestCase):
+    """Карты занятости следуют за бронированиями при любом способе записи"""
+
+    def stored_bits(self):
+        row = RoomOccupancy.objects.get(room=self.room, booking_date=self.tomorrow)
+        return occupancy.from_bytes(row.bits)
+
+    def assert_slots_freed(self, delete):
+        with self.captureOnCommitCallbacks(execute=True):
+            delete()
+        self.assertEqual(self.stored_bits(), 0)
+        self.assertTrue(RoomOccupancy.objects.is_free(self.room.id, self.tomorrow, time(10, 0), time(11, 0)))
+        self.assertEqual(RoomOccupancy.objects.find_mismatches(), [])
+
+    def test_create(self):
+        self.assertEqual(self.stored_bits(), occupancy.slot_mask(time(10, 0), time(11, 0)))
+        self.assertFalse(RoomOccupancy.objects.is_free(self.room.id, self.tomorrow, time(10, 30), time(12, 0)))
+        self.assertTrue(RoomOccupancy.objects.is_free(self.room.id, self.tomorrow, time(11, 0), time(12, 0)))
+
+    def test_user_delete(self):
+        self.assert_slots_freed(User.objects.get(pk=self.user.pk).delete)
+
+    def test_queryset_delete(self):
+        self.assert_slots_freed(Booking.objects.filter(room=self.room).delete)
+
+    def test_room_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.filter(pk=self.room.pk).delete()
+        self.assertFalse(RoomOccupancy.objects.exists())
+
+    def test_find_mismatches_and_rebuild(self):
+        RoomOccupancy.objects.filter(room=self.room).update(bits=occupancy.to_bytes(0))
+        self.assertEqual(RoomOccupancy.objects.find_mismatches(), [
+            ((self.room.id, self.tomorrow), occupancy.slot_mask(time(10, 0), time(11, 0)), 0)
+        ])
+        self.assertEqual(RoomOccupancy.objects.rebuild(), 1)
+        self.assertEqual(RoomOccupancy.objects.find_mismatches(), [])
+        self.assertEqual(self.stored_bits(), occupancy.slot_mask(time(10, 0), time(11, 0)))
+
+
+class RoomAvailabilityTests(BookingTestMixin, TestCase):
+    """Поиск свободных комнат: GET /api/rooms/available/"""
+
+    def setUp(self):
+        super().setUp()
+        self.other_room = Room.objects.create(name='Переговорная 2', capacity=12, floor=2, equipment=['projector'])
+
+    def available(self, start_time, end_time, **params):
+        params = {
+            'date': self.tomorrow.isoformat(), 'start_time': start_time, 'end_time': end_time, **params
+        }
+        response = self.client.get('/api/rooms/available/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [room['name'] for room in response.json()['results']]
+
+    def test_overlap(self):
+        self.assertEqual(self.available('10:30', '11:30'), ['Переговорная 2'])
+        self.assertEqual(self.available('11:00', '12:00'), ['Переговорная 1', 'Переговорная 2'])
+
+    def test_slot_collision_without_overlap(self):
+        # Слоты по 5 минут: 11:32 и 11:33 — один слот, но интервалы не пересекаются
+        Booking.objects.create(
+            room=self.room, user=self.user, booking_date=self.tomorrow,
+            start_time=time(11, 30), end_time=time(11, 32)
+        )
+        self.assertEqual(self.available('11:33', '12:00'), ['Переговорная 1', 'Переговорная 2'])
+        self.assertEqual(self.available('11:31', '12:00'), ['Переговорная 2'])
+
+    def test_stale_bitmap(self):
+        # Карта считает занятым слот, где бронирований нет (до sync после удаления)
+        RoomOccupancy.objects.filter(room=self.room).update(bits=occupancy.to_bytes(
+            occupancy.slot_mask(time(10, 0), time(13, 0))
+        ))
+        self.assertEqual(self.available('12:00', '13:00'), ['Переговорная 1', 'Переговорная 2'])
+
+    def test_filters(self):
+        self.assertEqual(self.available('12:00', '13:00', capacity_min=10), ['Переговорная 2'])
+        self.assertEqual(self.available('12:00', '13:00', capacity_max=6), ['Переговорная 1'])
+        self.assertEqual(self.available('12:00', '13:00', floor=2), ['Переговорная 2'])
+        self.assertEqual(self.available('12:00', '13:00', equipment='projector'), ['Переговорная 2'])
+        self.assertEqual(self.available('12:00', '13:00', equipment='projector, whiteboard'), [])
+        self.assertEqual(self.available('10:30', '11:30', capacity_max=6), [])
+
+    def test_inactive_and_cancelled(self):
+        Room.objects.filter(pk=self.other_room.pk).update(is_active=False)
+        self.assertEqual(self.available('10:30', '11:30'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.cancel()
+        self.assertEqual(self.available('10:30', '11:30'), ['Переговорная 1'])
+
+    def test_period(self):
+        # Комната свободна, только если интервал свободен в каждый день периода
+        after = self.tomorrow + timedelta(days=1)
+        params = {'date_from': self.tomorrow.isoformat(), 'date_to': (after + timedelta(days=1)).isoformat()}
+        self.assertEqual(self.available('10:30', '11:30', **params), ['Переговорная 2'])
+        params['date_from'] = after.isoformat()
+        self.assertEqual(self.available('10:30', '11:30', **params), ['Переговорная 1', 'Переговорная 2'])
+
+    def test_invalid_params(self):
+        url = '/api/rooms/available/'
+        day = self.tomorrow.isoformat()
+        for params, error in [
+            ({'date': day, 'start_time': '10:00'},
+             'Необходимо указать date (или date_from/date_to), start_time и end_time'),
+            ({'date': '19.10.2026', 'start_time': '10:00', 'end_time': '11:00'},
+             'Неверный формат даты. Используйте YYYY-MM-DD'),
+            ({'date': day, 'start_time': '10', 'end_time': '11:00'}, 'Неверный формат времени. Используйте HH:MM'),
+            ({'date': day, 'start_time': '11:00', 'end_time': '10:00'}, 'Конец периода должен быть позже начала'),
+            ({'date_from': day, 'date_to': (self.tomorrow + timedelta(days=31)).isoformat(),
+              'start_time': '10:00', 'end_time': '11:00'}, 'Диапазон не может превышать 31 дней'),
+        ]:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertEqual(response.json(), {'error': error})
+
+
+class BookingKeysetPaginationTests(BookingTestMixin, TestCase):
+    """Страницы списков по (booking_date, start_time, id) и совместимый режим page="""
+
+    def setUp(self):
+        super().setUp()
+        # Несколько бронирований с одинаковыми (booking_date, start_time) в разных комнатах
+        rooms = [Room.objects.create(name=f'Переговорная {number}', capacity=6) for number in range(2, 6)]
+        for offset in range(3):
+            for room in rooms:
+                Booking.objects.create(
+                    room=room, user=self.user, booking_date=self.tomorrow + timedelta(days=offset),
+                    start_time=time(10, 0), end_time=time(11, 0)
+                )
+        Booking.objects.create(
+            room=self.room, user=self.user, booking_date=self.tomorrow + timedelta(days=1),
+            start_time=time(9, 0), end_time=time(9, 30)
+        )
+
+    def ordered_ids(self, descending):
+        keys = sorted(Booking.objects.values_list('booking_date', 'start_time', 'id'), reverse=descending)
+        return [booking_id for _, _, booking_id in keys]
+
+    def walk(self, url, key='results'):
+        """id всех страниц по ссылкам next"""
+        ids = []
+        pages = 0
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+            data = response.json()
+            self.assertEqual(data['has_more'], data['next'] is not None)
+            ids += [booking['id'] for booking in data[key]]
+            url = data['next']
+            pages += 1
+        return ids, pages
+
+    def test_list_walk(self):
+        ids, pages = self.walk('/api/bookings/?page_size=2')
+        self.assertEqual(ids, self.ordered_ids(descending=True))
+        self.assertEqual(pages, 7)
+
+    def test_my_walk(self):
+        ids, _ = self.walk('/api/bookings/my/?page_size=3', key='bookings')
+        self.assertEqual(ids, self.ordered_ids(descending=False))
+
+    def test_page_number_fallback(self):
+        response = self.client.get('/api/bookings/', {'page': 1})
+        data = response.json()
+        self.assertEqual(data['count'], 14)
+        self.assertIsNone(data['next'])
+        self.assertEqual([booking['id'] for booking in data['results']], self.ordered_ids(descending=True))
+        self.assertEqual(self.client.get('/api/bookings/', {'page': 2}).status_code, 404)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/bookings/', {'cursor': 'не курсор'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Неверный курсор'})
+
+
+class BookingExportTests(BookingTestMixin, TestCase):
+    """Выгрузка бронирований: GET /api/admin/bookings/export/"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(
+            'admin', 'admin@example.com', 'password', first_name='Анна', last_name='Админова', role='admin'
+        )
+        self.client.force_authenticate(self.admin)
+        self.later = self.tomorrow + timedelta(days=2)
+        Booking.objects.create(
+            room=self.room, user=self.admin, booking_date=self.later,
+            start_time=time(9, 0), end_time=time(9, 45), purpose='Совещание; "итоги", квартал'
+        )
+        Booking.objects.create(
+            room=self.room, user=self.user, booking_date=self.tomorrow, start_time=time(8, 0), end_time=time(9, 0)
+        ).cancel()
+
+    def export(self, **params):
+        response = self.client.get('/api/admin/bookings/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def expected(self, queryset=None):
+        rows = export.format_rows(export.booking_rows(export.filter_bookings(queryset or Booking.objects.all())))
+        return [{field: row[field] for field in export.EXPORT_FIELDS} for row in rows]
+
+    def test_csv(self):
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="bookings_all.csv"')
+        self.assertTrue(content.startswith('\ufeff'))
+        rows = list(csv.DictReader(io.StringIO(content[1:])))
+        self.assertEqual(rows, [
+            {field: '' if value is None else str(value) for field, value in row.items()}
+            for row in self.expected()
+        ])
+        self.assertEqual([row['start_time'] for row in rows], ['08:00', '10:00', '09:00'])
+        self.assertNotIn('cancellation_token', rows[0])
+
+    def test_ndjson_with_filters(self):
+        params = {'output': 'ndjson', 'status': 'active', 'date_to': self.later.isoformat()}
+        response, content = self.export(**params)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertEqual(
+            response['Content-Disposition'], f'attachment; filename="bookings_{self.later.isoformat()}.ndjson"'
+        )
+        self.assertEqual(
+            [json.loads(line) for line in content.splitlines()],
+            self.expected(Booking.objects.filter(status='active'))
+        )
+
+    def test_chunks(self):
+        # Заголовок и по куску текста на порцию серверного курсора
+        chunks = list(export.iter_csv(export.filter_bookings(Booking.objects.all()), chunk_size=2))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual([chunk.count('\r\n') for chunk in chunks], [1, 2, 1])
+
+    def test_asgi_stream(self):
+        async def get():
+            # Под ASGI куски читаются по одному через aiter_sync()
+            return await AsyncClient().get(
+                '/api/admin/bookings/export/', {'output': 'ndjson'},
+                headers={'Authorization': f'Bearer {ClaimsRefreshToken.for_user(self.admin).access_token}'}
+            )
+        response = async_to_sync(get)()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+
+        async def read():
+            return b''.join([chunk async for chunk in response.streaming_content])
+        lines = async_to_sync(read)().decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.expected())
+
+    def test_invalid_params(self):
+        response = self.client.get('/api/admin/bookings/export/', {'output': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/admin/bookings/export/', {'date_from': '2026-10-20', 'date_to': '2026-10-19'})
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/admin/bookings/export/').status_code, 403)
+
+
+class BookingSeriesTests(BookingTestMixin, TestCase):
+    """Серии повторяющихся бронирований: /api/series/"""
+
+    def create_series(self, **fields):
+        payload = {
+            'room': self.room.id, 'frequency': 'daily', 'start_date': self.tomorrow.isoformat(),
+            'until': (self.tomorrow + timedelta(days=6)).isoformat(),
+            'start_time': '10:30', 'end_time': '11:30', **fields
+        }
+        return self.client.post('/api/series/', payload, format='json')
+
+    def series_dates(self, series_id, status='active'):
+        return list(
+            Booking.objects.filter(series_id=series_id, status=status)
+            .order_by('booking_date').values_list('booking_date', flat=True)
+        )
+
+    def test_occurrence_dates(self):
+        monday = date(2026, 10, 19)
+        daily = BookingSeries(frequency='daily', interval=3, start_date=monday, until=monday + timedelta(days=30))
+        self.assertEqual(
+            list(daily.occurrence_dates(monday + timedelta(days=4), monday + timedelta(days=12))),
+            [monday + timedelta(days=offset) for offset in (6, 9, 12)]
+        )
+        weekly = BookingSeries(
+            frequency='weekly', interval=2, weekdays=[4, 0], start_date=monday + timedelta(days=2),
+            until=monday + timedelta(days=35)
+        )
+        self.assertEqual(
+            list(weekly.occurrence_dates(monday, monday + timedelta(days=60))),
+            [monday + timedelta(days=offset) for offset in (4, 14, 18, 28, 32)]
+        )
+
+    def test_conflict_rejects_series(self):
+        response = self.create_series()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()['conflicts']), 1)
+        self.assertFalse(BookingSeries.objects.exists())
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_skip_conflicts(self):
+        response = self.create_series(skip_conflicts=True)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['skipped'], [{
+            'date': self.tomorrow.isoformat(), 'error': 'Это время уже забронировано (10:00:00-11:00:00)'
+        }])
+        expected = [self.tomorrow + timedelta(days=offset) for offset in range(1, 7)]
+        self.assertEqual(data['created'], [value.isoformat() for value in expected])
+        self.assertEqual(self.series_dates(data['series']['id']), expected)
+        self.assertEqual(RoomOccupancy.objects.find_mismatches(), [])
+
+    def test_conflicts_checked_in_one_query(self):
+        series = BookingSeries(room=self.room, start_time=time(10, 30), end_time=time(11, 30))
+        dates = [self.tomorrow + timedelta(days=offset) for offset in range(30)]
+        with self.assertNumQueries(1):
+            self.assertEqual(list(series.find_conflicts(dates)), [self.tomorrow])
+
+    def test_lazy_expansion(self):
+        until = self.tomorrow + timedelta(days=BOOKING_HORIZON_DAYS + 10)
+        response = self.create_series(start_time='12:00', end_time='13:00', until=until.isoformat())
+        self.assertEqual(response.status_code, 201)
+        series = BookingSeries.objects.get(pk=response.json()['series']['id'])
+        today = self.tomorrow - timedelta(days=1)
+        self.assertEqual(series.expanded_until, today + timedelta(days=BOOKING_HORIZON_DAYS))
+        self.assertEqual(len(self.series_dates(series.id)), BOOKING_HORIZON_DAYS)
+
+        # Через пять дней expand_series разворачивает серию до нового горизонта
+        with frozen_now(today + timedelta(days=5), 9):
+            created, conflicts = series.expand()
+        self.assertEqual(len(created), 5)
+        self.assertEqual(conflicts, {})
+        self.assertEqual(self.series_dates(series.id)[-1], today + timedelta(days=BOOKING_HORIZON_DAYS + 5))
+
+    def test_cancel(self):
+        series_id = self.create_series(start_time='12:00', end_time='13:00').json()['series']['id']
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(
+            'petrov', 'petrov@example.com', 'password', first_name='Пётр', last_name='Петров'
+        ))
+        self.assertEqual(other.delete(f'/api/series/{series_id}/').status_code, 404)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/series/{series_id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['cancelled'], 7)
+        self.assertEqual(self.series_dates(series_id), [])
+        self.assertEqual(BookingSeries.objects.get(pk=series_id).status, 'cancelled')
+        self.assertTrue(RoomOccupancy.objects.is_free(self.room.id, self.tomorrow, time(12, 0), time(13, 0)))
+        self.assertEqual(self.client.delete(f'/api/series/{series_id}/').status_code, 400)
+
+
+class BookingBulkTests(BookingTestMixin, TestCase):
+    """Массовые операции администратора: /api/admin/bookings/bulk-create/ и bulk-cancel/"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(
+            'admin', 'admin@example.com', 'password', first_name='Анна', last_name='Админова', role='admin'
+        )
+        self.client.force_authenticate(self.admin)
+
+    def item(self, start_time, end_time, day=None, **fields):
+        return {
+            'room': self.room.id, 'booking_date': (day or self.tomorrow).isoformat(),
+            'start_time': start_time, 'end_time': end_time, **fields
+        }
+
+    def bulk_create(self, items, mode='atomic'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                '/api/admin/bookings/bulk-create/', {'bookings': items, 'mode': mode}, format='json'
+            )
+
+    def bulk_cancel(self, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/admin/bookings/bulk-cancel/', data, format='json')
+
+    def statuses(self, response):
+        return [result['status'] for result in response.json()['results']]
+
+    def active_starts(self):
+        return list(
+            Booking.objects.filter(status='active').order_by('start_time').values_list('start_time', flat=True)
+        )
+
+    def test_create_atomic(self):
+        response = self.bulk_create([
+            self.item('12:00', '13:00'),
+            self.item('10:30', '11:30'),
+            self.item('12:30', '14:00'),
+            self.item('15:00', '16:00', room=0),
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.statuses(response), ['skipped', 'error', 'error', 'error'])
+        errors = [result.get('errors') for result in response.json()['results']]
+        self.assertEqual(errors[1], {'time': 'Это время уже забронировано (10:00:00-11:00:00)'})
+        self.assertEqual(errors[2], {'time': 'Пересекается с бронированием №0 из этого же запроса'})
+        self.assertEqual(errors[3], {'room': 'Комната не найдена'})
+        self.assertEqual(self.active_starts(), [time(10, 0)])
+
+    def test_create_partial(self):
+        response = self.bulk_create([
+            self.item('12:00', '13:00', user=self.user.id),
+            self.item('10:30', '11:30'),
+            self.item('14:00', '15:00', purpose='Защита'),
+        ], mode='partial')
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual((data['status'], data['created'], data['failed']), ('partial', 2, 1))
+        self.assertEqual(self.statuses(response), ['created', 'error', 'created'])
+        self.assertEqual(data['results'][0]['booking']['user'], self.user.id)
+        self.assertEqual(data['results'][2]['booking']['user'], self.admin.id)
+        self.assertEqual(self.active_starts(), [time(10, 0), time(12, 0), time(14, 0)])
+        self.assertEqual(RoomOccupancy.objects.find_mismatches(), [])
+
+    def test_cancel_by_ids(self):
+        # Прошедшее бронирование: save() не даёт создать его сразу в прошлом
+        started = Booking.objects.create(
+            room=self.room, user=self.user, booking_date=self.tomorrow, start_time=time(12, 0), end_time=time(13, 0)
+        )
+        Booking.objects.filter(pk=started.pk).update(booking_date=self.tomorrow - timedelta(days=2))
+        ids = [self.booking.id, started.id, 0]
+
+        response = self.bulk_cancel(ids=ids)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['cancelled'], 0)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'active')
+        self.assertFalse(RoomOccupancy.objects.is_free(self.room.id, self.tomorrow, time(10, 0), time(11, 0)))
+
+        response = self.bulk_cancel(ids=ids, mode='partial')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'id': 0, 'status': 'error', 'error': 'Бронирование не найдено'},
+            {'id': self.booking.id, 'status': 'cancelled'},
+            {'id': started.id, 'status': 'error', 'error': 'Бронирование уже началось'},
+        ])
+        self.assertTrue(RoomOccupancy.objects.is_free(self.room.id, self.tomorrow, time(10, 0), time(11, 0)))
+
+    def test_cancel_by_filter(self):
+        later = self.tomorrow + timedelta(days=3)
+        Booking.objects.create(
+            room=self.room, user=self.user, booking_date=later, start_time=time(9, 0), end_time=time(10, 0)
+        )
+        self.assertEqual(self.bulk_cancel().status_code, 400)
+        response = self.bulk_cancel(room_id=self.room.id, date_to=(later - timedelta(days=1)).isoformat())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [{'id': self.booking.id, 'status': 'cancelled'}])
+        self.assertEqual(self.active_starts(), [time(9, 0)])
+
+    def test_admin_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.bulk_create([self.item('12:00', '13:00')]).status_code, 403)
+        self.assertEqual(self.bulk_cancel(ids=[self.booking.id]).status_code, 403)
+
+
+class AsyncReadViewTests(BookingTestMixin, TestCase):
+    """Корутины bookings.async_views отвечают так же, как DRF-представления"""
+
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+        self.token = str(ClaimsRefreshToken.for_user(self.user).access_token)
+
+    def call(self, handler, path, params=None, auth=True, **kwargs):
+        headers = {'Authorization': f'Bearer {self.token}'} if auth else {}
+        view = async_views.async_read(lambda request, **kwargs: None, handler)
+        # Соединение теста живёт в его транзакции и не должно закрываться
+        with mock.patch.object(async_views, 'release_connections', mock.AsyncMock()):
+            return async_to_sync(view)(self.factory.get(path, params or {}, headers=headers), **kwargs)
+
+    def assert_same(self, response, path, params=None, client=None):
+        expected = (client or self.client).get(path, params or {})
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(json.loads(response.content), expected.json())
+
+    def test_room_list_pages_in_sql(self):
+        Room.objects.bulk_create(Room(name=f'Аудитория {number:02}', capacity=30) for number in range(60))
+        params = {'page': 2, 'capacity_min': 10}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.call(async_views.room_list, '/api/rooms/', params)
+        # Версия токенов пользователя, COUNT(*) и одна страница
+        self.assertEqual(len(queries), 3)
+        self.assertIn('COUNT(*)', queries[1]['sql'])
+        self.assertIn('LIMIT 10 OFFSET 50', queries[2]['sql'])
+        self.assertEqual(len(json.loads(response.content)['results']), 10)
+        self.assert_same(response, '/api/rooms/', params)
+
+    def test_room_list_errors(self):
+        self.assert_same(self.call(async_views.room_list, '/api/rooms/', {'page': 3}), '/api/rooms/', {'page': 3})
+        response = self.call(async_views.room_list, '/api/rooms/', auth=False)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response.headers)
+
+    def test_schedule(self):
+        params = {'date': self.tomorrow.isoformat()}
+        response = self.call(async_views.schedule, '/api/schedule/', params)
+        self.assert_same(response, '/api/schedule/', params)
+
+        headers = {'Authorization': f'Bearer {self.token}', 'If-None-Match': response.headers['ETag']}
+        request = self.factory.get('/api/schedule/', params, headers=headers)
+        self.assertEqual(async_to_sync(async_views.schedule)(request).status_code, 304)
+
+        params = {'date': 'завтра'}
+        self.assert_same(self.call(async_views.schedule, '/api/schedule/', params), '/api/schedule/', params)
+
+    def test_cancel_booking(self):
+        for token in (self.booking.cancellation_token, uuid.uuid4()):
+            path = f'/api/cancel/{token}/'
+            response = self.call(async_views.cancel_booking, path, auth=False, token=token)
+            self.assert_same(response, path, client=APIClient())
+
+
+class BookingQueryCountTests(BookingTestMixin, TestCase):
+    """Число SQL-запросов записи бронирований.
+
+    Транзакция запроса в тесте — точка сохранения внутри транзакции теста:
+    SAVEPOINT и RELEASE SAVEPOINT входят в счёт. Карта занятости комнаты
+    обновляется четырьмя запросами (bookings.occupancy).
+    """
+
+    def bookings_updates(self, queries):
+        return [query['sql'] for query in queries if query['sql'].startswith('UPDATE "bookings"')]
+
+    def test_create(self):
+        # Комната, проверка по карте занятости, INSERT бронирования и карта занятости
+        payload = {
+            'room': self.room.id,
+            'booking_date': self.tomorrow.isoformat(),
+            'start_time': '12:00',
+            'end_time': '13:00',
+        }
+        with self.assertNumQueries(9):
+            response = self.client.post('/api/bookings/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_destroy(self):
+        # Одна условная UPDATE ... RETURNING и карта занятости
+        with CaptureQueriesContext(connection) as queries, self.assertNumQueries(7):
+            response = self.client.delete(f'/api/bookings/{self.booking.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.bookings_updates(queries)), 1)
+
+    def test_destroy_invalid_id(self):
+        with self.assertNumQueries(0):
+            response = self.client.delete('/api/bookings/abc/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_cancel_by_token(self):
+        client = APIClient()
+        with CaptureQueriesContext(connection) as queries, self.assertNumQueries(7):
+            response = client.delete(f'/api/cancel/{self.booking.cancellation_token}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.bookings_updates(queries)), 1)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, 'cancelled')
+
+
+class BookingChangesTests(BookingTestMixin, TransactionTestCase):
+    """Инкрементальная синхронизация: GET /api/bookings/changes/?since=<токен>.
+
+    Номера транзакций различаются, только если каждая запись фиксируется
+    отдельно, поэтому тест работает без общей транзакции.
+    """
+
+    def changes(self, since=None):
+        response = self.client.get('/api/bookings/changes/', {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def create_booking(self, user, start_time):
+        return Booking.objects.create(
+            room=self.room, user=user, booking_date=self.tomorrow,
+            start_time=start_time, end_time=time(start_time.hour, 45)
+        )
+
+    def test_changes_since_token(self):
+        data = self.changes()
+        self.assertEqual([booking['id'] for booking in data['changes']], [self.booking.id])
+        self.assertFalse(data['has_more'])
+        token = data['sync_token']
+        self.assertEqual(self.changes(token)['changes'], [])
+
+        other = User.objects.create_user(
+            'petrov', 'petrov@example.com', 'password', first_name='Пётр', last_name='Петров'
+        )
+        self.create_booking(other, time(12, 0))
+        created = self.create_booking(self.user, time(13, 0))
+        self.assertEqual(self.client.delete(f'/api/bookings/{self.booking.id}/').status_code, 200)
+
+        data = self.changes(token)
+        # Чужие бронирования пользователю не видны
+        self.assertEqual(
+            {booking['id']: booking['status'] for booking in data['changes']},
+            {self.booking.id: 'cancelled', created.id: 'active'}
+        )
+        self.assertEqual(data['deleted'], [])
+
+        token = data['sync_token']
+        Booking.objects.filter(pk=created.pk).delete()
+        data = self.changes(token)
+        self.assertEqual((data['changes'], data['deleted']), ([], [created.id]))
+        self.assertEqual(self.changes(data['sync_token'])['deleted'], [])
+
+    def test_pages(self):
+        token = self.changes()['sync_token']
+        created = {self.create_booking(self.user, time(hour, 0)).id for hour in (12, 13, 14)}
+
+        seen = []
+        with mock.patch.object(BookingViewSet, 'CHANGES_PAGE_SIZE', 2):
+            data = self.changes(token)
+            seen += [booking['id'] for booking in data['changes']]
+            self.assertTrue(data['has_more'])
+            data = self.changes(data['sync_token'])
+            seen += [booking['id'] for booking in data['changes']]
+            self.assertFalse(data['has_more'])
+        self.assertEqual(sorted(seen), sorted(created))
+        self.assertEqual(self.changes(data['sync_token'])['changes'], [])
+
+    def test_invalid_token(self):
+        for token in ('abc', '1-2', '-1'):
+            response = self.client.get('/api/bookings/changes/', {'since': token})
+            self.assertEqual(response.status_code, 400, token)
+            self.assertEqual(response.json(), {'error': 'Неверный токен синхронизации'})
+
+
+class BookingRaceTests(BookingTestMixin, TransactionTestCase):
+    def test_overlapping_creates_in_parallel(self):
+        """Оба запроса проходят предварительную проверку, пересечение отсекает ограничение БД"""
+        other = User.objects.create_user(
+            'petrov', 'petrov@example.com', 'password', first_name='Пётр', last_name='Петров'
+        )
+        barrier = threading.Barrier(2)
+        statuses = []
+
+        def create(user, start_time, end_time):
+            client = APIClient()
+            client.force_authenticate(user)
+            payload = {
+                'room': self.room.id,
+                'booking_date': self.tomorrow.isoformat(),
+                'start_time': start_time,
+                'end_time': end_time,
+            }
+            try:
+                barrier.wait()
+                statuses.append(client.post('/api/bookings/', payload, format='json').status_code)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=create, args=(self.user, '14:00', '15:00')),
+            threading.Thread(target=create, args=(other, '14:30', '15:30')),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [201, 400])
+        self.assertEqual(Booking.objects.filter(room=self.room, start_time__gte=time(14, 0)).count(), 1)
@@ -1,10 +1,14 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     RoomViewSet,
     BookingViewSet,
     AdminBookingViewSet,
+    BookingSeriesViewSet,
     ScheduleView,
+    ScheduleEventsView,
+    ScheduleEventsTicketView,
     CancelBookingView
 )
 
@@ -13,10 +17,27 @@ app_name = 'bookings'
 router = DefaultRouter()
 router.register(r'rooms', RoomViewSet, basename='room')
 router.register(r'bookings', BookingViewSet, basename='booking')
+router.register(r'series', BookingSeriesViewSet, basename='booking-series')
 router.register(r'admin/bookings', AdminBookingViewSet, basename='admin-booking')
 
+schedule_view = ScheduleView.as_view()
+cancel_booking_view = CancelBookingView.as_view()
+async_patterns = []
+
+if settings.ASYNC_READ_VIEWS:
+    # Профиль ASGI: GET этих адресов обслуживают корутины (bookings.async_views)
+    from . import async_views
+    schedule_view = async_views.async_read(schedule_view, async_views.schedule)
+    cancel_booking_view = async_views.async_read(cancel_booking_view, async_views.cancel_booking)
+    async_patterns.append(path('rooms/', async_views.async_read(
+        RoomViewSet.as_view({'get': 'list', 'post': 'create'}), async_views.room_list
+    ), name='room-list'))
+
 urlpatterns = [
-    path('schedule/', ScheduleView.as_view(), name='schedule'),
-    path('cancel/<uuid:token>/', CancelBookingView.as_view(), name='cancel-booking'),
+    path('schedule/', schedule_view, name='schedule'),
+    path('schedule/events/', ScheduleEventsView.as_view(), name='schedule-events'),
+    path('schedule/events/ticket/', ScheduleEventsTicketView.as_view(), name='schedule-events-ticket'),
+    path('cancel/<uuid:token>/', cancel_booking_view, name='cancel-booking'),
+    *async_patterns,
     path('', include(router.urls)),
 ]
@@ -1,17 +1,42 @@
+import asyncio
+import json
 from rest_framework import viewsets, generics, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views import View
 from django.utils import timezone
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.models import Q
-from .models import Room, Booking
+from django.utils.http import parse_etags
+from core import metrics
+from users.authentication import ClaimsJWTAuthentication
+from .models import Room, Booking, BookingDeletion, BookingSeries, RoomOccupancy
 from .serializers import (
     RoomSerializer, 
     BookingSerializer, 
     BookingCreateSerializer,
+    BookingSeriesSerializer,
+    BookingBulkCreateSerializer,
+    BookingBulkCancelSerializer,
+    BookingExportSerializer,
     ScheduleSerializer
 )
 from .permissions import IsAdminUser, IsOwnerOrAdmin
+from .bulk import create_bookings, cancel_bookings
+from .changes import InvalidSyncToken, get_changes
+from .export import FORMATS, aiter_sync, filter_bookings
+from .listing import booking_rows, format_rows, serialize_bookings
+from .pagination import BookingKeysetPagination
+from .events import get_broker, make_ticket, ticket_user_id
+from .schedule import date_range, load_bases, personalize, schedule_etag
 
 
 class RoomViewSet(viewsets.ModelViewSet):
@@ -21,7 +46,7 @@ class RoomViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
         """Права доступа: просмотр - всем авторизованным, изменение - только админам"""
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'available']:
             permission_classes = [permissions.IsAuthenticated]
         else:
             permission_classes = [IsAdminUser]
@@ -55,6 +80,75 @@ class RoomViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Сохранение создателя комнаты"""
         serializer.save(created_by=self.request.user)
+    
+    @action(detail=False, methods=['get'])
+    def available(self, request):
+        """Свободные комнаты на дату (или период) и интервал времени.
+        
+        Параметры: date или date_from/date_to, start_time, end_time,
+        capacity_min, capacity_max, floor, equipment (через запятую).
+        """
+        params = request.query_params
+        date_from_str = params.get('date_from') or params.get('date')
+        date_to_str = params.get('date_to') or date_from_str
+        start_time_str = params.get('start_time')
+        end_time_str = params.get('end_time')
+        
+        if not (date_from_str and start_time_str and end_time_str):
+            return Response({
+                'error': 'Необходимо указать date (или date_from/date_to), start_time и end_time'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            date_from = datetime.strptime(date_from_str, '%Y-%m-%d').date()
+            date_to = datetime.strptime(date_to_str, '%Y-%m-%d').date()
+        except ValueError:
+            return Response({
+                'error': 'Неверный формат даты. Используйте YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            start_time = datetime.strptime(start_time_str, '%H:%M').time()
+            end_time = datetime.strptime(end_time_str, '%H:%M').time()
+        except ValueError:
+            return Response({
+                'error': 'Неверный формат времени. Используйте HH:MM'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if date_to < date_from or start_time >= end_time:
+            return Response({
+                'error': 'Конец периода должен быть позже начала'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if (date_to - date_from).days >= ScheduleView.MAX_RANGE_DAYS:
+            return Response({
+                'error': f'Диапазон не может превышать {ScheduleView.MAX_RANGE_DAYS} дней'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Фильтры вместимости и этажа — из get_queryset()
+        queryset = self.get_queryset().filter(is_active=True)
+        
+        equipment = [item.strip() for item in params.get('equipment', '').split(',') if item.strip()]
+        if equipment:
+            queryset = queryset.filter(equipment__contains=equipment)
+        
+        # Свободные по картам занятости комнаты; бронирования читаются только
+        # для комнат с пересечением слотов
+        queryset = RoomOccupancy.objects.free_rooms(
+            queryset, date_from, date_to, start_time, end_time
+        ).order_by('name')
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+class ScheduleParamsError(ValueError):
+    """Неверные параметры дат расписания (ответ 400)"""
 
 
 class ScheduleView(generics.GenericAPIView):
@@ -62,71 +156,274 @@ class ScheduleView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ScheduleSerializer
     
+    # Максимальная длина диапазона дат в одном запросе
+    MAX_RANGE_DAYS = 31
+    
     def get(self, request):
-        """Получить расписание на указанную дату"""
+        """Получить расписание на указанную дату или диапазон дат"""
+        try:
+            dates, wrap = self.parse_dates(request.query_params)
+        except ScheduleParamsError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        bases, version = load_bases(dates)
+        data, headers = self.render(bases, version, request, wrap)
+        if data is None:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
+    
+    @classmethod
+    def parse_dates(cls, params):
+        """(даты, обёртка ответа) по параметрам date, week или date_from/date_to"""
+        if 'week' in params or 'date_from' in params or 'date_to' in params:
+            return cls.parse_range(params)
+        
         # Получаем дату из query параметров или используем сегодня
-        date_str = request.query_params.get('date')
+        date_str = params.get('date')
         
         if date_str:
             try:
                 target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
             except ValueError:
-                return Response({
-                    'error': 'Неверный формат даты. Используйте YYYY-MM-DD'
-                }, status=status.HTTP_400_BAD_REQUEST)
+                raise ScheduleParamsError('Неверный формат даты. Используйте YYYY-MM-DD')
         else:
             target_date = date.today()
         
-        # Получаем все активные комнаты
-        rooms = Room.objects.filter(is_active=True).order_by('name')
-        
-        # Получаем все бронирования на эту дату
-        bookings = Booking.objects.filter(
-            booking_date=target_date,
-            status='active'
-        ).select_related('user', 'room')
-        
-        # Формируем данные расписания
-        schedule_data = []
-        
-        for room in rooms:
-            room_bookings = [
-                {
-                    'id': booking.id,
-                    'start_time': booking.start_time,
-                    'end_time': booking.end_time,
-                    'status': 'booked',
-                    'user_name': booking.user.full_name,
-                    'user_username': booking.user.username,
-                    'is_own': booking.user == request.user,
-                    'purpose': booking.purpose,
-                    'can_cancel': booking.can_cancel
-                }
-                for booking in bookings if booking.room == room
-            ]
-            
-            schedule_data.append({
-                'id': room.id,
-                'name': room.name,
-                'capacity': room.capacity,
-                'description': room.description,
-                'floor': room.floor,
-                'bookings': room_bookings
-            })
+        return [target_date], lambda days: days[0]
+    
+    @classmethod
+    def parse_range(cls, params):
+        """Диапазон дат (?date_from=&date_to= или ?week=)"""
+        week = params.get('week')
+        date_from_str = params.get('date_from')
+        date_to_str = params.get('date_to')
+        
+        if not week and not date_from_str:
+            raise ScheduleParamsError('Необходимо указать date_from')
+        
+        try:
+            if week:
+                # Неделя с понедельника по воскресенье, содержащая указанную дату
+                anchor = datetime.strptime(week, '%Y-%m-%d').date()
+                date_from = anchor - timedelta(days=anchor.weekday())
+                date_to = date_from + timedelta(days=6)
+            else:
+                date_from = datetime.strptime(date_from_str, '%Y-%m-%d').date()
+                date_to = (
+                    datetime.strptime(date_to_str, '%Y-%m-%d').date()
+                    if date_to_str else date_from
+                )
+        except ValueError:
+            raise ScheduleParamsError('Неверный формат даты. Используйте YYYY-MM-DD')
         
-        response_data = {
-            'date': target_date,
-            'rooms': schedule_data
+        if date_to < date_from:
+            raise ScheduleParamsError('date_to не может быть раньше date_from')
+        
+        if (date_to - date_from).days >= cls.MAX_RANGE_DAYS:
+            raise ScheduleParamsError(f'Диапазон не может превышать {cls.MAX_RANGE_DAYS} дней')
+        
+        return date_range(date_from, date_to), lambda days: {
+            'date_from': date_from.strftime('%Y-%m-%d'),
+            'date_to': date_to.strftime('%Y-%m-%d'),
+            'days': days
         }
+    
+    @staticmethod
+    def render(bases, version, request, wrap):
+        """(данные ответа, заголовки) с ETag; данные None — у клиента актуальная версия (304)"""
+        now = timezone.localtime()
+        etag = schedule_etag(bases, version, request.user.id, now)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
         
-        serializer = self.get_serializer(response_data)
-        return Response(serializer.data)
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            return None, headers
+        
+        return wrap([personalize(base, request.user.id, now) for base in bases]), headers
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class ScheduleEventsView(View):
+    """Поток Server-Sent Events об изменениях бронирований на даты.
+    
+    GET /api/schedule/events/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
+    
+    Вместо периодической перезагрузки расписания клиент получает событие
+    booking (created, updated, cancelled, deleted или resync) и загружает
+    заново только затронутую дату. EventSource не передаёт заголовки,
+    поэтому вместо заголовка Authorization можно передать параметр
+    ticket — короткоживущий билет из POST /api/schedule/events/ticket/.
+    Работает только под ASGI.
+    """
+    
+    # Через сколько миллисекунд EventSource переподключается после обрыва
+    RETRY_MS = 3000
+    
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return self.error('Поток событий доступен только при запуске через ASGI', 501)
+        
+        user_id = await sync_to_async(self.authenticate)(request)
+        if user_id is None:
+            return self.error('Необходима авторизация', 401)
+        
+        date_from_str = request.GET.get('date_from') or request.GET.get('date')
+        date_to_str = request.GET.get('date_to') or date_from_str
+        if not date_from_str:
+            return self.error('Необходимо указать date_from', 400)
+        
+        try:
+            date_from = datetime.strptime(date_from_str, '%Y-%m-%d').date()
+            date_to = datetime.strptime(date_to_str, '%Y-%m-%d').date()
+        except ValueError:
+            return self.error('Неверный формат даты. Используйте YYYY-MM-DD', 400)
+        
+        if date_to < date_from:
+            return self.error('date_to не может быть раньше date_from', 400)
+        
+        if (date_to - date_from).days >= ScheduleView.MAX_RANGE_DAYS:
+            return self.error(f'Диапазон не может превышать {ScheduleView.MAX_RANGE_DAYS} дней', 400)
+        
+        dates = [value.isoformat() for value in date_range(date_from, date_to)]
+        response = StreamingHttpResponse(self.stream(dates), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Nginx не должен буферизовать поток
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    @staticmethod
+    def error(message, status_code):
+        return JsonResponse({'error': message}, status=status_code, json_dumps_params={'ensure_ascii': False})
+    
+    @staticmethod
+    def authenticate(request):
+        """id пользователя по access-токену в Authorization или билету ticket.
+        
+        Отозванные токены отклоняются, как и в остальном API. Соединение с
+        БД закрывается сразу: поток открыт минутами и не должен его держать.
+        """
+        try:
+            if 'ticket' in request.GET:
+                return ticket_user_id(request.GET['ticket'])
+            result = ClaimsJWTAuthentication().authenticate(request)
+            return result[0].id if result else None
+        except (InvalidToken, AuthenticationFailed):
+            return None
+        finally:
+            # Соединение внутри открытой транзакции (например, в тестах) не наше
+            for connection in connections.all(initialized_only=True):
+                if not connection.in_atomic_block:
+                    connection.close_if_unusable_or_obsolete()
+    
+    async def stream(self, dates):
+        broker = get_broker()
+        subscription = broker.subscribe(dates)
+        loop = asyncio.get_running_loop()
+        # Django 4.2 не узнаёт об отключении клиента во время потока,
+        # поэтому поток ограничен по времени, а EventSource переподключается
+        deadline = loop.time() + settings.SCHEDULE_EVENTS_MAX_AGE
+        try:
+            yield f'retry: {self.RETRY_MS}\n\n'
+            while (remaining := deadline - loop.time()) > 0:
+                message = await subscription.get(min(settings.SCHEDULE_EVENTS_HEARTBEAT, remaining))
+                if message is None:
+                    # Комментарий SSE: держит соединение открытым через прокси
+                    yield ': ping\n\n'
+                    continue
+                event_id, event = message
+                yield f'id: {event_id}\nevent: booking\ndata: {json.dumps(event)}\n\n'
+        finally:
+            broker.unsubscribe(subscription)
+
+
+class ScheduleEventsTicketView(generics.GenericAPIView):
+    """Билет для подключения к потоку событий расписания (параметр ticket)"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        return Response({
+            'ticket': make_ticket(request.user),
+            'expires_in': settings.SCHEDULE_EVENTS_TICKET_MAX_AGE,
+        })
+
+
+class BookingListMixin:
+    """Список бронирований через values()-выборку (см. bookings.listing)"""
+    
+    def list(self, request, *args, **kwargs):
+        rows = booking_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(format_rows(page))
+        return Response(format_rows(rows))
+
+
+class BookingChangesMixin:
+    """Инкрементальная синхронизация: GET .../changes/?since=<токен>.
+    
+    Возвращает бронирования, созданные или изменённые после токена
+    (с учётом фильтров get_queryset()), id удалённых бронирований и новый
+    токен. Без since — полная выгрузка. При has_more=true следующую
+    страницу нужно запросить сразу с полученным токеном.
+    Фильтры применяются к текущим значениям полей, поэтому фильтр status
+    для синхронизации не подходит: отмены не попадут в ответ.
+    """
+    
+    # Максимальное число бронирований в одном ответе
+    CHANGES_PAGE_SIZE = 500
+    
+    def get_deletions_queryset(self):
+        """Удаления с теми же фильтрами, что и get_queryset()"""
+        queryset = BookingDeletion.objects.all()
+        
+        if not self.request.user.is_admin:
+            queryset = queryset.filter(user_id=self.request.user.id)
+        
+        room_id = self.request.query_params.get('room_id')
+        date_from = self.request.query_params.get('date_from')
+        date_to = self.request.query_params.get('date_to')
+        user_id = self.request.query_params.get('user_id')
+        
+        if room_id:
+            queryset = queryset.filter(room_id=room_id)
+        if date_from:
+            queryset = queryset.filter(booking_date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(booking_date__lte=date_to)
+        if user_id and self.request.user.is_admin:
+            queryset = queryset.filter(user_id=user_id)
+        
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Изменения бронирований после токена синхронизации"""
+        try:
+            # Из основной БД: токен — снимок транзакций той БД, из которой
+            # читали, а следующий запрос могла бы обслужить более отставшая реплика
+            changed, deleted, token, has_more = get_changes(
+                self.get_queryset().using(DEFAULT_DB_ALIAS),
+                self.get_deletions_queryset().using(DEFAULT_DB_ALIAS),
+                request.query_params.get('since'),
+                self.CHANGES_PAGE_SIZE
+            )
+        except InvalidSyncToken:
+            return Response({
+                'error': 'Неверный токен синхронизации'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'changes': BookingSerializer(changed, many=True).data,
+            'deleted': deleted,
+            'sync_token': token,
+            'has_more': has_more
+        })
+
+
+class BookingViewSet(BookingListMixin, BookingChangesMixin, viewsets.ModelViewSet):
     """ViewSet для управления бронированиями"""
     queryset = Booking.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = BookingKeysetPagination
     
     def get_serializer_class(self):
         """Выбор сериализатора в зависимости от действия"""
@@ -181,31 +478,42 @@ class BookingViewSet(viewsets.ModelViewSet):
     
     def destroy(self, request, *args, **kwargs):
         """Отмена бронирования"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        
+        # Условная отмена одним запросом; get_queryset() уже ограничивает
+        # обычного пользователя его собственными бронированиями
+        try:
+            cancelled = self.get_queryset().filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            ).cancellable().cancel()
+        except (TypeError, ValueError, DjangoValidationError):
+            # Нечисловой id: 404, как у get_object()
+            raise Http404
+        
+        if cancelled:
+            metrics.record_cancelled('owner' if cancelled[0].user_id == request.user.id else 'admin')
+            return Response({
+                'status': 'success',
+                'message': 'Бронирование успешно отменено'
+            })
+        
+        # Ничего не отменено: выясняем причину (404, если бронирование недоступно)
         booking = self.get_object()
         
         # Проверка прав доступа
-        if not (booking.user == request.user or request.user.is_admin):
+        if not (booking.user_id == request.user.id or request.user.is_admin):
             return Response({
                 'error': 'У вас нет прав на отмену этого бронирования'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        # Проверка возможности отмены
-        if not booking.can_cancel:
-            return Response({
-                'error': 'Это бронирование нельзя отменить'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        booking.cancel()
-        
         return Response({
-            'status': 'success',
-            'message': 'Бронирование успешно отменено'
-        })
+            'error': 'Это бронирование нельзя отменить'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=False, methods=['get'])
     def my(self, request):
         """Получить мои бронирования"""
-        queryset = Booking.objects.filter(user=request.user).select_related('room')
+        queryset = Booking.objects.filter(user=request.user)
         
         # Фильтр по статусу
         status_filter = request.query_params.get('status')
@@ -221,11 +529,59 @@ class BookingViewSet(viewsets.ModelViewSet):
                 Q(booking_date=today, start_time__gte=timezone.now().time())
             )
         
-        queryset = queryset.order_by('booking_date', 'start_time')
+        # Страницы от ближайших к дальним; next и has_more — как у списка
+        paginator = BookingKeysetPagination(descending=False)
+        page = paginator.paginate_queryset(booking_rows(queryset), request, self)
+        if paginator.page_number_pagination is not None:
+            return paginator.get_paginated_response(format_rows(page))
+        return Response(paginator.get_page_data(format_rows(page), key='bookings'))
+
+
+class BookingSeriesViewSet(viewsets.ModelViewSet):
+    """ViewSet для серий повторяющихся бронирований"""
+    serializer_class = BookingSeriesSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+    
+    def get_queryset(self):
+        """Обычные пользователи видят только свои серии"""
+        queryset = BookingSeries.objects.select_related('room')
+        if not self.request.user.is_admin:
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+    
+    def create(self, request, *args, **kwargs):
+        """Создание серии"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        series = serializer.save(user=request.user)
+        
+        return Response({
+            'status': 'success',
+            'series': self.get_serializer(series).data,
+            'created': [booking.booking_date for booking in serializer.created_bookings],
+            'skipped': [
+                {'date': value, 'error': error}
+                for value, error in sorted(serializer.conflicts.items())
+            ]
+        }, status=status.HTTP_201_CREATED)
+    
+    def destroy(self, request, *args, **kwargs):
+        """Отмена серии и всех её будущих бронирований"""
+        series = self.get_object()
+        
+        if series.status != 'active':
+            return Response({
+                'error': 'Эта серия уже отменена'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        cancelled = series.cancel()
+        metrics.record_cancelled('owner' if series.user_id == request.user.id else 'admin', len(cancelled))
         
-        serializer = BookingSerializer(queryset, many=True)
         return Response({
-            'bookings': serializer.data
+            'status': 'success',
+            'message': 'Серия успешно отменена',
+            'cancelled': len(cancelled)
         })
 
 
@@ -235,45 +591,42 @@ class CancelBookingView(generics.GenericAPIView):
     
     def get(self, request, token):
         """Получить информацию о бронировании"""
-        try:
-            booking = Booking.objects.select_related('room', 'user').get(
-                cancellation_token=token
-            )
-            serializer = BookingSerializer(booking)
-            return Response(serializer.data)
-        except Booking.DoesNotExist:
+        bookings = serialize_bookings(Booking.objects.filter(cancellation_token=token))
+        if not bookings:
             return Response({
                 'error': 'Бронирование не найдено'
             }, status=status.HTTP_404_NOT_FOUND)
+        return Response(bookings[0])
     
     def delete(self, request, token):
         """Отменить бронирование по токену"""
-        try:
-            booking = Booking.objects.get(cancellation_token=token)
-            
-            if not booking.can_cancel:
-                return Response({
-                    'error': 'Это бронирование нельзя отменить'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            booking.cancel()
-            
+        bookings = Booking.objects.filter(cancellation_token=token)
+        
+        # Условная отмена одним запросом
+        if bookings.cancellable().cancel():
+            metrics.record_cancelled('token')
             return Response({
                 'status': 'success',
                 'message': 'Бронирование успешно отменено'
             })
-        except Booking.DoesNotExist:
+        
+        if not bookings.exists():
             return Response({
                 'error': 'Бронирование не найдено'
             }, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            'error': 'Это бронирование нельзя отменить'
+        }, status=status.HTTP_400_BAD_REQUEST)
 
 
 # Админские представления
-class AdminBookingViewSet(viewsets.ModelViewSet):
+class AdminBookingViewSet(BookingListMixin, BookingChangesMixin, viewsets.ModelViewSet):
     """ViewSet для управления всеми бронированиями (только для админов)"""
     queryset = Booking.objects.all().select_related('room', 'user')
     serializer_class = BookingSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = BookingKeysetPagination
     
     def get_queryset(self):
         """Получить все бронирования с фильтрацией"""
@@ -298,3 +651,104 @@ class AdminBookingViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(user_id=user_id)
         
         return queryset.order_by('-booking_date', '-start_time')
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Выгрузка бронирований в CSV или NDJSON (output=csv|ndjson).
+        
+        Фильтры — как у списка: room_id, user_id, date_from, date_to, status.
+        Ответ передаётся потоком, строки читаются серверным курсором.
+        """
+        serializer = BookingExportSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filters = dict(serializer.validated_data)
+        output = filters.pop('output')
+        
+        generate, content_type, extension = FORMATS[output]
+        content = generate(filter_bookings(Booking.objects.all(), **filters))
+        if isinstance(request._request, ASGIRequest):
+            content = aiter_sync(content)
+        
+        period = '_'.join(str(filters[key]) for key in ('date_from', 'date_to') if key in filters)
+        filename = f'bookings_{period or "all"}.{extension}'
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    @action(detail=False, methods=['post'], url_path='bulk-create')
+    def bulk_create(self, request):
+        """Массовое создание бронирований.
+        
+        mode=atomic (по умолчанию): при любой ошибке ничего не создаётся;
+        mode=partial: создаются бронирования без ошибок.
+        """
+        serializer = BookingBulkCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['bookings']
+        partial = serializer.validated_data['mode'] == 'partial'
+        
+        try:
+            bookings, errors = create_bookings(items, request.user, partial=partial)
+        except DjangoValidationError:
+            # Параллельная запись заняла время между проверкой и вставкой
+            return Response({
+                'error': 'Часть времени уже забронирована другим запросом, повторите попытку'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = []
+        for index, booking in enumerate(bookings):
+            if index in errors:
+                results.append({'index': index, 'status': 'error', 'errors': errors[index]})
+            elif booking is None:
+                # Режим atomic: бронирование без ошибок не создано из-за ошибок в других
+                results.append({'index': index, 'status': 'skipped'})
+            else:
+                results.append({
+                    'index': index, 'status': 'created', 'booking': BookingSerializer(booking).data
+                })
+        created = len(items) - len(errors) if partial or not errors else 0
+        
+        return Response({
+            'status': 'success' if not errors else 'partial' if created else 'error',
+            'created': created,
+            'failed': len(errors),
+            'results': results
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'], url_path='bulk-cancel')
+    def bulk_cancel(self, request):
+        """Массовая отмена бронирований по списку id или по фильтру.
+        
+        Фильтры: room_id, user_id, date_from, date_to. Режимы — как у bulk-create.
+        """
+        serializer = BookingBulkCancelSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        queryset = Booking.objects.all()
+        if 'room_id' in data:
+            queryset = queryset.filter(room_id=data['room_id'])
+        if 'user_id' in data:
+            queryset = queryset.filter(user_id=data['user_id'])
+        if 'date_from' in data:
+            queryset = queryset.filter(booking_date__gte=data['date_from'])
+        if 'date_to' in data:
+            queryset = queryset.filter(booking_date__lte=data['date_to'])
+        
+        cancelled, errors = cancel_bookings(
+            queryset, ids=data.get('ids'), partial=data['mode'] == 'partial'
+        )
+        metrics.record_cancelled('admin', len(cancelled))
+        
+        results = sorted(
+            [{'id': booking.id, 'status': 'cancelled'} for booking in cancelled] +
+            [{'id': booking_id, 'status': 'error', 'error': error} for booking_id, error in errors.items()],
+            key=lambda result: result['id']
+        )
+        
+        return Response({
+            'status': 'success' if not errors else 'partial' if cancelled else 'error',
+            'cancelled': len(cancelled),
+            'failed': len(errors),
+            'results': results
+        }, status=status.HTTP_200_OK if cancelled or not errors else status.HTTP_400_BAD_REQUEST)
@@ -2,4 +2,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Профиль ASGI: асинхронные представления чтения, соединения с БД — через PgBouncer
+os.environ.setdefault('DJANGO_ASGI', 'True')
 application = get_asgi_application()
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -36,6 +37,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestProfilerMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -67,6 +71,16 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
+# Профиль запуска: config/asgi.py задаёт DJANGO_ASGI=True
+ASGI = os.getenv('DJANGO_ASGI', 'False') == 'True'
+
+# Соединения с БД. Синхронный воркер gunicorn держит своё соединение
+# DB_CONN_MAX_AGE секунд вместо нового на каждый запрос, а перед повторным
+# использованием проверяет, что оно живо (CONN_HEALTH_CHECKS). Под ASGI
+# соединения не удерживаются (Django 4.2 открывает их на каждый запрос;
+# ненулевой DB_CONN_MAX_AGE отклоняет проверка core.E002), а пул держит PgBouncer: DB_HOST/DB_PORT указывают на него (см. README).
+# В режиме pool_mode=transaction серверные курсоры (.iterator() выгрузки)
+# не переживают транзакцию: DB_DISABLE_SERVER_SIDE_CURSORS=True
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -75,9 +89,121 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', 'postgres'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0 if ASGI else 60)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', 'False') == 'True',
+    }
+}
+
+# Реплики для чтения (потоковая репликация PostgreSQL): DB_REPLICA_HOSTS —
+# список host[:port] через запятую, учётные данные — как у основной БД.
+# Безопасные запросы читают с реплик, записи идут в основную БД (core.db_router)
+DATABASE_REPLICAS = []
+for _index, _address in enumerate(
+    address.strip() for address in os.getenv('DB_REPLICA_HOSTS', '').split(',') if address.strip()
+):
+    _host, _, _port = _address.partition(':')
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        # В тестах реплика — та же БД, что и основная
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{_index}')
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+# Сколько секунд после изменений чтения пользователя идут в основную БД,
+# чтобы он видел свои изменения, пока реплики догоняют; 0 — не прикреплять
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '10'))
+
+# Асинхронные GET расписания, списка комнат и бронирования по токену отмены
+# (bookings.async_views); имеет смысл только под ASGI
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', str(ASGI)) == 'True'
+# Сколько из них одновременно работают с БД в одном воркере: столько
+# соединений воркер держит открытыми (не больше пула PgBouncer)
+ASYNC_DB_CONCURRENCY = int(os.getenv('ASYNC_DB_CONCURRENCY', 20))
+
+# Cache
+# В разработке — память процесса; в продакшне — общий бэкенд для всех воркеров,
+# например CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# и CACHE_LOCATION=redis://127.0.0.1:6379/1 (нужен пакет redis)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'slotme'),
     }
 }
 
+# Кэш расписания
+SCHEDULE_CACHE_ALIAS = os.getenv('SCHEDULE_CACHE_ALIAS', 'default')
+SCHEDULE_CACHE_TIMEOUT = int(os.getenv('SCHEDULE_CACHE_TIMEOUT', 3600))
+
+# Шаг карт занятости комнат в минутах (должен делить сутки нацело).
+# После изменения выполните: python manage.py rebuild_occupancy
+BOOKING_SLOT_MINUTES = int(os.getenv('BOOKING_SLOT_MINUTES', 5))
+
+# Live-обновление расписания (Server-Sent Events, только под ASGI).
+# При нескольких воркерах нужен общий брокер: bookings.events.PostgresBroker
+BOOKING_EVENTS_BROKER = os.getenv('BOOKING_EVENTS_BROKER', 'bookings.events.InProcessBroker')
+# host[:port] PostgreSQL для LISTEN брокера PostgresBroker в обход PgBouncer
+# (в режиме transaction LISTEN не работает); пусто — как у основной БД
+BOOKING_EVENTS_LISTEN_HOST = os.getenv('BOOKING_EVENTS_LISTEN_HOST', '')
+BOOKING_EVENTS_QUEUE_SIZE = int(os.getenv('BOOKING_EVENTS_QUEUE_SIZE', 100))
+SCHEDULE_EVENTS_HEARTBEAT = int(os.getenv('SCHEDULE_EVENTS_HEARTBEAT', 15))
+# Поток закрывается через это время, клиент переподключается сам
+SCHEDULE_EVENTS_MAX_AGE = int(os.getenv('SCHEDULE_EVENTS_MAX_AGE', 300))
+# Срок билета для подключения к потоку (EventSource передаёт его в URL)
+SCHEDULE_EVENTS_TICKET_MAX_AGE = int(os.getenv('SCHEDULE_EVENTS_TICKET_MAX_AGE', 60))
+
+# Замер запросов (core.middleware): доля замеряемых запросов, заголовок
+# Server-Timing и бюджеты числа SQL-запросов по имени представления
+# (или по «МЕТОД имя», если методу нужен свой бюджет)
+REQUEST_METRICS_SAMPLE_RATE = float(os.getenv('REQUEST_METRICS_SAMPLE_RATE', 1.0 if DEBUG else 0.01))
+REQUEST_METRICS_HEADER = os.getenv('REQUEST_METRICS_HEADER', str(DEBUG)) == 'True'
+REQUEST_QUERY_BUDGET = int(os.getenv('REQUEST_QUERY_BUDGET', 15))
+REQUEST_QUERY_BUDGETS = {
+    # Горячие пути чтения: аутентификация + 2–3 запроса без N+1
+    'bookings:schedule': 4,
+    'bookings:room-list': 4,
+    'bookings:booking-list': 4,
+    'bookings:booking-my': 4,
+    'bookings:booking-changes': 5,
+    'bookings:admin-booking-list': 4,
+    # Создание: комната, проверка пересечений, INSERT и карта занятости
+    'POST bookings:booking-list': 7,
+    'POST bookings:admin-booking-list': 7,
+    # Пакетные операции и серии: число запросов не зависит от размера пакета
+    'bookings:admin-booking-bulk-create': 25,
+    'bookings:admin-booking-bulk-cancel': 25,
+    'bookings:booking-series-list': 25,
+}
+
+# Профилирование запросов администратором (core.profiling): каталог
+# профилей, срок действия токена (с) и число планов EXPLAIN на профиль
+PROFILING_DIR = os.getenv('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_TOKEN_MAX_AGE = int(os.getenv('PROFILING_TOKEN_MAX_AGE', 3600))
+PROFILING_EXPLAIN_LIMIT = int(os.getenv('PROFILING_EXPLAIN_LIMIT', 20))
+
+# Токен доступа к /metrics; без него метрики отдаются только при DEBUG
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.request_metrics': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
@@ -109,7 +235,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -159,8 +285,23 @@ SIMPLE_JWT = {
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    'TOKEN_REFRESH_SERIALIZER': 'users.authentication.ClaimsTokenRefreshSerializer',
 }
 
+# Кэш версий токенов (users.authentication): срок записи, с — он же задержка
+# отзыва токенов в других процессах, — и число пользователей в кэше процесса
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 60))
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', 10000))
+# Как часто, с, процесс дочитывает отозванные refresh-токены (users.revocation)
+REVOKED_TOKENS_REFRESH_INTERVAL = float(os.getenv('REVOKED_TOKENS_REFRESH_INTERVAL', 2))
+
+# Импорт пользователей (users.bulk): процессов для хеширования паролей
+# командой import_users (0 — по числу ядер) и записей в одном запросе к API.
+# Запрос хеширует пароли в своём процессе (около 0,3 с на пароль) и должен
+# уложиться в тайм-аут воркера; большие наборы — командой import_users
+USER_IMPORT_WORKERS = int(os.getenv('USER_IMPORT_WORKERS', 0))
+USER_IMPORT_MAX_ITEMS = int(os.getenv('USER_IMPORT_MAX_ITEMS', 50))
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
 CORS_ALLOW_CREDENTIALS = True
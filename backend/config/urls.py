@@ -3,11 +3,15 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from core.views import MetricsView
+from users.views import UserImportView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('users.urls')),
     path('api/', include('bookings.urls')),
+    path('api/admin/users/import/', UserImportView.as_view(), name='user-import'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
     
     # API Documentation
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
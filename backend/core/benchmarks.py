@@ -0,0 +1,207 @@
+"""Микро-бенчмарки горячих путей моделей и сериализаторов.
+
+Каждый замер — функция, которая готовит данные и возвращает вызываемый
+объект (одна операция) и число операций в раунде. Данные, для которых
+нужна БД, создаются в транзакции команды benchmark и откатываются.
+"""
+import uuid
+from datetime import date, timedelta, time as dt_time
+
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from users.authentication import ClaimsJWTAuthentication, ClaimsRefreshToken
+from users.models import User
+from bookings.models import Room, Booking, RoomOccupancy
+from bookings.listing import format_rows
+from bookings.schedule import build_bases, personalize
+from bookings.serializers import BookingSerializer, ScheduleSerializer
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Зарегистрировать замер под именем name"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def _user(suffix=''):
+    return User(
+        id=1, username=f'benchmark{suffix}', email=f'benchmark{suffix}@example.com',
+        first_name='Иван', last_name='Петров', patronymic='Сергеевич'
+    )
+
+
+def _booking(index, room, user, booking_date):
+    return Booking(
+        id=index + 1,
+        room=room,
+        user=user,
+        booking_date=booking_date,
+        start_time=dt_time(9 + index % 12),
+        end_time=dt_time(10 + index % 12, 30),
+        purpose='Планёрка',
+        created_at=timezone.now(),
+    )
+
+
+def _clean(existing):
+    """Booking.clean() при existing бронированиях комнаты на ту же дату"""
+    def setup():
+        user = User.objects.create_user(
+            f'benchmark-clean-{existing}', f'benchmark-clean-{existing}@example.com', None,
+            first_name='Бенчмарк', last_name='Проверка'
+        )
+        room = Room.objects.create(name=f'benchmark-clean-{existing}')
+        booking_date = date.today() + timedelta(days=1)
+        # Минутные бронирования с полуночи; проверяемый интервал вечером свободен
+        Booking.objects.create_many([
+            Booking(
+                room=room, user=user, booking_date=booking_date,
+                start_time=dt_time(minute // 60, minute % 60),
+                end_time=dt_time((minute + 1) // 60, (minute + 1) % 60),
+            )
+            for minute in range(existing)
+        ])
+        candidate = Booking(
+            room=room, user=user, booking_date=booking_date,
+            start_time=dt_time(20), end_time=dt_time(21)
+        )
+        return candidate.clean, 20
+    return setup
+
+
+benchmark('booking_clean_0')(_clean(0))
+benchmark('booking_clean_10')(_clean(10))
+benchmark('booking_clean_1000')(_clean(1000))
+
+
+@benchmark('rooms_free_100x30')
+def rooms_free():
+    """Поиск свободных комнат на месяц по картам занятости (RoomOccupancy.free_rooms)"""
+    user = User.objects.create_user(
+        'benchmark-free-rooms', 'benchmark-free-rooms@example.com', None,
+        first_name='Бенчмарк', last_name='Поиск'
+    )
+    rooms = Room.objects.bulk_create([Room(name=f'benchmark-free-{index}') for index in range(100)])
+    dates = [date.today() + timedelta(days=day) for day in range(1, 31)]
+    # Восемь встреч в рабочий день; у каждой третьей комнаты занят и вечер
+    Booking.objects.create_many([
+        Booking(room=room, user=user, booking_date=booking_date,
+                start_time=dt_time(hour), end_time=dt_time(hour, 50))
+        for index, room in enumerate(rooms)
+        for booking_date in dates
+        for hour in [*range(9, 17), *([18] if index % 3 == 0 else [])]
+    ])
+    candidates = Room.objects.filter(name__startswith='benchmark-free-')
+    return lambda: RoomOccupancy.objects.free_rooms(
+        candidates, dates[0], dates[-1], dt_time(18), dt_time(19)
+    ).count(), 5
+
+
+@benchmark('booking_can_cancel')
+def booking_can_cancel():
+    booking = _booking(0, Room(id=1, name='Г-414'), _user(), date.today() + timedelta(days=1))
+    return lambda: booking.can_cancel, 10000
+
+
+@benchmark('booking_duration_minutes')
+def booking_duration_minutes():
+    booking = _booking(0, Room(id=1, name='Г-414'), _user(), date.today() + timedelta(days=1))
+    return lambda: booking.duration_minutes, 10000
+
+
+@benchmark('user_full_name')
+def user_full_name():
+    user = _user()
+    return lambda: user.full_name, 10000
+
+
+@benchmark('booking_serializer_10k')
+def booking_serializer_10k():
+    room = Room(id=1, name='Г-414')
+    user = _user()
+    booking_date = date.today() + timedelta(days=1)
+    bookings = [_booking(index, room, user, booking_date) for index in range(10000)]
+    return lambda: BookingSerializer(bookings, many=True).data, 1
+
+
+@benchmark('booking_list_rows_10k')
+def booking_list_rows_10k():
+    """Быстрая выдача списка (bookings.listing) на тех же 10 000 бронированиях"""
+    booking_date = date.today() + timedelta(days=1)
+    created_at = timezone.now()
+    rows = [
+        {
+            'id': index + 1, 'room_id': 1, 'room__name': 'Г-414', 'user_id': 1,
+            'user__username': 'benchmark', 'user__first_name': 'Иван', 'user__last_name': 'Петров',
+            'user__patronymic': 'Сергеевич', 'booking_date': booking_date,
+            'start_time': dt_time(9 + index % 12), 'end_time': dt_time(10 + index % 12, 30),
+            'purpose': 'Планёрка', 'cancellation_token': uuid.uuid4(), 'status': 'active',
+            'created_at': created_at, 'cancelled_at': None,
+        }
+        for index in range(10000)
+    ]
+    return lambda: format_rows(rows), 1
+
+
+def _schedule_rows(rooms, per_room, booking_date):
+    room_rows = [
+        {'id': index + 1, 'name': f'Комната {index + 1}', 'capacity': 10,
+         'description': 'Переговорная', 'floor': index % 5 + 1}
+        for index in range(rooms)
+    ]
+    booking_rows = [
+        {
+            'id': room * per_room + slot + 1, 'room_id': room + 1, 'user_id': slot % 7 + 1,
+            'booking_date': booking_date, 'start_time': dt_time(slot % 24), 'end_time': dt_time(slot % 24, 45),
+            'purpose': 'Планёрка', 'user__username': f'user{slot % 7}', 'user__first_name': 'Иван',
+            'user__last_name': 'Петров', 'user__patronymic': 'Сергеевич',
+        }
+        for room in range(rooms)
+        for slot in range(per_room)
+    ]
+    return room_rows, booking_rows
+
+
+@benchmark('schedule_build_300x10')
+def schedule_build():
+    """Построение основы расписания и наложение полей пользователя (без БД)"""
+    booking_date = date.today() + timedelta(days=1)
+    room_rows, booking_rows = _schedule_rows(300, 10, booking_date)
+    now = timezone.localtime()
+
+    def run():
+        bases = build_bases([booking_date], room_rows, booking_rows)
+        return personalize(bases[booking_date], 1, now)
+    return run, 1
+
+
+@benchmark('schedule_serializer_300x10')
+def schedule_serializer():
+    booking_date = date.today() + timedelta(days=1)
+    room_rows, booking_rows = _schedule_rows(300, 10, booking_date)
+    payload = personalize(
+        build_bases([booking_date], room_rows, booking_rows)[booking_date], 1, timezone.localtime()
+    )
+    return lambda: ScheduleSerializer(payload).data, 1
+
+
+def _authenticate(authentication_class):
+    """Пользователь по проверенному access-токену: get_user() класса аутентификации"""
+    def setup():
+        name = f'benchmark-auth-{authentication_class.__name__.lower()}'
+        user = User.objects.create_user(
+            name, f'{name}@example.com', None, first_name='Иван', last_name='Петров'
+        )
+        authentication = authentication_class()
+        token = authentication.get_validated_token(str(ClaimsRefreshToken.for_user(user).access_token))
+        return lambda: authentication.get_user(token), 1000
+    return setup
+
+
+benchmark('jwt_get_user_db')(_authenticate(JWTAuthentication))
+benchmark('jwt_get_user_claims')(_authenticate(ClaimsJWTAuthentication))
@@ -0,0 +1,53 @@
+"""Системные проверки настроек ядра"""
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS
+
+
+# Кэши, содержимое которых не видно другим процессам
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.caches, checks.Tags.database)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Прикрепление к основной БД (core.db_router) должно быть видно всем воркерам.
+
+    Отметка о записи хранится в кэше по умолчанию: в кэше процесса её не
+    увидит воркер, обслуживающий следующий запрос пользователя, и тот
+    прочитает с реплики данные без своих изменений.
+    """
+    if not settings.DATABASE_REPLICAS or not settings.REPLICA_PIN_SECONDS:
+        return []
+    backend = settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND']
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [checks.Error(
+        f'При DB_REPLICA_HOSTS кэш по умолчанию должен быть общим для всех процессов, а не {backend}',
+        hint='Укажите CACHE_BACKEND (например, django.core.cache.backends.redis.RedisCache) '
+             'и CACHE_LOCATION или отключите прикрепление: REPLICA_PIN_SECONDS=0',
+        id='core.E001',
+    )]
+
+
+@checks.register(checks.Tags.database)
+def check_asgi_conn_max_age(app_configs, **kwargs):
+    """Под ASGI соединения с БД не должны удерживаться (CONN_MAX_AGE=0).
+
+    Асинхронные представления (bookings.async_views) возвращают соединение
+    до завершения запроса через close_old_connections(), а оно закрывает
+    только соединения с истёкшим CONN_MAX_AGE: постоянные соединения
+    оставались бы открытыми в потоках воркера сверх ASYNC_DB_CONCURRENCY.
+    """
+    if not settings.ASGI:
+        return []
+    return [
+        checks.Error(
+            f'Под ASGI CONN_MAX_AGE базы {alias} должен быть 0, а не {database.get("CONN_MAX_AGE")}',
+            hint='Уберите DB_CONN_MAX_AGE из окружения ASGI-воркера: пул соединений держит PgBouncer',
+            id='core.E002',
+        )
+        for alias, database in settings.DATABASES.items() if database.get('CONN_MAX_AGE', 0) != 0
+    ]
@@ -0,0 +1,138 @@
+"""Чтение с реплик PostgreSQL.
+
+Реплики перечислены в settings.DATABASE_REPLICAS (см. DB_REPLICA_HOSTS),
+записи всегда идут в основную БД. На реплику уходят только чтения внутри
+HTTP-запросов GET, HEAD и OPTIONS, и только если:
+
+- в запросе ещё ничего не записано и нет открытой транзакции — иначе
+  чтение должно видеть свои же изменения;
+- пользователь определён (до аутентификации читают проверки токена) и
+  не писал в последние REPLICA_PIN_SECONDS секунд. После успешного
+  запроса с изменениями пользователь «прикрепляется» к основной БД на
+  это время, чтобы видеть свои изменения, пока реплика догоняет основную БД.
+
+Одна реплика выбирается на весь запрос, чтобы чтения в нём были
+согласованы между собой. Вне HTTP-запросов (команды, миграции, оболочка)
+все чтения идут в основную БД. Код, которому нужны самые свежие данные
+независимо от запроса (наполнение кэша расписания, проверки токенов,
+синхронизация изменений), читает явно из DEFAULT_DB_ALIAS, а проверка
+пересечений бронирований — из БД записи (router.db_for_write).
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject, empty
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_current = ContextVar('db_routing', default=None)
+
+
+def start_request(request):
+    """Начать маршрутизацию чтений HTTP-запроса; возвращает токен для end_request()"""
+    return _current.set(RoutingState(request))
+
+
+def end_request(token):
+    """Завершить маршрутизацию запроса; возвращает его RoutingState"""
+    state = _current.get()
+    _current.reset(token)
+    return state
+
+
+def _pin_key(user_id):
+    return f'db:pin:{user_id}'
+
+
+def _request_user(request):
+    """Пользователь запроса или None, пока он не определён.
+
+    Ленивый пользователь сессии не вычисляется: это запрос к БД изнутри
+    маршрутизатора, а для API пользователя задаёт аутентификация DRF.
+    """
+    user = request.__dict__.get('user')
+    if user is None or (isinstance(user, SimpleLazyObject) and user._wrapped is empty):
+        return None
+    return user
+
+
+class RoutingState:
+    """Маршрутизация чтений одного HTTP-запроса"""
+
+    def __init__(self, request):
+        self.request = request
+        self.read_only = request.method in SAFE_METHODS
+        self.wrote = False
+        self.pinned = None
+        self.replica = None
+
+    def read_alias(self):
+        """Реплика для чтения или None — читать из основной БД"""
+        if not self.read_only or self.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        if self.pinned is None:
+            user = _request_user(self.request)
+            if user is None:
+                return None
+            self.pinned = bool(
+                user.is_authenticated and settings.REPLICA_PIN_SECONDS
+                and cache.get(_pin_key(user.pk))
+            )
+        if self.pinned:
+            return None
+        if self.replica is None:
+            self.replica = random.choice(settings.DATABASE_REPLICAS)
+        return self.replica
+
+
+class ReplicaRouter:
+    """Чтения текущего запроса — с реплики, записи и миграции — в основную БД"""
+
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or not settings.DATABASE_REPLICAS:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты читаются из той же БД, что и сам объект
+            return instance._state.db
+        return state.read_alias() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплики приходит с репликацией
+        return db not in settings.DATABASE_REPLICAS
+
+
+def needs_pin(state, response):
+    """Прикреплять ли автора запроса к основной БД: только после успешной записи.
+
+    db_for_write вызывается и для чтений с блокировкой (проверка пересечений
+    бронирований), а отклонённый запрос (ответ 4xx или 5xx) откатывает свою
+    транзакцию: после него реплике догонять нечего.
+    """
+    return bool(
+        settings.DATABASE_REPLICAS and settings.REPLICA_PIN_SECONDS
+        and not state.read_only and state.wrote and response.status_code < 400
+    )
+
+
+def pin_user(request):
+    """Прикрепить автора изменений к основной БД на REPLICA_PIN_SECONDS"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        cache.set(_pin_key(user.pk), 1, timeout=settings.REPLICA_PIN_SECONDS)
+
@@ -0,0 +1,93 @@
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core.benchmarks import BENCHMARKS
+
+
+class Rollback(Exception):
+    """Откат тестовых данных после замеров"""
+
+
+class Command(BaseCommand):
+    help = 'Микро-бенчмарки моделей и сериализаторов; результаты — в JSON для benchmark_compare'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f'Замеры (по умолчанию все): {", ".join(BENCHMARKS)}')
+        parser.add_argument('--rounds', type=int, default=7, help='Число раундов каждого замера')
+        parser.add_argument('--output', '-o', help='Файл для результатов в JSON')
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f'Неизвестные замеры: {", ".join(sorted(unknown))}')
+
+        results = {}
+        self.stdout.write(f'{"Замер":<30}{"медиана, мкс":>14}{"мин, мкс":>12}{"разброс, %":>12}')
+        try:
+            with transaction.atomic():
+                for name in names:
+                    results[name] = self.measure(name, options['rounds'])
+                    result = results[name]
+                    self.stdout.write(
+                        f'{name:<30}{result["median"]:>14.2f}{result["min"]:>12.2f}'
+                        f'{result["stdev"] / result["median"] * 100:>12.1f}'
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+
+        if options['output']:
+            report = {'meta': self.meta(), 'unit': 'us/op', 'results': results}
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Результаты записаны в {options["output"]}'))
+
+    def measure(self, name, rounds):
+        """Время одной операции по раундам, мкс"""
+        func, number = BENCHMARKS[name]()
+        func()  # прогрев: кэши, ленивые импорты
+        timings = []
+        # Как в timeit: сборщик мусора во время замера не запускается
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(rounds):
+                started = time.perf_counter()
+                for _ in range(number):
+                    func()
+                timings.append((time.perf_counter() - started) / number * 1e6)
+                gc.collect()
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return {
+            'number': number,
+            'rounds': timings,
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        }
+
+    def meta(self):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'machine': platform.node(),
+        }
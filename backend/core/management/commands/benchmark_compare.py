@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Сравнение результатов benchmark: замедления больше порога — ошибка'
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline', help='JSON с исходными результатами')
+        parser.add_argument('current', help='JSON с новыми результатами')
+        parser.add_argument('--threshold', type=float, default=10, help='Допустимое замедление, %%')
+        parser.add_argument('--stat', choices=['min', 'median'], default='min', help='Сравниваемая величина (min меньше подвержен шуму)')
+
+    def handle(self, *args, **options):
+        baseline = self.load(options['baseline'])
+        current = self.load(options['current'])
+        stat = options['stat']
+        threshold = options['threshold']
+
+        self.stdout.write(f'{"Замер":<30}{"было, мкс":>12}{"стало, мкс":>12}{"изменение":>12}')
+        slower = []
+        for name in sorted(baseline.keys() | current.keys()):
+            if name not in baseline or name not in current:
+                where = 'только в новых' if name in current else 'только в исходных'
+                self.stdout.write(f'{name:<30}{where:>36}')
+                continue
+            before = baseline[name][stat]
+            after = current[name][stat]
+            change = (after - before) / before * 100
+            line = f'{name:<30}{before:>12.2f}{after:>12.2f}{change:>+11.1f}%'
+            if change > threshold:
+                slower.append(name)
+                line = self.style.ERROR(f'{line}  медленнее')
+            elif change < -threshold:
+                line = self.style.SUCCESS(f'{line}  быстрее')
+            self.stdout.write(line)
+
+        if slower:
+            raise CommandError(f'Замедление больше {threshold:g}%: {", ".join(slower)}')
+        self.stdout.write(self.style.SUCCESS(f'Замедлений больше {threshold:g}% нет'))
+
+    def load(self, path):
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)['results']
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'Не удалось прочитать {path}: {exc}')
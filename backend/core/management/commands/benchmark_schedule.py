@@ -0,0 +1,124 @@
+import time
+from datetime import date, timedelta, time as dt_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from users.models import User
+from bookings.models import Room, Booking
+from bookings.schedule import build_bases, get_bookings, get_rooms, personalize
+
+
+class Rollback(Exception):
+    """Откат тестовых данных после замера"""
+
+
+def legacy_schedule(target_date, user):
+    """Прежний алгоритм ScheduleView: полный проход по бронированиям для каждой комнаты"""
+    rooms = Room.objects.filter(is_active=True).order_by('name')
+    bookings = Booking.objects.filter(
+        booking_date=target_date,
+        status='active'
+    ).select_related('user', 'room')
+
+    schedule_data = []
+    for room in rooms:
+        room_bookings = [
+            {
+                'id': booking.id,
+                'start_time': booking.start_time,
+                'end_time': booking.end_time,
+                'status': 'booked',
+                'user_name': booking.user.full_name,
+                'user_username': booking.user.username,
+                'is_own': booking.user == user,
+                'purpose': booking.purpose,
+                'can_cancel': booking.can_cancel
+            }
+            for booking in bookings if booking.room == room
+        ]
+        schedule_data.append({
+            'id': room.id,
+            'name': room.name,
+            'capacity': room.capacity,
+            'description': room.description,
+            'floor': room.floor,
+            'bookings': room_bookings
+        })
+    return {'date': target_date, 'rooms': schedule_data}
+
+
+def uncached_schedule(target_date, user):
+    """Текущий алгоритм без кэша расписания"""
+    bases = build_bases([target_date], get_rooms(), get_bookings([target_date]))
+    return personalize(bases[target_date], user.id, timezone.localtime())
+
+
+class Command(BaseCommand):
+    help = 'Замер построения расписания: прежний алгоритм против индексированного'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rooms', default='10,100,300',
+            help='Список количеств комнат через запятую'
+        )
+        parser.add_argument(
+            '--per-room', type=int, default=10,
+            help='Бронирований на комнату в день'
+        )
+        parser.add_argument('--repeat', type=int, default=3, help='Число повторов замера')
+
+    def handle(self, *args, **options):
+        sizes = [int(value) for value in options['rooms'].split(',')]
+        if not 1 <= options['per_room'] <= 24:
+            raise CommandError('--per-room должен быть от 1 до 24 (по часу на бронирование)')
+        try:
+            with transaction.atomic():
+                self.run(sizes, options['per_room'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes, per_room, repeat):
+        user = User.objects.create_user(
+            'benchmark_schedule', 'benchmark_schedule@example.com', None,
+            first_name='Бенчмарк', last_name='Расписание'
+        )
+        target_date = date.today() + timedelta(days=1)
+        created = 0
+
+        self.stdout.write(f'{"комнат":>8} {"броней":>8} {"прежний, мс":>12} {"новый, мс":>10} {"ускорение":>10}')
+        for size in sizes:
+            rooms = Room.objects.bulk_create([
+                Room(name=f'benchmark-{index}', capacity=10)
+                for index in range(created, size)
+            ])
+            created = max(created, size)
+            Booking.objects.bulk_create([
+                Booking(
+                    room=room,
+                    user=user,
+                    booking_date=target_date,
+                    start_time=dt_time(hour=slot),
+                    end_time=dt_time(hour=slot, minute=59),
+                )
+                for room in rooms
+                for slot in range(per_room)
+            ])
+
+            legacy = self.measure(lambda: legacy_schedule(target_date, user), repeat)
+            current = self.measure(lambda: uncached_schedule(target_date, user), repeat)
+            self.stdout.write(
+                f'{size:>8} {size * per_room:>8} {legacy:>12.1f} {current:>10.1f} '
+                f'{legacy / current:>9.1f}x'
+            )
+
+    def measure(self, func, repeat):
+        """Лучшее время из нескольких прогонов, в миллисекундах"""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
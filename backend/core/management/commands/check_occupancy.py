@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from bookings import occupancy
+from bookings.models import RoomOccupancy
+from .rebuild_occupancy import parse_date
+
+
+class Command(BaseCommand):
+    help = 'Сверка карт занятости комнат с таблицей бронирований'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', type=parse_date, help='Начало периода (YYYY-MM-DD)')
+        parser.add_argument('--date-to', type=parse_date, help='Конец периода (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        mismatches = RoomOccupancy.objects.find_mismatches(options['date_from'], options['date_to'])
+        minutes = occupancy.slot_minutes()
+
+        for (room_id, booking_date), expected, stored in mismatches:
+            self.stdout.write(
+                f'Комната {room_id}, {booking_date}: '
+                f'ожидалось {occupancy.to_bytes(expected, minutes).hex()}, '
+                f'в карте {occupancy.to_bytes(stored, minutes).hex()}'
+            )
+
+        if mismatches:
+            raise CommandError(
+                f'Расхождений: {len(mismatches)}. Исправление: python manage.py rebuild_occupancy'
+            )
+        self.stdout.write(self.style.SUCCESS('Карты занятости согласованы с бронированиями'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.utils import timezone
+from bookings.models import BookingSeries
+
+
+class Command(BaseCommand):
+    help = 'Создание бронирований активных серий до горизонта бронирования (запускать ежедневно)'
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        series_list = BookingSeries.objects.filter(status='active', until__gte=today).filter(
+            Q(expanded_until__isnull=True) | Q(expanded_until__lt=F('until'))
+        ).select_related('room')
+
+        total = 0
+        for series in series_list:
+            try:
+                created, conflicts = series.expand(skip_conflicts=True)
+            except ValidationError as exc:
+                # Параллельная запись заняла время — повторим при следующем запуске
+                self.stdout.write(self.style.WARNING(f'Серия {series.id}: {exc.messages[0]}'))
+                continue
+            total += len(created)
+            for value, error in sorted(conflicts.items()):
+                self.stdout.write(self.style.WARNING(f'Серия {series.id}, {value}: {error}'))
+
+        self.stdout.write(self.style.SUCCESS(f'Создано бронирований: {total}'))
@@ -0,0 +1,67 @@
+import calendar
+import os
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from bookings.export import CHUNK_SIZE, FORMATS, filter_bookings
+from bookings.models import Booking
+
+
+def _month(value):
+    try:
+        year, month = (int(part) for part in value.split('-'))
+        return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+    except ValueError:
+        raise ValueError(f'ожидается ГГГГ-ММ: {value}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгрузка бронирований в CSV или NDJSON с фильтрами администраторского списка '
+        '(для периодических выгрузок по cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv', help='Формат выгрузки')
+        parser.add_argument('--output', default='-', help='Файл выгрузки; "-" — стандартный вывод')
+        parser.add_argument('--room-id', type=int)
+        parser.add_argument('--user-id', type=int)
+        parser.add_argument('--date-from', type=date.fromisoformat, metavar='ГГГГ-ММ-ДД')
+        parser.add_argument('--date-to', type=date.fromisoformat, metavar='ГГГГ-ММ-ДД')
+        parser.add_argument('--month', type=_month, metavar='ГГГГ-ММ',
+                            help='Весь месяц; заменяет --date-from и --date-to')
+        parser.add_argument('--status', choices=[value for value, _ in Booking.STATUS_CHOICES])
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Строк в одной порции серверного курсора')
+
+    def handle(self, *args, **options):
+        if options['month']:
+            options['date_from'], options['date_to'] = options['month']
+        if options['date_from'] and options['date_to'] and options['date_to'] < options['date_from']:
+            raise CommandError('--date-to не может быть раньше --date-from')
+
+        queryset = filter_bookings(
+            Booking.objects.all(),
+            room_id=options['room_id'], user_id=options['user_id'],
+            date_from=options['date_from'], date_to=options['date_to'], status=options['status'],
+        )
+        generate = FORMATS[options['format']][0]
+        chunks = generate(queryset, options['chunk_size'])
+
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        # Запись во временный файл: читатель выгрузки не увидит её недописанной
+        partial_path = f'{options["output"]}.part'
+        try:
+            with open(partial_path, 'w', encoding='utf-8', newline='') as file:
+                for chunk in chunks:
+                    file.write(chunk)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        os.replace(partial_path, options['output'])
+        self.stderr.write(self.style.SUCCESS(f'Выгрузка записана в {options["output"]}'))
@@ -0,0 +1,59 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from users.bulk import import_report, import_users, parse_csv
+
+
+class Command(BaseCommand):
+    help = (
+        'Массовая регистрация пользователей из CSV или JSON (набор группы, новый отдел); '
+        'пароли хешируются параллельно на всех ядрах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .csv (с заголовком) или .json (список объектов)')
+        parser.add_argument('--format', choices=['csv', 'json'], help='Формат файла; по умолчанию — по расширению')
+        parser.add_argument('--mode', choices=['atomic', 'partial'], default='atomic',
+                            help='atomic — никого при любой ошибке, partial — всех без ошибок')
+        parser.add_argument('--dry-run', action='store_true', help='Только проверить файл')
+        parser.add_argument('--group', help='Группа (group_name) для записей без неё')
+        parser.add_argument('--workers', type=int, help='Процессов для хеширования паролей')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or ('json' if options['path'].endswith('.json') else 'csv')
+        try:
+            with open(options['path'], encoding='utf-8-sig') as file:
+                rows = json.load(file) if file_format == 'json' else parse_csv(file.read())
+        except (OSError, UnicodeDecodeError, json.JSONDecodeError) as exc:
+            raise CommandError(f'Не удалось прочитать {options["path"]}: {exc}')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise CommandError('JSON должен содержать список объектов')
+
+        started = time.perf_counter()
+        try:
+            users, errors = import_users(
+                rows, partial=options['mode'] == 'partial', dry_run=options['dry_run'],
+                group_name=options['group'], workers=options['workers']
+            )
+        except IntegrityError:
+            raise CommandError('Часть username или email заняли во время импорта, повторите запуск')
+        elapsed = time.perf_counter() - started
+
+        report = import_report(users, errors, dry_run=options['dry_run'])
+        for result in report['results']:
+            if result['status'] == 'error':
+                # Номер строки файла: заголовок CSV — строка 1
+                line = f'строка {result["index"] + 2}' if file_format == 'csv' else f'запись {result["index"]}'
+                details = '; '.join(f'{field}: {message}' for field, message in result['errors'].items())
+                self.stdout.write(self.style.WARNING(f'{line}: {details}'))
+
+        if options['dry_run']:
+            summary = f'Проверено записей: {len(rows)}, с ошибками: {report["failed"]}'
+        elif report['created']:
+            summary = f'Создано пользователей: {report["created"]}, с ошибками: {report["failed"]}'
+        else:
+            summary = f'Никто не создан, записей с ошибками: {report["failed"]}'
+        style = self.style.SUCCESS if not errors else self.style.WARNING
+        self.stdout.write(style(f'{summary} ({elapsed:.1f} с)'))
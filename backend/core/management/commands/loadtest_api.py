@@ -0,0 +1,308 @@
+import asyncio
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Client:
+    """HTTP-клиент одного потока (keep-alive, если сервер его поддерживает)"""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.netloc, timeout=timeout)
+        self.prefix = parts.path.rstrip('/')
+        self.token = None
+
+    def request(self, method, path, params=None, body=None):
+        """(статус, тело ответа); ошибка соединения — статус 0"""
+        url = self.prefix + path + (f'?{urlencode(params)}' if params else '')
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, url, body=body, headers=headers)
+            response = self.connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            return 0, b''
+
+
+class AsyncClient:
+    """HTTP/1.1-клиент на asyncio для сотен одновременных клиентов в одном потоке.
+
+    Соединение переиспользуется, пока сервер его не закрывает (синхронные
+    воркеры gunicorn закрывают его после каждого ответа).
+    """
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = parts.scheme == 'https'
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.token = None
+        self.reader = self.writer = None
+
+    async def request(self, method, path, params=None, body=None):
+        """(статус, тело ответа); ошибка соединения или таймаут — статус 0"""
+        url = self.prefix + path + (f'?{urlencode(params)}' if params else '')
+        headers = [f'{method} {url} HTTP/1.1', f'Host: {self.netloc}', 'Accept: application/json']
+        if self.token:
+            headers.append(f'Authorization: Bearer {self.token}')
+        payload = b''
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers.append('Content-Type: application/json')
+        headers.append(f'Content-Length: {len(payload)}')
+        try:
+            return await asyncio.wait_for(
+                self._exchange(('\r\n'.join(headers) + '\r\n\r\n').encode() + payload), self.timeout
+            )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            self.close()
+            return 0, b''
+
+    async def _exchange(self, data):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        self.writer.write(data)
+        await self.writer.drain()
+
+        status = int((await self.reader.readuntil(b'\r\n')).split()[1])
+        headers = {}
+        while (line := await self.reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding') == 'chunked':
+            chunks = []
+            while size := int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16):
+                chunks.append(await self.reader.readexactly(size + 2))
+            await self.reader.readuntil(b'\r\n')
+            body = b''.join(chunk[:-2] for chunk in chunks)
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест API на запущенном сервере: параллельные запросы расписания, '
+        'бронирований, комнат, страницы отмены, входа и создания бронирований; '
+        'p50/p95/p99 и пропускная способность'
+    )
+
+    # Сценарии и их доля в нагрузке
+    SCENARIOS = {
+        'schedule': 35,
+        'schedule_week': 10,
+        'bookings': 10,
+        'bookings_my': 15,
+        'rooms': 15,
+        'cancel_info': 5,
+        'login': 5,
+        'create_booking': 10,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Адрес сервера')
+        parser.add_argument('--concurrency', type=int, default=20, help='Число параллельных клиентов')
+        parser.add_argument('--engine', choices=['threads', 'asyncio'], default='threads',
+                            help='Клиенты в потоках или корутинах (для сотен клиентов — asyncio)')
+        parser.add_argument('--duration', type=float, default=30, help='Длительность теста, с')
+        parser.add_argument('--users', type=int, default=50, help='Сколько пользователей seed_data использовать')
+        parser.add_argument('--password', default='Seed12345!', help='Пароль пользователей seed_data')
+        parser.add_argument('--scenarios', default=','.join(self.SCENARIOS), help='Сценарии через запятую')
+        parser.add_argument('--timeout', type=float, default=30, help='Таймаут запроса, с')
+        parser.add_argument('--fail-p95', type=float, default=None,
+                            help='Завершиться с ошибкой, если p95 любого сценария выше (мс)')
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(self.SCENARIOS)
+        if unknown:
+            raise CommandError(f'Неизвестные сценарии: {", ".join(sorted(unknown))}')
+        self.options = options
+        self.usernames = [f'seed_user_{index}' for index in range(options['users'])]
+
+        # Вход всех пользователей заранее: токены раздаются клиентам по кругу
+        setup = Client(options['url'], options['timeout'])
+        self.tokens = [self.login(setup, username) for username in self.usernames]
+        self.tokens = [token for token in self.tokens if token]
+        if not self.tokens:
+            raise CommandError('Не удалось войти ни под одним пользователем; выполните seed_data')
+        setup.token = self.tokens[0]
+        status, body = setup.request('GET', '/api/rooms/')
+        if status != 200:
+            raise CommandError(f'Не удалось получить список комнат: HTTP {status}')
+        data = json.loads(body)
+        self.room_ids = [room['id'] for room in data.get('results', data)]
+        status, body = setup.request('GET', '/api/bookings/my/', {'future_only': 'true'})
+        data = json.loads(body) if status == 200 else []
+        bookings = data['bookings'] if isinstance(data, dict) else data
+        self.cancellation_tokens = [booking['cancellation_token'] for booking in bookings]
+        if 'cancel_info' in scenarios and not self.cancellation_tokens:
+            raise CommandError(f'У {self.usernames[0]} нет будущих бронирований для сценария cancel_info')
+
+        weights = [self.SCENARIOS[name] for name in scenarios]
+        run = self.run_threads if options['engine'] == 'threads' else self.run_asyncio
+        started = time.perf_counter()
+        results = run(scenarios, weights, started + options['duration'])
+        elapsed = time.perf_counter() - started
+
+        self.report(results, elapsed)
+
+    def run_threads(self, scenarios, weights, deadline):
+        results = defaultdict(list)
+        lock = threading.Lock()
+
+        def worker(index):
+            client = Client(self.options['url'], self.options['timeout'])
+            client.token = self.tokens[index % len(self.tokens)]
+            rng = random.Random(index)
+            local = defaultdict(list)
+            while time.perf_counter() < deadline:
+                name = rng.choices(scenarios, weights)[0]
+                started = time.perf_counter()
+                status = client.request(*getattr(self, f'request_{name}')(rng))[0]
+                local[name].append((time.perf_counter() - started, status))
+            with lock:
+                for name, samples in local.items():
+                    results[name].extend(samples)
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(self.options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def run_asyncio(self, scenarios, weights, deadline):
+        results = defaultdict(list)
+
+        async def worker(index):
+            client = AsyncClient(self.options['url'], self.options['timeout'])
+            client.token = self.tokens[index % len(self.tokens)]
+            rng = random.Random(index)
+            try:
+                while time.perf_counter() < deadline:
+                    name = rng.choices(scenarios, weights)[0]
+                    started = time.perf_counter()
+                    status = (await client.request(*getattr(self, f'request_{name}')(rng)))[0]
+                    results[name].append((time.perf_counter() - started, status))
+            finally:
+                client.close()
+
+        async def main():
+            await asyncio.gather(*(worker(index) for index in range(self.options['concurrency'])))
+
+        asyncio.run(main())
+        return results
+
+    def login(self, client, username):
+        status, body = client.request('POST', '/api/auth/login/', body={
+            'username': username, 'password': self.options['password']
+        })
+        return json.loads(body)['access'] if status == 200 else None
+
+    def random_date(self, rng, days=14):
+        return (date.today() + timedelta(days=rng.randint(0, days))).isoformat()
+
+    # Запросы сценариев: (метод, путь, параметры, тело)
+
+    def request_schedule(self, rng):
+        return 'GET', '/api/schedule/', {'date': self.random_date(rng)}, None
+
+    def request_schedule_week(self, rng):
+        return 'GET', '/api/schedule/', {'week': self.random_date(rng)}, None
+
+    def request_bookings(self, rng):
+        return 'GET', '/api/bookings/', None, None
+
+    def request_bookings_my(self, rng):
+        return 'GET', '/api/bookings/my/', {'future_only': 'true'}, None
+
+    def request_rooms(self, rng):
+        return 'GET', '/api/rooms/', None, None
+
+    def request_cancel_info(self, rng):
+        return 'GET', f'/api/cancel/{rng.choice(self.cancellation_tokens)}/', None, None
+
+    def request_login(self, rng):
+        return 'POST', '/api/auth/login/', None, {
+            'username': rng.choice(self.usernames), 'password': self.options['password']
+        }
+
+    def request_create_booking(self, rng):
+        hour = rng.randint(9, 21)
+        return 'POST', '/api/bookings/', None, {
+            'room': rng.choice(self.room_ids),
+            'booking_date': self.random_date(rng, days=29),
+            'start_time': f'{hour:02d}:{rng.choice(["00", "30"])}',
+            'end_time': f'{hour + 1:02d}:00',
+            'purpose': 'Нагрузочный тест',
+        }
+
+    def report(self, results, elapsed):
+        header = f'{"Сценарий":<16}{"запросов":>10}{"RPS":>9}{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}{"макс":>9}{"4xx":>7}{"ошибки":>8}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        failed = []
+        total = 0
+        for name in self.SCENARIOS:
+            samples = results.get(name)
+            if not samples:
+                continue
+            total += len(samples)
+            latencies = sorted(duration * 1000 for duration, _ in samples)
+            if len(latencies) > 1:
+                percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+                p50, p95, p99 = percentiles[49], percentiles[94], percentiles[98]
+            else:
+                p50 = p95 = p99 = latencies[0]
+            client_errors = sum(1 for _, status in samples if 400 <= status < 500)
+            errors = sum(1 for _, status in samples if status == 0 or status >= 500)
+            self.stdout.write(
+                f'{name:<16}{len(samples):>10}{len(samples) / elapsed:>9.1f}{p50:>10.1f}{p95:>10.1f}'
+                f'{p99:>10.1f}{latencies[-1]:>9.0f}{client_errors:>7}{errors:>8}'
+            )
+            if self.options['fail_p95'] is not None and p95 > self.options['fail_p95']:
+                failed.append(f'{name}: p95 {p95:.1f} мс')
+            if errors:
+                failed.append(f'{name}: ошибок {errors}')
+
+        self.stdout.write('-' * len(header))
+        self.stdout.write(
+            f'Всего: {total} запросов за {elapsed:.1f} с, {total / elapsed:.1f} RPS, '
+            f'клиентов: {self.options["concurrency"]} ({self.options["engine"]})'
+        )
+        # 4xx при создании бронирования ожидаемы: часть слотов уже занята
+        if failed:
+            raise CommandError('Порог не выдержан: ' + '; '.join(failed))
+        self.stdout.write(self.style.SUCCESS('Нагрузочный тест завершён'))
@@ -0,0 +1,166 @@
+import asyncio
+import statistics
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta, time as dt_time
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+from bookings.events import get_broker
+from bookings.models import Room, Booking
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест потока событий расписания: сколько подписчиков держит '
+        'один воркер и за какое время до них доходят изменения бронирований'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=1000, help='Число одновременных подписчиков')
+        parser.add_argument('--events', type=int, default=20, help='Число изменений бронирований')
+        parser.add_argument('--host', default='localhost', help='Заголовок Host (из ALLOWED_HOSTS)')
+        parser.add_argument('--timeout', type=float, default=30, help='Ожидание подключения и доставки, с')
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        room = Room.objects.create(name=f'events-loadtest-{suffix}', capacity=1)
+        user = User.objects.create_user(
+            f'events-{suffix}', f'events-{suffix}@example.com', None,
+            first_name='Нагрузочный', last_name='Тест'
+        )
+        try:
+            asyncio.run(self.run(room, user, options))
+        finally:
+            room.delete()
+            user.delete()
+
+    async def run(self, room, user, options):
+        subscribers = options['subscribers']
+        timeout = options['timeout']
+        target_date = date.today() + timedelta(days=1)
+        application = get_asgi_application()
+        broker = get_broker()
+
+        query = urlencode({'date': target_date.isoformat(), 'token': str(AccessToken.for_user(user))})
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': '/api/schedule/events/',
+            'raw_path': b'/api/schedule/events/',
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [(b'host', options['host'].encode()), (b'accept', b'text/event-stream')],
+            'client': ('127.0.0.1', 0),
+            'server': (options['host'], 80),
+        }
+
+        # Строка data: события -> моменты получения подписчиками
+        arrivals = defaultdict(list)
+        statuses = []
+        disconnect = asyncio.Event()
+
+        async def subscribe():
+            request_sent = False
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+                    return
+                now = time.perf_counter()
+                for line in message.get('body', b'').decode().splitlines():
+                    if line.startswith('data: '):
+                        arrivals[line].append(now)
+
+            await application(dict(scope), receive, send)
+
+        tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(subscribe()) for _ in range(subscribers)]
+        try:
+            while broker.subscriber_count() < subscribers:
+                if time.perf_counter() - started > timeout:
+                    raise CommandError(
+                        f'Подключилось {broker.subscriber_count()} из {subscribers} подписчиков '
+                        f'(статусы ответов: {sorted(set(statuses))})'
+                    )
+                await asyncio.sleep(0.05)
+            connect_seconds = time.perf_counter() - started
+            memory_per_subscriber = (tracemalloc.get_traced_memory()[0] - memory_before) / subscribers
+            tracemalloc.stop()
+
+            self.stdout.write(
+                f'Подписчиков: {subscribers}, подключение: {connect_seconds:.2f} с, '
+                f'память: {memory_per_subscriber / 1024:.1f} КБ на подписчика'
+            )
+
+            latencies = []
+            write_times = []
+            for index in range(options['events']):
+                published = time.perf_counter()
+                kind, booking_id = await sync_to_async(self.change_booking)(room, user, target_date, index)
+                write_times.append(time.perf_counter() - published)
+                marker = f'"type": "{kind}", "id": {booking_id},'
+
+                deadline = published + timeout
+                while True:
+                    delivered = next((times for line, times in arrivals.items() if marker in line), [])
+                    if len(delivered) >= subscribers or time.perf_counter() > deadline:
+                        break
+                    await asyncio.sleep(0.01)
+                if len(delivered) < subscribers:
+                    raise CommandError(
+                        f'Событие {index + 1} доставлено {len(delivered)} из {subscribers} подписчиков'
+                    )
+                latencies.extend(arrived - published for arrived in delivered)
+
+            p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+            self.stdout.write(
+                f'Событий: {len(write_times)}, запись в БД: '
+                f'{statistics.median(write_times) * 1000:.1f} мс (медиана)'
+            )
+            self.stdout.write(
+                f'Задержка от записи до получения подписчиком: медиана '
+                f'{statistics.median(latencies) * 1000:.1f} мс, p95 {p95 * 1000:.1f} мс, '
+                f'максимум {max(latencies) * 1000:.1f} мс'
+            )
+            self.stdout.write(self.style.SUCCESS('Все события доставлены всем подписчикам'))
+        finally:
+            disconnect.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def change_booking(room, user, target_date, index):
+        """Создать или отменить бронирование; возвращает (тип события, id)"""
+        if index % 2 == 0:
+            hour = 9 + index // 2 % 14
+            booking, = Booking.objects.create_many([Booking(
+                room=room, user=user, booking_date=target_date,
+                start_time=dt_time(hour=hour), end_time=dt_time(hour=hour + 1)
+            )])
+            return 'created', booking.id
+        booking_id = Booking.objects.filter(room=room, status='active').order_by('-id').values_list(
+            'id', flat=True
+        ).first()
+        Booking.objects.filter(id=booking_id).cancel()
+        return 'cancelled', booking_id
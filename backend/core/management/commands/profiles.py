@@ -0,0 +1,115 @@
+import io
+import os
+import pstats
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core import profiling
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Профили запросов, снятых по токену администратора: список, сводка профиля '
+        '(горячие функции, SQL-запросы и планы) и выдача токена'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('profile_id', nargs='?', help='Показать сводку профиля с этим id')
+        parser.add_argument('--token', metavar='USERNAME', help='Выдать токен профилирования администратору')
+        parser.add_argument('--limit', type=int, default=20, help='Число строк в списке и сводке')
+        parser.add_argument('--sort', choices=['cumulative', 'tottime', 'ncalls'], default='cumulative',
+                            help='Сортировка функций в сводке')
+        parser.add_argument('--path', help='Показывать только профили запросов, путь которых содержит строку')
+        parser.add_argument('--delete-older', type=int, metavar='DAYS', help='Удалить профили старше DAYS дней')
+
+    def handle(self, *args, **options):
+        if options['token']:
+            return self.issue_token(options['token'])
+
+        profiles = profiling.load_profiles(settings.PROFILING_DIR)
+        if options['delete_older'] is not None:
+            return self.delete_older(profiles, options['delete_older'])
+        if options['profile_id']:
+            profile = next((item for item in profiles if item['id'] == options['profile_id']), None)
+            if profile is None:
+                raise CommandError(f'Профиль {options["profile_id"]} не найден в {settings.PROFILING_DIR}')
+            return self.summarize(profile, options)
+        self.list_profiles(profiles, options)
+
+    def issue_token(self, username):
+        user = User.objects.filter(username=username).first()
+        if user is None or not user.is_admin:
+            raise CommandError(f'Администратор {username} не найден')
+        self.stdout.write(profiling.make_token(user))
+        self.stderr.write(
+            f'Действует {settings.PROFILING_TOKEN_MAX_AGE} с. Передайте в заголовке X-Profile '
+            f'вместе с access-токеном {username}; id профиля вернётся в заголовке X-Profile-Id'
+        )
+
+    def list_profiles(self, profiles, options):
+        if options['path']:
+            profiles = [profile for profile in profiles if options['path'] in profile['path']]
+        if not profiles:
+            self.stdout.write(f'Профилей нет ({settings.PROFILING_DIR})')
+            return
+
+        header = f'{"id":<25}{"запрос":<48}{"статус":>7}{"всего, мс":>11}{"БД, мс":>9}{"SQL":>6}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for profile in profiles[:options['limit']]:
+            request = f'{profile["method"]} {profile["path"]}'
+            self.stdout.write(
+                f'{profile["id"]:<25}{request[:47]:<48}{profile["status"]:>7}'
+                f'{profile["duration_ms"]:>11.1f}{profile["db_ms"]:>9.1f}{len(profile["queries"]):>6}'
+            )
+
+    def summarize(self, profile, options):
+        self.stdout.write(
+            f'{profile["method"]} {profile["path"]} {profile["query"] or ""} → {profile["status"]} '
+            f'({profile["view"]}), {profile["created_at"]}, {profile["user"]}'
+        )
+        self.stdout.write(
+            f'Всего {profile["duration_ms"]:.1f} мс, из них SQL {profile["db_ms"]:.1f} мс '
+            f'({len(profile["queries"])} запросов)'
+        )
+
+        stats_path = os.path.join(settings.PROFILING_DIR, f'{profile["id"]}.prof')
+        if os.path.exists(stats_path):
+            output = io.StringIO()
+            stats = pstats.Stats(stats_path, stream=output)
+            stats.strip_dirs().sort_stats(options['sort']).print_stats(options['limit'])
+            self.stdout.write(self.style.MIGRATE_HEADING('\nФункции'))
+            # Пропуск заголовка pstats с именем файла и общим числом вызовов
+            self.stdout.write(output.getvalue().split('\n\n', 2)[-1].rstrip())
+
+        repeated = {}
+        for query in profile['queries']:
+            repeated[query['sql']] = repeated.get(query['sql'], 0) + 1
+        repeated = {sql: count for sql, count in repeated.items() if count > 1}
+        if repeated:
+            self.stdout.write(self.style.MIGRATE_HEADING('\nПовторяющиеся SQL-запросы (возможен N+1)'))
+            for sql, count in sorted(repeated.items(), key=lambda item: -item[1]):
+                self.stdout.write(f'{count:>5} × {sql[:200]}')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nСамые долгие SELECT и их планы'))
+        for entry in profile['explains'][:options['limit']]:
+            self.stdout.write(f'{entry["total_ms"]:.2f} мс, {entry["count"]} раз: {entry["sql"][:300]}')
+            for line in entry['plan'].splitlines():
+                self.stdout.write(f'    {line}')
+
+        self.stdout.write(f'\nИнтерактивный разбор: python -m pstats {stats_path}')
+
+    def delete_older(self, profiles, days):
+        threshold = timezone.now() - timedelta(days=days)
+        deleted = 0
+        for profile in profiles:
+            if datetime.fromisoformat(profile['created_at']) < threshold:
+                for extension in ('json', 'prof'):
+                    path = os.path.join(settings.PROFILING_DIR, f'{profile["id"]}.{extension}')
+                    if os.path.exists(path):
+                        os.remove(path)
+                deleted += 1
+        self.stdout.write(self.style.SUCCESS(f'Удалено профилей: {deleted}'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from users.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = 'Удаление истёкших отозванных refresh-токенов пакетами (запускать ежедневно)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Строк в одном DELETE')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            # Короткие DELETE по индексу expires_at не держат долгих блокировок
+            batch = RevokedToken.objects.filter(expires_at__lte=now).order_by('expires_at').values('id')[
+                :options['batch_size']
+            ]
+            count, _ = RevokedToken.objects.filter(id__in=batch).delete()
+            deleted += count
+            if count < options['batch_size']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'Удалено отозванных токенов: {deleted}'))
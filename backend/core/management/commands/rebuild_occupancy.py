@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from bookings.models import RoomOccupancy
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Неверный формат даты: {value}. Используйте YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Перестроение карт занятости комнат по таблице бронирований'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', type=parse_date, help='Начало периода (YYYY-MM-DD)')
+        parser.add_argument('--date-to', type=parse_date, help='Конец периода (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        count = RoomOccupancy.objects.rebuild(options['date_from'], options['date_to'])
+        self.stdout.write(self.style.SUCCESS(f'Карт занятости построено: {count}'))
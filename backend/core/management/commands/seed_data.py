@@ -0,0 +1,137 @@
+import random
+from datetime import date, timedelta, time as dt_time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from users.models import User
+from bookings.cache import bump_rooms
+from bookings.models import Room, Booking, RoomOccupancy, BOOKING_HORIZON_DAYS
+
+
+FIRST_NAMES = ['Александр', 'Мария', 'Дмитрий', 'Анна', 'Сергей', 'Елена', 'Иван', 'Ольга', 'Павел', 'Татьяна']
+LAST_NAMES = ['Иванов', 'Смирнова', 'Кузнецов', 'Попова', 'Соколов', 'Лебедева', 'Козлов', 'Новикова']
+PATRONYMICS = ['Андреевич', 'Игоревна', 'Сергеевич', 'Викторовна', None]
+EQUIPMENT = ['Проектор', 'Маркерная доска', 'Видеоконференцсвязь', 'Wi-Fi', 'ТВ-панель', 'Флипчарт']
+PURPOSES = ['Планёрка', 'Встреча с клиентом', 'Собеседование', 'Обучение', 'Ретроспектива', None]
+
+# Популярность часов начала (утро и после обеда) и длительностей, минут
+START_HOUR_WEIGHTS = {9: 2, 10: 5, 11: 5, 12: 3, 13: 2, 14: 5, 15: 5, 16: 4, 17: 3, 18: 2, 19: 1, 20: 1}
+DURATION_WEIGHTS = {30: 3, 60: 5, 90: 2, 120: 2, 180: 1}
+# Загрузка по дням недели относительно будней
+WEEKDAY_FACTORS = [1.0, 1.0, 1.0, 1.0, 0.8, 0.15, 0.05]
+
+END_OF_DAY = 23 * 60
+
+
+class Command(BaseCommand):
+    help = 'Заполнение БД тестовыми пользователями, комнатами и бронированиями (для нагрузочных тестов)'
+
+    USERNAME_PREFIX = 'seed_user_'
+    ROOM_PREFIX = 'Seed '
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Число пользователей')
+        parser.add_argument('--rooms', type=int, default=30, help='Число комнат')
+        parser.add_argument('--floors', type=int, default=5, help='Число этажей')
+        parser.add_argument('--past-days', type=int, default=60, help='Дней истории до сегодня')
+        parser.add_argument('--days', type=int, default=BOOKING_HORIZON_DAYS, help='Дней вперёд от сегодня')
+        parser.add_argument('--per-room-day', type=float, default=4, help='Среднее число бронирований комнаты в будний день')
+        parser.add_argument('--cancelled', type=float, default=0.08, help='Доля отменённых бронирований')
+        parser.add_argument('--password', default='Seed12345!', help='Пароль всех пользователей')
+        parser.add_argument('--seed', type=int, default=None, help='Зерно генератора случайных чисел')
+        parser.add_argument('--clear', action='store_true', help='Удалить ранее созданные тестовые данные')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        seeded_users = User.objects.filter(username__startswith=self.USERNAME_PREFIX)
+        seeded_rooms = Room.objects.filter(name__startswith=self.ROOM_PREFIX)
+
+        if options['clear']:
+            # Бронирования удаляются каскадно вместе с комнатами и пользователями
+            rooms_deleted = seeded_rooms.delete()[1].get('bookings.Room', 0)
+            users_deleted = seeded_users.delete()[1].get('users.User', 0)
+            bump_rooms()
+            self.stdout.write(f'Удалено: пользователей {users_deleted}, комнат {rooms_deleted}')
+        elif seeded_users.exists() or seeded_rooms.exists():
+            raise CommandError('Тестовые данные уже есть; для пересоздания укажите --clear')
+
+        today = date.today()
+        date_from = today - timedelta(days=options['past_days'])
+        date_to = today + timedelta(days=min(options['days'], BOOKING_HORIZON_DAYS))
+
+        with transaction.atomic():
+            users = User.objects.bulk_create(self.make_users(rng, options), batch_size=1000)
+            rooms = Room.objects.bulk_create(self.make_rooms(rng, options), batch_size=1000)
+            bookings = Booking.objects.bulk_create(
+                self.make_bookings(rng, users, rooms, date_from, date_to, options),
+                batch_size=2000
+            )
+            RoomOccupancy.objects.rebuild(date_from, date_to)
+            bump_rooms()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(users)}, комнат {len(rooms)}, бронирований {len(bookings)} '
+            f'({date_from} — {date_to}); пароль пользователей {self.USERNAME_PREFIX}N: {options["password"]}'
+        ))
+
+    def make_users(self, rng, options):
+        # Хеширование пароля — самая дорогая часть; хеш один на всех
+        password = make_password(options['password'])
+        return [
+            User(
+                username=f'{self.USERNAME_PREFIX}{index}',
+                email=f'{self.USERNAME_PREFIX}{index}@example.com',
+                password=password,
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                patronymic=rng.choice(PATRONYMICS),
+            )
+            for index in range(options['users'])
+        ]
+
+    def make_rooms(self, rng, options):
+        floors = max(options['floors'], 1)
+        return [
+            Room(
+                name=f'{self.ROOM_PREFIX}{index % floors + 1}-{index // floors + 1:02d}',
+                capacity=rng.choice([2, 4, 6, 8, 10, 12, 20, 40]),
+                floor=index % floors + 1,
+                equipment=rng.sample(EQUIPMENT, rng.randint(0, len(EQUIPMENT))),
+                description=rng.choice(['Переговорная', 'Переговорная с окнами', None]),
+            )
+            for index in range(options['rooms'])
+        ]
+
+    def make_bookings(self, rng, users, rooms, date_from, date_to, options):
+        hours = list(START_HOUR_WEIGHTS)
+        hour_weights = list(START_HOUR_WEIGHTS.values())
+        durations = list(DURATION_WEIGHTS)
+        duration_weights = list(DURATION_WEIGHTS.values())
+        now = timezone.now()
+
+        for offset in range((date_to - date_from).days + 1):
+            booking_date = date_from + timedelta(days=offset)
+            mean = options['per_room_day'] * WEEKDAY_FACTORS[booking_date.weekday()]
+            for room in rooms:
+                busy = []
+                # Число бронирований колеблется вокруг среднего
+                for _ in range(round(rng.uniform(0, 2 * mean))):
+                    start = rng.choices(hours, hour_weights)[0] * 60 + rng.choice([0, 15, 30, 45])
+                    end = min(start + rng.choices(durations, duration_weights)[0], END_OF_DAY)
+                    if end <= start or any(start < other_end and end > other_start for other_start, other_end in busy):
+                        continue
+                    busy.append((start, end))
+
+                    cancelled = rng.random() < options['cancelled']
+                    yield Booking(
+                        room=room,
+                        user=rng.choice(users),
+                        booking_date=booking_date,
+                        start_time=dt_time(start // 60, start % 60),
+                        end_time=dt_time(end // 60, end % 60),
+                        purpose=rng.choice(PURPOSES),
+                        status='cancelled' if cancelled else 'active',
+                        cancelled_at=now if cancelled else None,
+                    )
@@ -0,0 +1,92 @@
+"""Метрики Prometheus: задержки запросов по представлениям, SQL-запросы и бизнес-счётчики.
+
+Под gunicorn с несколькими воркерами значения каждого процесса пишутся
+в файлы каталога PROMETHEUS_MULTIPROC_DIR (переменная окружения задаётся
+до запуска), а /metrics собирает их MultiProcessCollector'ом — счётчики
+и гистограммы суммируются по всем воркерам. Файлы завершившихся воркеров
+убирает хук child_exit в gunicorn.conf.py. Без переменной метрики
+собираются в памяти процесса (runserver, один воркер).
+"""
+import os
+
+from django.db import transaction
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+
+
+REQUEST_LATENCY = Histogram(
+    'slotme_http_request_duration_seconds', 'Время обработки HTTP-запроса',
+    ['view', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+REQUEST_QUERIES = Histogram(
+    'slotme_http_request_db_queries', 'Число SQL-запросов на HTTP-запрос',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+REQUEST_DB_TIME = Histogram(
+    'slotme_http_request_db_duration_seconds', 'Суммарное время SQL-запросов HTTP-запроса',
+    ['view'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+
+BOOKINGS_CREATED = Counter('slotme_bookings_created', 'Созданные бронирования')
+BOOKING_CONFLICTS = Counter(
+    'slotme_booking_conflicts', 'Бронирования, отклонённые из-за пересечения по времени',
+    # clean — проверка Booking.clean, constraint — ограничение БД при гонке,
+    # bulk — пакетное создание, series — пропущенные даты серии
+    ['source']
+)
+BOOKING_CANCELLATIONS = Counter(
+    'slotme_booking_cancellations', 'Отменённые бронирования',
+    # owner — владелец, admin — администратор, token — по ссылке из письма
+    ['path']
+)
+LOGIN_FAILURES = Counter('slotme_login_failures', 'Неудачные попытки входа')
+
+
+def view_label(request):
+    """Класс представления и действие ViewSet: BookingViewSet.create, ScheduleView"""
+    match = request.resolver_match
+    if match is None:
+        # Метка не должна зависеть от пути: иначе 404 на случайные адреса плодят ряды
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+    if view_class is None:
+        return match.view_name
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower())
+    return f'{view_class.__name__}.{action}' if action else view_class.__name__
+
+
+def observe_request(request, status_code, duration, queries, db_duration):
+    view = view_label(request)
+    REQUEST_LATENCY.labels(view, request.method, f'{status_code // 100}xx').observe(duration)
+    REQUEST_QUERIES.labels(view).observe(queries)
+    REQUEST_DB_TIME.labels(view).observe(db_duration)
+
+
+def record_created(count, using=None):
+    """Учесть созданные бронирования после фиксации транзакции"""
+    transaction.on_commit(lambda: BOOKINGS_CREATED.inc(count), using=using)
+
+
+def record_conflict(source, count=1):
+    if count:
+        BOOKING_CONFLICTS.labels(source).inc(count)
+
+
+def record_cancelled(path, count=1):
+    if count:
+        BOOKING_CANCELLATIONS.labels(path).inc(count)
+
+
+def render():
+    """(тело, Content-Type) для ответа /metrics"""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
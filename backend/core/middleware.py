@@ -0,0 +1,246 @@
+"""Замер запросов: число SQL-запросов, время БД, представления и рендеринга.
+
+Каждый запрос попадает в гистограммы Prometheus (core.metrics). Для
+выбранной доли запросов (REQUEST_METRICS_SAMPLE_RATE) результат также
+отдаётся заголовком Server-Timing и пишется структурированной строкой
+в лог core.request_metrics; запросы, превысившие бюджет числа
+SQL-запросов своего представления, логируются как предупреждения.
+
+Счётчик текущего запроса хранится в contextvar, а обёртка выполнения SQL
+ставится на каждое соединение один раз при его открытии: так учитываются
+и запросы из потоков sync_to_async под ASGI (работает и без DEBUG).
+"""
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import db_router, metrics, profiling
+
+
+logger = logging.getLogger('core.request_metrics')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class QueryCounter:
+    """Число SQL-запросов, их суммарное время и повторы"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    @property
+    def repeated(self):
+        """Сколько запросов повторяют уже выполненный SQL (признак N+1)"""
+        return self.count - len(self.statements)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Обёртка выполнения SQL: учитывает запрос в счётчике текущего HTTP-запроса"""
+    counter = _current.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        counter.duration += time.perf_counter() - started
+        counter.count += 1
+        counter.statements[sql] += 1
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+connection_created.connect(install_query_counter)
+
+
+class RequestMetricsMiddleware:
+    """Метрики Prometheus, Server-Timing и лог с числом SQL-запросов и временем этапов запроса"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Соединения, открытые до загрузки middleware (например, при миграциях)
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(None, connection)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            # Синхронные хуки Django под ASGI вызывал бы через sync_to_async
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        counter = QueryCounter()
+        request._metrics = {}
+        token = _current.set(counter)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.report(request, response, counter, started)
+        return response
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        request._metrics = {}
+        token = _current.set(counter)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.report(request, response, counter, started)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics['view_started'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Вызывается до рендеринга ответа DRF: граница представления и сериализации в JSON
+        request._metrics['view_finished'] = time.perf_counter()
+        return response
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        RequestMetricsMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
+
+    async def aprocess_template_response(self, request, response):
+        return RequestMetricsMiddleware.process_template_response(self, request, response)
+
+    def report(self, request, response, counter, started):
+        finished = time.perf_counter()
+        marks = request._metrics
+        view_started = marks.get('view_started', started)
+        view_finished = marks.get('view_finished', finished)
+        timings = {
+            'db': counter.duration,
+            'view': view_finished - view_started,
+            'render': finished - view_finished,
+            'total': finished - started,
+        }
+
+        metrics.observe_request(
+            request, response.status_code, timings['total'], counter.count, counter.duration
+        )
+
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        budget = settings.REQUEST_QUERY_BUDGETS.get(
+            f'{request.method} {view_name}',
+            settings.REQUEST_QUERY_BUDGETS.get(view_name, settings.REQUEST_QUERY_BUDGET)
+        )
+        # Превышение бюджета логируется всегда, выборка — только для остальных запросов
+        over_budget = counter.count > budget
+        sampled = random.random() < settings.REQUEST_METRICS_SAMPLE_RATE
+        if not (over_budget or sampled):
+            return
+
+        if sampled and settings.REQUEST_METRICS_HEADER:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timings["db"] * 1000:.1f};desc="SQL {counter.count}"',
+                f'view;dur={timings["view"] * 1000:.1f}',
+                f'render;dur={timings["render"] * 1000:.1f}',
+                f'total;dur={timings["total"] * 1000:.1f}',
+            ])
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': counter.count,
+            'repeated_queries': counter.repeated,
+            'query_budget': budget,
+            **{f'{name}_ms': round(value * 1000, 2) for name, value in timings.items()},
+        }
+        if over_budget:
+            record['most_repeated'] = counter.statements.most_common(1)[0][0][:500]
+            logger.warning('Превышен бюджет SQL-запросов: %s', json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info('%s', json.dumps(record, ensure_ascii=False))
+
+
+class RequestProfilerMiddleware:
+    """Профилирование запроса с токеном администратора (см. core.profiling)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        user = profiling.profiling_user(request)
+        if not user:
+            return self.get_response(request)
+        return profiling.profile_request(request, self.get_response, user)
+
+    async def __acall__(self, request):
+        if not profiling.requested_token(request):
+            return await self.get_response(request)
+        user = await sync_to_async(profiling.profiling_user)(request)
+        if not user:
+            return await self.get_response(request)
+        # Профилировщик следит за одним потоком: запрос выполняется из
+        # отдельного потока через async_to_sync, и синхронный код
+        # представления (sync_to_async) возвращается в этот же поток
+        return await sync_to_async(profiling.profile_request, thread_sensitive=False)(
+            request, async_to_sync(self.get_response), user
+        )
+
+
+class ReplicaRoutingMiddleware:
+    """Чтения безопасных запросов — с реплик БД (см. core.db_router)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = db_router.start_request(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            state = db_router.end_request(token)
+        if db_router.needs_pin(state, response):
+            db_router.pin_user(request)
+        return response
+
+    async def __acall__(self, request):
+        token = db_router.start_request(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            state = db_router.end_request(token)
+        if db_router.needs_pin(state, response):
+            await sync_to_async(db_router.pin_user)(request)
+        return response
@@ -0,0 +1,184 @@
+"""Профилирование отдельных запросов по запросу администратора.
+
+Запрос профилируется, если в заголовке X-Profile передан подписанный
+токен администратора и запрос сделан им же (access-токен в Authorization
+принадлежит тому же пользователю). Токен выдаёт команда
+`profiles --token <username>`, срок действия — PROFILING_TOKEN_MAX_AGE.
+Запрос выполняется под cProfile, все его SQL-запросы записываются, а для
+самых долгих SELECT после ответа выполняется EXPLAIN. В PROFILING_DIR
+сохраняются два файла с общим id: <id>.prof (pstats) и <id>.json
+(запрос, SQL-запросы и планы).
+"""
+import cProfile
+import json
+import os
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core import signing
+from django.db import DatabaseError, connections
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from users.authentication import ClaimsJWTAuthentication
+from users.models import User
+
+from . import metrics
+
+
+TOKEN_SALT = 'core.profiling'
+
+
+def make_token(user):
+    return signing.dumps(user.id, salt=TOKEN_SALT)
+
+
+def token_user(token):
+    """Администратор, которому выдан токен, или None"""
+    try:
+        user_id = signing.loads(token, salt=TOKEN_SALT, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    user = User.objects.filter(id=user_id, is_active=True).first()
+    return user if user is not None and user.is_admin else None
+
+
+def requested_token(request):
+    return request.headers.get('X-Profile')
+
+
+def requester_id(request):
+    """id пользователя по access-токену запроса или None"""
+    try:
+        result = ClaimsJWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return result[0].id if result else None
+
+
+def profiling_user(request):
+    """Администратор, запрос которого профилируется, или None.
+
+    Токен профилирования принимается только от того, кому он выдан:
+    перехваченный токен без access-токена администратора бесполезен.
+    """
+    token = requested_token(request)
+    user = token and token_user(token)
+    if not user or requester_id(request) != user.id:
+        return None
+    return user
+
+
+class QueryRecorder:
+    """Обёртка выполнения SQL: текст, параметры и время каждого запроса"""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': self.alias,
+                'sql': sql,
+                'params': None if many else params,
+                'many': many,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+            })
+
+
+def profile_request(request, get_response, user):
+    """Выполнить запрос под профилировщиком и сохранить результат"""
+    profiler = cProfile.Profile()
+    recorders = [QueryRecorder(alias) for alias in connections]
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for recorder in recorders:
+            stack.enter_context(connections[recorder.alias].execute_wrapper(recorder))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    duration = time.perf_counter() - started
+
+    queries = [query for recorder in recorders for query in recorder.queries]
+    profile_id = f'{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}'
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    profiler.dump_stats(os.path.join(settings.PROFILING_DIR, f'{profile_id}.prof'))
+
+    record = {
+        'id': profile_id,
+        'created_at': timezone.now().isoformat(),
+        'user': user.username,
+        'method': request.method,
+        'path': request.path,
+        'query': dict(request.GET.items()),
+        'view': metrics.view_label(request),
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 3),
+        'db_ms': round(sum(query['duration_ms'] for query in queries), 3),
+        'queries': [{**query, 'params': _jsonable(query['params'])} for query in queries],
+        'explains': explain(queries),
+    }
+    with open(os.path.join(settings.PROFILING_DIR, f'{profile_id}.json'), 'w', encoding='utf-8') as file:
+        json.dump(record, file, ensure_ascii=False, indent=2, default=str)
+
+    response['X-Profile-Id'] = profile_id
+    return response
+
+
+def explain(queries):
+    """Планы самых долгих SELECT (по суммарному времени одинакового SQL)"""
+    grouped = {}
+    for query in queries:
+        if query['many'] or not query['sql'].lstrip().upper().startswith('SELECT'):
+            continue
+        key = (query['alias'], query['sql'])
+        entry = grouped.setdefault(key, {'count': 0, 'total_ms': 0.0, 'params': query['params']})
+        entry['count'] += 1
+        entry['total_ms'] += query['duration_ms']
+
+    slowest = sorted(grouped.items(), key=lambda item: -item[1]['total_ms'])
+    explains = []
+    for (alias, sql), entry in slowest[:settings.PROFILING_EXPLAIN_LIMIT]:
+        # Только EXPLAIN без ANALYZE: запрос не выполняется повторно
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(f'EXPLAIN {sql}', entry['params'])
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+        except DatabaseError as exc:
+            plan = f'Ошибка EXPLAIN: {exc}'
+        explains.append({
+            'alias': alias,
+            'sql': sql,
+            'count': entry['count'],
+            'total_ms': round(entry['total_ms'], 3),
+            'plan': plan,
+        })
+    return explains
+
+
+def _jsonable(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: str(value) for key, value in params.items()}
+    return [str(value) for value in params]
+
+
+def load_profiles(directory):
+    """Сохранённые профили, новые первыми"""
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if name.endswith('.json'):
+            with open(os.path.join(directory, name), encoding='utf-8') as file:
+                profiles.append(json.load(file))
+    return profiles
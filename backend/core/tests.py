@@ -0,0 +1,104 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from bookings.models import Booking, Room
+from users.models import User
+from . import db_router
+from .checks import check_asgi_conn_max_age
+from .middleware import ReplicaRoutingMiddleware
+
+
+class AsgiConnMaxAgeCheckTests(SimpleTestCase):
+    def check(self, conn_max_age):
+        with mock.patch.dict(settings.DATABASES['default'], CONN_MAX_AGE=conn_max_age):
+            return [error.id for error in check_asgi_conn_max_age(None)]
+
+    @override_settings(ASGI=True)
+    def test_persistent_connections_rejected_under_asgi(self):
+        self.assertEqual(self.check(60), ['core.E002'])
+        self.assertEqual(self.check(None), ['core.E002'])
+        self.assertEqual(self.check(0), [])
+
+    @override_settings(ASGI=False)
+    def test_sync_workers_keep_connections(self):
+        self.assertEqual(self.check(60), [])
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'], REPLICA_PIN_SECONDS=10)
+class ReplicaRoutingTests(SimpleTestCase):
+    """Маршрутизатор только выбирает псевдоним БД: соединения не открываются"""
+
+    def setUp(self):
+        self.user = User(pk=1, username='ivanov')
+        cache.delete(db_router._pin_key(self.user.pk))
+
+    def request(self, method, view, status=200, user=True, is_async=False):
+        """Пройти ReplicaRoutingMiddleware; view(request) выполняется внутри запроса"""
+        request = RequestFactory().generic(method, '/api/bookings/')
+        if user:
+            request.user = self.user
+
+        def get_response(request):
+            view(request)
+            return HttpResponse(status=status)
+
+        if is_async:
+            async def aget_response(request):
+                return get_response(request)
+            return async_to_sync(ReplicaRoutingMiddleware(aget_response))(request)
+        return ReplicaRoutingMiddleware(get_response)(request)
+
+    def read_aliases(self, method='GET', **kwargs):
+        aliases = []
+        self.request(method, lambda request: aliases.extend(
+            router.db_for_read(model) for model in (Room, Booking)
+        ), **kwargs)
+        return aliases
+
+    def write(self, request):
+        router.db_for_write(Booking)
+
+    def test_safe_request_reads_from_one_replica(self):
+        self.assertEqual(self.read_aliases(), ['replica_0', 'replica_0'])
+
+    def test_primary_reads(self):
+        # До аутентификации, в изменяющем запросе и вне HTTP-запроса
+        self.assertEqual(self.read_aliases(user=False), ['default', 'default'])
+        self.assertEqual(self.read_aliases('POST'), ['default', 'default'])
+        self.assertEqual(router.db_for_read(Room), 'default')
+
+        aliases = []
+
+        def write_then_read(request):
+            self.write(request)
+            aliases.append(router.db_for_read(Room))
+        self.request('GET', write_then_read)
+        self.assertEqual(aliases, ['default'])
+
+    def test_pin_after_successful_write(self):
+        self.request('POST', self.write, status=201)
+        self.assertEqual(self.read_aliases(), ['default', 'default'])
+
+    def test_pin_after_successful_write_async(self):
+        self.request('POST', self.write, status=201, is_async=True)
+        self.assertEqual(self.read_aliases(is_async=True), ['default', 'default'])
+
+    def test_no_pin_after_failed_request(self):
+        self.request('POST', self.write, status=400)
+        self.request('DELETE', self.write, status=500, is_async=True)
+        self.assertEqual(self.read_aliases(), ['replica_0', 'replica_0'])
+
+    def test_no_pin_without_write(self):
+        self.request('POST', lambda request: None, status=200)
+        self.assertEqual(self.read_aliases(), ['replica_0', 'replica_0'])
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_disabled(self):
+        self.request('POST', self.write, status=201)
+        self.assertEqual(self.read_aliases(), ['replica_0', 'replica_0'])
@@ -0,0 +1,26 @@
+import secrets
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views import View
+
+from . import metrics
+
+
+class MetricsView(View):
+    """Метрики в текстовом формате Prometheus.
+
+    Нужен заголовок Authorization: Bearer <METRICS_TOKEN>. Без токена в
+    настройках метрики отдаются только при DEBUG, иначе адрес отвечает 404.
+    """
+
+    def get(self, request):
+        if not settings.METRICS_TOKEN:
+            if not settings.DEBUG:
+                raise Http404
+        elif not secrets.compare_digest(
+            request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}'
+        ):
+            return HttpResponse('Неверный токен метрик', status=401, content_type='text/plain; charset=utf-8')
+        body, content_type = metrics.render()
+        return HttpResponse(body, content_type=content_type)
@@ -0,0 +1,22 @@
+"""Настройки gunicorn: очистка файлов метрик Prometheus между запусками и воркерами.
+
+Каталог задаётся переменной окружения PROMETHEUS_MULTIPROC_DIR
+(см. core/metrics.py); без неё хуки ничего не делают.
+"""
+import glob
+import os
+
+
+def on_starting(server):
+    # Значения прошлого запуска иначе продолжили бы накапливаться
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
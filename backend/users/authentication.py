@@ -0,0 +1,211 @@
+"""JWT-аутентификация без запроса к таблице users.
+
+Токены несут claims username, full_name, role, is_admin и ver — версию
+токенов пользователя (User.token_version). Версия растёт при смене роли
+или пароля и при деактивации, после чего выданные раньше токены не
+принимаются.
+
+ClaimsJWTAuthentication собирает request.user из claims (ClaimsUser).
+Для проверки отзыва нужна только текущая версия и is_active: они хранятся
+в локальном кэше процесса с TTL и ограничением размера, и запрос к БД
+выполняется при промахе — не чаще раза в AUTH_USER_CACHE_TTL секунд на
+пользователя. В процессе, где пользователь изменён, запись сбрасывается
+сразу, в остальных процессах изменение вступает в силу не позже чем
+через AUTH_USER_CACHE_TTL. Обновление токена проверяет версию так же, а
+отозванные refresh-токены (выход из системы) отсекает users.revocation.
+Claims копируются из refresh-токена, поэтому full_name обновляется при
+следующем входе.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import revocation
+from .models import ClaimsUser, User
+
+
+VERSION_CLAIM = 'ver'
+
+
+def add_claims(token, user):
+    token['username'] = user.username
+    token['full_name'] = user.full_name
+    token['role'] = user.role
+    token['is_admin'] = user.is_admin
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh-токен с claims пользователя; access_token копирует их"""
+
+    @classmethod
+    def for_user(cls, user):
+        return add_claims(super().for_user(user), user)
+
+
+class TokenVersionCache:
+    """(token_version, is_active) по id пользователя: LRU с TTL, потокобезопасный"""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[2] <= now:
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return entry[0], entry[1]
+
+    def set(self, user_id, version, is_active):
+        expires = time.monotonic() + settings.AUTH_USER_CACHE_TTL
+        with self.lock:
+            self.entries[user_id] = (version, is_active, expires)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > settings.AUTH_USER_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_versions = TokenVersionCache()
+
+
+def _cached_state(user_id, version):
+    """(версия, is_active) из кэша или None, если нужен запрос к БД"""
+    state = token_versions.get(user_id)
+    if state is None or state[0] < version:
+        # Промах или токен новее записи: изменение сделано в другом процессе
+        return None
+    return state
+
+
+def _state_query(user_id):
+    return User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id).values_list('token_version', 'is_active')
+
+
+def _store_state(user_id, state):
+    if state is None:
+        token_versions.discard(user_id)
+    else:
+        token_versions.set(user_id, *state)
+    return state
+
+
+def token_state(user_id, version):
+    """(текущая версия, is_active) пользователя или None, если его нет"""
+    state = _cached_state(user_id, version)
+    if state is None:
+        state = _store_state(user_id, _state_query(user_id).first())
+    return state
+
+
+async def atoken_state(user_id, version):
+    """token_state() для асинхронных представлений"""
+    state = _cached_state(user_id, version)
+    if state is None:
+        state = _store_state(user_id, await _state_query(user_id).afirst())
+    return state
+
+
+def _check_state(state, version):
+    if state is None:
+        raise AuthenticationFailed('Пользователь не найден', code='user_not_found')
+    current_version, is_active = state
+    if not is_active:
+        raise AuthenticationFailed('Учётная запись деактивирована', code='user_inactive')
+    if version != current_version:
+        raise AuthenticationFailed('Токен отозван, войдите снова', code='token_revoked')
+
+
+def check_token_state(user_id, version):
+    _check_state(token_state(user_id, version), version)
+
+
+async def acheck_token_state(user_id, version):
+    _check_state(await atoken_state(user_id, version), version)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """Пользователь из claims access-токена; к БД — только при промахе кэша версий"""
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            # Токен выдан до появления claims: пользователь из БД, как раньше
+            return super().get_user(validated_token)
+        user_id = self.get_user_id(validated_token)
+        check_token_state(user_id, validated_token[VERSION_CLAIM])
+        return ClaimsUser.from_claims(user_id, validated_token)
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Токен не содержит идентификатора пользователя')
+
+    async def aauthenticate(self, request):
+        """authenticate() для асинхронных представлений: (пользователь, токен) или None"""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if VERSION_CLAIM not in validated_token:
+            return await sync_to_async(super().get_user)(validated_token), validated_token
+        user_id = self.get_user_id(validated_token)
+        await acheck_token_state(user_id, validated_token[VERSION_CLAIM])
+        return ClaimsUser.from_claims(user_id, validated_token), validated_token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Обновление access-токена: проверки отзыва без запросов к БД в обычном случае"""
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if revocation.is_revoked(refresh):
+            raise AuthenticationFailed('Токен отозван, войдите снова', code='token_revoked')
+        user_id = refresh.get(api_settings.USER_ID_CLAIM)
+        if VERSION_CLAIM in refresh:
+            check_token_state(user_id, refresh[VERSION_CLAIM])
+        else:
+            # Токен выдан до появления claims: они берутся из БД. Версия 0 —
+            # после его выдачи права и пароль не менялись
+            user = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id, is_active=True, token_version=0).first()
+            if user is None:
+                raise AuthenticationFailed('Токен отозван, войдите снова', code='token_revoked')
+            add_claims(refresh, user)
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                revocation.revoke(refresh)
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
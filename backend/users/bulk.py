@@ -0,0 +1,170 @@
+"""Массовая регистрация пользователей (набор группы, новый отдел).
+
+Пакет проверяется вместе: занятость username и email — одним запросом по
+всем значениям пакета, повторы внутри пакета — в памяти. Команда
+import_users хеширует пароли параллельно в пуле процессов: PBKDF2 занимает
+процессор на сотни миллисекунд на пароль, и в одном процессе импорт
+тысячи пользователей длился бы минуты. API принимает не больше
+USER_IMPORT_MAX_ITEMS записей и хеширует в процессе воркера, без пула.
+Пользователи создаются одним bulk_create.
+
+Порождённые процессы ('spawn') только хешируют пароли: им нужны настройки
+(DJANGO_SETTINGS_MODULE из окружения), но не приложения и не соединения
+с БД родителя.
+"""
+import csv
+import io
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from .models import User
+
+
+# Меньше стольких паролей пул процессов не окупает свой запуск
+POOL_MIN_PASSWORDS = 8
+
+
+class UserImportItemSerializer(serializers.Serializer):
+    """Пользователь из файла импорта; уникальность проверяет import_users() для всего пакета"""
+    username = serializers.CharField(max_length=50)
+    email = serializers.EmailField(max_length=100)
+    password = serializers.CharField(min_length=6, required=False, allow_blank=True)
+    first_name = serializers.CharField(max_length=100)
+    last_name = serializers.CharField(max_length=100)
+    patronymic = serializers.CharField(max_length=100, required=False, allow_blank=True, allow_null=True)
+    group_name = serializers.CharField(max_length=50, required=False, allow_blank=True, allow_null=True)
+    phone_number = serializers.CharField(max_length=20, required=False, allow_blank=True, allow_null=True)
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, default='user')
+
+
+def parse_csv(text):
+    """Строки CSV с заголовком (разделитель — запятая, точка с запятой или табуляция)"""
+    text = text.lstrip('\ufeff')
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    return [
+        {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+        for row in csv.DictReader(io.StringIO(text), dialect=dialect)
+    ]
+
+
+def hash_passwords(passwords, workers=None):
+    """Хеши паролей в исходном порядке; при нескольких паролях — в пуле процессов"""
+    workers = workers or settings.USER_IMPORT_WORKERS or os.cpu_count() or 1
+    if workers == 1 or len(passwords) < POOL_MIN_PASSWORDS:
+        return [make_password(password) for password in passwords]
+    workers = min(workers, len(passwords))
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        # Несколько порций на процесс выравнивают нагрузку при разной скорости процессов
+        chunksize = math.ceil(len(passwords) / (workers * 4))
+        return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+def check_unique(users, errors):
+    """Дополнить errors занятыми username и email: один запрос к БД на пакет"""
+    candidates = [(index, user) for index, user in enumerate(users) if index not in errors]
+    taken_usernames = set()
+    taken_emails = set()
+    if candidates:
+        for username, email in User.objects.filter(
+            Q(username__in={user.username for _, user in candidates})
+            | Q(email__in={user.email for _, user in candidates})
+        ).values_list('username', 'email'):
+            taken_usernames.add(username)
+            taken_emails.add(email)
+
+    seen_usernames = {}
+    seen_emails = {}
+    for index, user in candidates:
+        user_errors = {}
+        if user.username in taken_usernames:
+            user_errors['username'] = 'Пользователь с таким username уже существует'
+        elif user.username in seen_usernames:
+            user_errors['username'] = f'Повторяет username записи №{seen_usernames[user.username]}'
+        if user.email in taken_emails:
+            user_errors['email'] = 'Пользователь с таким email уже существует'
+        elif user.email in seen_emails:
+            user_errors['email'] = f'Повторяет email записи №{seen_emails[user.email]}'
+
+        if user_errors:
+            errors[index] = user_errors
+        else:
+            seen_usernames[user.username] = index
+            seen_emails[user.email] = index
+    return errors
+
+
+def import_users(rows, partial=False, dry_run=False, group_name=None, workers=None):
+    """Создать пользователей по строкам файла импорта.
+
+    Возвращает (пользователи по индексам, {индекс: ошибки}); на месте
+    отклонённых — None. Без partial при любой ошибке ничего не создаётся,
+    с dry_run — только проверка. Занятость username или email параллельной
+    регистрацией между проверкой и вставкой — IntegrityError.
+    """
+    users = []
+    passwords = []
+    errors = {}
+    for index, row in enumerate(rows):
+        serializer = UserImportItemSerializer(data=row)
+        if not serializer.is_valid():
+            errors[index] = {field: messages[0] for field, messages in serializer.errors.items()}
+            users.append(None)
+            passwords.append(None)
+            continue
+        data = serializer.validated_data
+        passwords.append(data.pop('password', None) or None)
+        data['email'] = User.objects.normalize_email(data['email'])
+        data['group_name'] = data.get('group_name') or group_name
+        users.append(User(**data))
+
+    check_unique(users, errors)
+    if (errors and not partial) or dry_run:
+        return [None if index in errors else user for index, user in enumerate(users)], errors
+
+    accepted = [index for index in range(len(users)) if index not in errors]
+    with_password = [index for index in accepted if passwords[index] is not None]
+    hashes = hash_passwords([passwords[index] for index in with_password], workers)
+    for index, password in zip(with_password, hashes):
+        users[index].password = password
+    for index in set(accepted) - set(with_password):
+        # Без пароля вход невозможен до его сброса администратором
+        users[index].set_unusable_password()
+
+    with transaction.atomic():
+        User.objects.bulk_create([users[index] for index in accepted], batch_size=1000)
+    return [None if index in errors else user for index, user in enumerate(users)], errors
+
+
+def import_report(users, errors, dry_run=False):
+    """Ответ импорта в формате пакетных операций с бронированиями"""
+    results = []
+    for index, user in enumerate(users):
+        if index in errors:
+            results.append({'index': index, 'status': 'error', 'errors': errors[index]})
+        elif dry_run:
+            results.append({'index': index, 'status': 'valid', 'username': user.username})
+        elif user.pk is None:
+            # Режим atomic: запись без ошибок не создана из-за ошибок в других
+            results.append({'index': index, 'status': 'skipped', 'username': user.username})
+        else:
+            results.append({'index': index, 'status': 'created', 'id': user.pk, 'username': user.username})
+    created = sum(result['status'] == 'created' for result in results)
+    valid = len(users) - len(errors)
+    return {
+        'status': 'success' if not errors else 'partial' if created or (dry_run and valid) else 'error',
+        'dry_run': dry_run,
+        'created': created,
+        'failed': len(errors),
+        'results': results,
+    }
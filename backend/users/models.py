@@ -47,6 +47,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     role = models.CharField('Роль', max_length=20, choices=ROLE_CHOICES, default='user', db_index=True)
     is_active = models.BooleanField('Активен', default=True)
     is_staff = models.BooleanField('Персонал', default=False)
+    # Увеличивается при смене роли, пароля и деактивации: выданные раньше токены не принимаются
+    token_version = models.PositiveIntegerField('Версия токенов', default=0)
     created_at = models.DateTimeField('Создан', auto_now_add=True)
     updated_at = models.DateTimeField('Обновлён', auto_now=True)
     
@@ -61,18 +63,117 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name_plural = 'Пользователи'
         ordering = ['-created_at']
     
+    # Поля, от которых зависят права, записанные в токены
+    TOKEN_FIELDS = ('role', 'is_active', 'is_superuser')
+    # Поля, которые кэш расписания показывает в бронированиях (bookings.schedule)
+    SCHEDULE_FIELDS = ('username', 'last_name', 'first_name', 'patronymic')
+    
     def __str__(self):
         return self.username
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._token_state = instance.get_token_state()
+        instance._schedule_state = instance.get_loaded_values(cls.SCHEDULE_FIELDS)
+        return instance
+    
+    def get_loaded_values(self, fields):
+        """Загруженные значения полей (отложенные поля не входят)"""
+        return {field: self.__dict__[field] for field in fields if field in self.__dict__}
+    
+    def get_token_state(self):
+        """Загруженные значения TOKEN_FIELDS"""
+        return self.get_loaded_values(self.TOKEN_FIELDS)
+    
+    def has_changed(self, loaded):
+        return any(self.__dict__.get(field) != value for field, value in loaded.items())
+    
+    def save(self, *args, **kwargs):
+        """Сохранение со сменой версии токенов, если изменились права или пароль.
+        
+        Смена имени сбрасывает кэш расписания, где оно показано в бронированиях.
+        """
+        # _password задаёт set_password(); при обновлении хеша в check_password() он сброшен
+        changed = self._password is not None or self.has_changed(getattr(self, '_token_state', {}))
+        renamed = self.has_changed(getattr(self, '_schedule_state', {}))
+        if changed and not self._state.adding:
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        super().save(*args, **kwargs)
+        self._token_state = self.get_token_state()
+        self._schedule_state = self.get_loaded_values(self.SCHEDULE_FIELDS)
+        if changed:
+            from .authentication import token_versions
+            token_versions.discard(self.pk)
+        if renamed:
+            from bookings.cache import bump_rooms
+            bump_rooms()
+    
+    @staticmethod
+    def compose_full_name(last_name, first_name, patronymic=None):
+        """Полное имя из отдельных частей (для values()-выборок)"""
+        parts = [last_name, first_name]
+        if patronymic:
+            parts.append(patronymic)
+        return ' '.join(parts)
+    
     @property
     def full_name(self):
         """Полное имя пользователя"""
-        parts = [self.last_name, self.first_name]
-        if self.patronymic:
-            parts.append(self.patronymic)
-        return ' '.join(parts)
+        return self.compose_full_name(self.last_name, self.first_name, self.patronymic)
     
     @property
     def is_admin(self):
         """Является ли пользователь администратором"""
         return self.role == 'admin' or self.is_superuser
+
+
+class ClaimsUser(User):
+    """Пользователь, собранный из claims access-токена без запроса к БД.
+    
+    Заполнены id, username, роль и признак администратора, полное имя
+    берётся из claim full_name. Остальных полей нет, поэтому такой объект
+    не сохраняется: для изменения пользователя его нужно загрузить из БД.
+    """
+    
+    class Meta:
+        proxy = True
+        default_permissions = ()
+    
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        role = claims['role']
+        user = cls(
+            id=user_id, username=claims['username'], role=role,
+            # is_admin без роли admin бывает только у суперпользователя
+            is_superuser=claims['is_admin'] and role != 'admin',
+            is_active=True, token_version=claims['ver'],
+        )
+        user._state.adding = False
+        user.claimed_full_name = claims['full_name']
+        return user
+    
+    @property
+    def full_name(self):
+        return self.claimed_full_name
+    
+    def save(self, *args, **kwargs):
+        raise TypeError('Пользователь из токена не сохраняется: загрузите его из БД')
+
+
+class RevokedToken(models.Model):
+    """Отозванный refresh-токен; строка нужна только до истечения токена"""
+    jti = models.CharField('Идентификатор токена', max_length=255, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='revoked_tokens', verbose_name='Пользователь')
+    expires_at = models.DateTimeField('Истекает', db_index=True)
+    revoked_at = models.DateTimeField('Отозван', auto_now_add=True, db_index=True)
+    
+    class Meta:
+        db_table = 'revoked_tokens'
+        verbose_name = 'Отозванный токен'
+        verbose_name_plural = 'Отозванные токены'
+    
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,96 @@
+"""Отзыв refresh-токенов.
+
+В таблице revoked_tokens хранятся только отозванные токены (выход из
+системы, ротация) и только до истечения их срока: вход в систему ничего
+не пишет, а команда prune_revoked_tokens удаляет истёкшие строки
+пакетами. Поэтому таблица не растёт вместе с историей входов.
+
+Проверка при обновлении токена идёт по множеству jti в памяти процесса.
+Раз в REVOKED_TOKENS_REFRESH_INTERVAL секунд множество дополняется
+строками, отозванными после предыдущей загрузки, — запрос по индексу
+revoked_at, который обычно ничего не возвращает. Токен, отозванный в
+этом процессе, попадает в множество сразу, в других процессах — не позже
+чем через REVOKED_TOKENS_REFRESH_INTERVAL.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+
+# Повторно читаемый хвост: строка с revoked_at чуть раньше уже прочитанных
+# могла зафиксироваться позже них
+OVERLAP = timedelta(seconds=60)
+# Как часто из памяти удаляются истёкшие jti
+PURGE_INTERVAL = 60
+
+
+class RevocationFilter:
+    """Отозванные jti с истечением; дополняется из БД инкрементально"""
+
+    def __init__(self):
+        self.expires = {}
+        self.loaded_until = None
+        self.refreshed_at = None
+        self.purged_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        self.refresh()
+        return jti in self.expires
+
+    def add(self, jti, expires_at):
+        with self.lock:
+            self.expires[jti] = expires_at
+
+    def is_fresh(self, now):
+        return (self.refreshed_at is not None
+                and now - self.refreshed_at < settings.REVOKED_TOKENS_REFRESH_INTERVAL)
+
+    def refresh(self):
+        now = time.monotonic()
+        if self.is_fresh(now):
+            return
+        with self.lock:
+            # Другой поток мог обновить множество, пока этот ждал блокировку
+            if self.is_fresh(now):
+                return
+            # Из основной БД: реплика могла ещё не получить только что отозванные токены
+            rows = RevokedToken.objects.using(DEFAULT_DB_ALIAS).filter(expires_at__gt=timezone.now())
+            if self.loaded_until is not None:
+                rows = rows.filter(revoked_at__gte=self.loaded_until - OVERLAP)
+            for jti, expires_at, revoked_at in rows.values_list('jti', 'expires_at', 'revoked_at'):
+                self.expires[jti] = expires_at
+                if self.loaded_until is None or revoked_at > self.loaded_until:
+                    self.loaded_until = revoked_at
+            if self.loaded_until is None:
+                # Пустая таблица: следующая загрузка — с текущего момента
+                self.loaded_until = timezone.now()
+            if now - self.purged_at >= PURGE_INTERVAL:
+                current = timezone.now()
+                self.expires = {jti: expires for jti, expires in self.expires.items() if expires > current}
+                self.purged_at = now
+            self.refreshed_at = now
+
+
+revoked_tokens = RevocationFilter()
+
+
+def revoke(token):
+    """Отозвать refresh-токен до его истечения"""
+    expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+    RevokedToken.objects.bulk_create(
+        [RevokedToken(jti=token['jti'], user_id=token[api_settings.USER_ID_CLAIM], expires_at=expires_at)],
+        ignore_conflicts=True
+    )
+    revoked_tokens.add(token['jti'], expires_at)
+
+
+def is_revoked(token):
+    return revoked_tokens.is_revoked(token['jti'])
@@ -1,5 +1,8 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import authenticate
+from core import metrics
+from .bulk import parse_csv
 from .models import User
 
 
@@ -60,6 +63,7 @@ class LoginSerializer(serializers.Serializer):
         if username and password:
             user = authenticate(username=username, password=password)
             if not user:
+                metrics.LOGIN_FAILURES.inc()
                 raise serializers.ValidationError('Неверный логин или пароль')
             if not user.is_active:
                 raise serializers.ValidationError('Учётная запись деактивирована')
@@ -77,7 +81,7 @@ class ChangePasswordSerializer(serializers.Serializer):
     new_password_confirm = serializers.CharField(write_only=True, min_length=6, style={'input_type': 'password'})
     
     def validate_old_password(self, value):
-        user = self.context['request'].user
+        user = self.context['user']
         if not user.check_password(value):
             raise serializers.ValidationError('Неверный текущий пароль')
         return value
@@ -88,7 +92,45 @@ class ChangePasswordSerializer(serializers.Serializer):
         return data
     
     def save(self):
-        user = self.context['request'].user
+        user = self.context['user']
         user.set_password(self.validated_data['new_password'])
         user.save()
         return user
+
+
+IMPORT_MODE_CHOICES = [
+    ('atomic', 'Всё или ничего'),
+    ('partial', 'Частичное выполнение'),
+]
+
+
+class UserImportSerializer(serializers.Serializer):
+    """Импорт пользователей: список users (JSON) или CSV-файл file"""
+    users = serializers.ListField(
+        child=serializers.DictField(), required=False, allow_empty=False,
+        max_length=settings.USER_IMPORT_MAX_ITEMS,
+        error_messages={
+            'max_length': f'Не более {settings.USER_IMPORT_MAX_ITEMS} записей; больше — командой import_users'
+        }
+    )
+    file = serializers.FileField(required=False)
+    mode = serializers.ChoiceField(choices=IMPORT_MODE_CHOICES, default='atomic')
+    dry_run = serializers.BooleanField(default=False)
+    group_name = serializers.CharField(max_length=50, required=False, help_text='Группа для записей без group_name')
+    
+    def validate(self, data):
+        if ('users' in data) == ('file' in data):
+            raise serializers.ValidationError('Необходимо передать либо users, либо file')
+        if 'file' in data:
+            try:
+                text = data.pop('file').read().decode('utf-8')
+            except UnicodeDecodeError:
+                raise serializers.ValidationError({'file': 'Файл должен быть в кодировке UTF-8'})
+            data['users'] = parse_csv(text)
+            if not data['users']:
+                raise serializers.ValidationError({'file': 'В файле нет записей'})
+            if len(data['users']) > settings.USER_IMPORT_MAX_ITEMS:
+                raise serializers.ValidationError({
+                    'file': f'Не более {settings.USER_IMPORT_MAX_ITEMS} записей; больше — командой import_users'
+                })
+        return data
@@ -0,0 +1,298 @@
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import revocation
+from .authentication import ClaimsJWTAuthentication, ClaimsRefreshToken, token_versions
+from .bulk import parse_csv
+from .models import ClaimsUser, RevokedToken, User
+
+
+class UserImportTests(TestCase):
+    """Массовая регистрация через /api/admin/users/import/"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            'admin', 'admin@example.com', 'password', first_name='Анна', last_name='Админова', role='admin'
+        )
+        User.objects.create_user('petrov', 'petrov@example.com', 'password', first_name='Пётр', last_name='Петров')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def row(self, username, **fields):
+        return {
+            'username': username, 'email': f'{username}@example.com',
+            'first_name': 'Студент', 'last_name': username.capitalize(), **fields
+        }
+
+    def post(self, users, **params):
+        return self.client.post('/api/admin/users/import/', {'users': users, **params}, format='json')
+
+    def imported(self):
+        return set(User.objects.exclude(username__in=['admin', 'petrov']).values_list('username', flat=True))
+
+    def test_atomic_creates_nobody_on_error(self):
+        response = self.post([self.row('sidorov'), self.row('petrov'), self.row('sidorov', email='s2@example.com')])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['status'], 'error')
+        self.assertEqual([result['status'] for result in response.json()['results']], ['skipped', 'error', 'error'])
+        self.assertEqual(response.json()['results'][2]['errors'], {'username': 'Повторяет username записи №0'})
+        self.assertEqual(self.imported(), set())
+
+    def test_partial_creates_valid_rows(self):
+        response = self.post(
+            [self.row('sidorov', password='secret123'), self.row('petrov'), self.row('kozlov')],
+            mode='partial', group_name='ИВТ-21'
+        )
+        self.assertEqual(response.status_code, 201)
+        report = response.json()
+        self.assertEqual((report['status'], report['created'], report['failed']), ('partial', 2, 1))
+        self.assertEqual(self.imported(), {'sidorov', 'kozlov'})
+
+        sidorov = User.objects.get(username='sidorov')
+        self.assertTrue(sidorov.check_password('secret123'))
+        self.assertEqual(sidorov.group_name, 'ИВТ-21')
+        # Без пароля вход невозможен до сброса администратором
+        self.assertFalse(User.objects.get(username='kozlov').has_usable_password())
+
+    def test_dry_run_only_validates(self):
+        response = self.post([self.row('sidorov'), self.row('kozlov')], dry_run=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.json()['results']], ['valid', 'valid'])
+        self.assertEqual(self.imported(), set())
+
+        response = self.post([self.row('sidorov'), self.row('petrov')], dry_run=True, mode='partial')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['status'], 'partial')
+        self.assertEqual(self.imported(), set())
+
+    def test_csv_file(self):
+        content = (
+            '\ufeffusername;email;password;first_name;last_name;patronymic\n'
+            'sidorov;Sidorov@EXAMPLE.com;secret123;Сидор;Сидоров;\n'
+            'kozlov;kozlov@example.com;;Козьма;Козлов;Петрович\n'
+        ).encode()
+        response = self.client.post('/api/admin/users/import/', {
+            'file': SimpleUploadedFile('students.csv', content, content_type='text/csv'),
+            'group_name': 'ИВТ-21',
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201, response.json())
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(
+            set(User.objects.filter(group_name='ИВТ-21').values_list('username', 'email', 'patronymic')),
+            {('sidorov', 'Sidorov@example.com', None), ('kozlov', 'kozlov@example.com', 'Петрович')}
+        )
+
+    def test_parse_csv(self):
+        self.assertEqual(
+            parse_csv('username,email, first_name \nsidorov , sidorov@example.com,\n'),
+            [{'username': 'sidorov', 'email': 'sidorov@example.com'}]
+        )
+        self.assertEqual(
+            parse_csv('username\temail\nsidorov\tsidorov@example.com\n'),
+            [{'username': 'sidorov', 'email': 'sidorov@example.com'}]
+        )
+
+    @override_settings(USER_IMPORT_MAX_ITEMS=2)
+    def test_large_file_goes_to_command(self):
+        content = 'username,email\n' + ''.join(f'user{i},user{i}@example.com\n' for i in range(3))
+        response = self.client.post('/api/admin/users/import/', {
+            'file': SimpleUploadedFile('students.csv', content.encode(), content_type='text/csv'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('import_users', response.json()['file'][0])
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(User.objects.get(username='petrov'))
+        self.assertEqual(self.post([self.row('sidorov')]).status_code, 403)
+        self.assertEqual(self.imported(), set())
+
+
+class ClaimsAuthenticationTests(TestCase):
+    """Пользователь из claims access-токена и отзыв по token_version"""
+
+    def setUp(self):
+        token_versions.clear()
+        self.user = User.objects.create_user(
+            'ivanov', 'ivanov@example.com', 'password', first_name='Иван', last_name='Иванов'
+        )
+
+    def authenticate(self, token):
+        request = RequestFactory().get('/api/bookings/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def access(self, user=None):
+        return ClaimsRefreshToken.for_user(user or self.user).access_token
+
+    def assertRejected(self, token, message='Токен отозван, войдите снова'):
+        with self.assertRaisesMessage(AuthenticationFailed, message):
+            self.authenticate(token)
+
+    def test_user_from_claims(self):
+        token = self.access()
+        with self.assertNumQueries(1):
+            user = self.authenticate(token)
+        # Запись кэша версий есть: к таблице users запросов нет
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(
+            (user.pk, user.username, user.full_name, user.role), (self.user.pk, 'ivanov', 'Иванов Иван', 'user')
+        )
+        self.assertFalse(user.is_admin)
+
+    def test_version_bump_revokes_tokens(self):
+        for change in (
+            lambda user: user.set_password('new-password'),
+            lambda user: setattr(user, 'role', 'admin'),
+            lambda user: setattr(user, 'is_active', False),
+        ):
+            token = self.access()
+            self.authenticate(token)
+            user = User.objects.get(pk=self.user.pk)
+            change(user)
+            user.save()
+            # В этом процессе запись кэша сброшена сразу
+            self.assertRejected(
+                token, 'Учётная запись деактивирована' if not user.is_active else 'Токен отозван, войдите снова'
+            )
+            self.user = user
+        self.assertEqual(self.user.token_version, 3)
+
+    def test_rename_keeps_tokens(self):
+        token = self.access()
+        self.user.first_name = 'Иоанн'
+        self.user.save()
+        self.assertEqual(self.authenticate(token).full_name, 'Иванов Иван')
+
+    @override_settings(AUTH_USER_CACHE_TTL=60)
+    def test_change_in_other_process_after_ttl(self):
+        token = self.access()
+        self.authenticate(token)
+        # update() не вызывает save(): так выглядит изменение из другого процесса
+        User.objects.filter(pk=self.user.pk).update(token_version=1)
+        self.assertEqual(self.authenticate(token).pk, self.user.pk)
+
+        with mock.patch('users.authentication.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertRejected(token)
+
+    def test_newer_token_bypasses_cache(self):
+        self.authenticate(self.access())
+        User.objects.filter(pk=self.user.pk).update(token_version=1)
+        self.user.refresh_from_db()
+        # Токен новее записи кэша: версия перечитывается из БД
+        self.assertEqual(self.authenticate(self.access()).token_version, 1)
+
+    @override_settings(AUTH_USER_CACHE_SIZE=1)
+    def test_cache_size(self):
+        other = User.objects.create_user(
+            'petrov', 'petrov@example.com', 'password', first_name='Пётр', last_name='Петров'
+        )
+        token = self.access()
+        self.authenticate(token)
+        self.authenticate(self.access(other))
+        with self.assertNumQueries(1):
+            self.authenticate(token)
+
+    def test_deleted_user(self):
+        token = self.access()
+        self.user.delete()
+        self.assertRejected(token, 'Пользователь не найден')
+
+    def test_token_without_claims(self):
+        # Токен, выданный до появления claims: пользователь из БД
+        user = self.authenticate(AccessToken.for_user(self.user))
+        self.assertIsInstance(user, User)
+        self.assertNotIsInstance(user, ClaimsUser)
+        self.assertEqual(user.pk, self.user.pk)
+
+
+class TokenRevocationTests(TestCase):
+    """Отзыв refresh-токенов при выходе и ротации"""
+
+    def setUp(self):
+        token_versions.clear()
+        self.user = User.objects.create_user(
+            'ivanov', 'ivanov@example.com', 'password', first_name='Иван', last_name='Иванов'
+        )
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/api/auth/login/', {'username': 'ivanov', 'password': 'password'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def refresh(self, token):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': token}, format='json')
+
+    def test_logout_revokes_refresh_token(self):
+        tokens = self.login()
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 200)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        response = self.client.post('/api/auth/logout/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(RevokedToken.objects.filter(user=self.user).exists())
+
+        response = self.refresh(tokens['refresh'])
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['detail'], 'Токен отозван, войдите снова')
+        # Другие сеансы пользователя не затронуты
+        self.assertEqual(self.refresh(self.login()['refresh']).status_code, 200)
+
+    def test_logout_with_foreign_token(self):
+        other = User.objects.create_user(
+            'petrov', 'petrov@example.com', 'password', first_name='Пётр', last_name='Петров'
+        )
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        foreign = str(ClaimsRefreshToken.for_user(other))
+        self.assertEqual(self.client.post('/api/auth/logout/', {'refresh': foreign}, format='json').status_code, 400)
+        self.assertEqual(self.refresh(foreign).status_code, 200)
+        self.assertFalse(RevokedToken.objects.exists())
+
+    def test_rotation_revokes_old_token(self):
+        # api_settings импортирован в users.authentication и при override_settings не перечитывается
+        with mock.patch('users.authentication.api_settings.ROTATE_REFRESH_TOKENS', True):
+            old = self.login()['refresh']
+            response = self.refresh(old)
+            self.assertEqual(response.status_code, 200)
+            new = response.json()['refresh']
+            self.assertNotEqual(new, old)
+            self.assertEqual(self.refresh(old).status_code, 401)
+            self.assertEqual(self.refresh(new).status_code, 200)
+
+    @override_settings(REVOKED_TOKENS_REFRESH_INTERVAL=2)
+    def test_revocation_in_other_process(self):
+        token = ClaimsRefreshToken.for_user(self.user)
+        self.assertFalse(revocation.is_revoked(token))
+        # Строка без revoke(): так отзыв выглядит для процесса, который его не делал
+        RevokedToken.objects.create(
+            jti=token['jti'], user=self.user, expires_at=timezone.now() + timedelta(days=1)
+        )
+        self.assertFalse(revocation.is_revoked(token))
+        with mock.patch('users.revocation.time.monotonic', return_value=time.monotonic() + 3):
+            self.assertTrue(revocation.is_revoked(token))
+        # Новый процесс загружает все неистёкшие строки при первой проверке
+        fresh = revocation.RevocationFilter()
+        self.assertTrue(fresh.is_revoked(token['jti']))
+        self.assertFalse(fresh.is_revoked(str(ClaimsRefreshToken.for_user(self.user)['jti'])))
+
+    def test_prune_revoked_tokens(self):
+        now = timezone.now()
+        RevokedToken.objects.bulk_create([
+            RevokedToken(jti=f'expired-{i}', user=self.user, expires_at=now - timedelta(hours=i + 1)) for i in range(3)
+        ] + [RevokedToken(jti='active', user=self.user, expires_at=now + timedelta(days=1))])
+        out = StringIO()
+        call_command('prune_revoked_tokens', batch_size=2, stdout=out)
+        self.assertIn('Удалено отозванных токенов: 3', out.getvalue())
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['active'])
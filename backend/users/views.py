@@ -1,13 +1,22 @@
+from django.db import IntegrityError
 from rest_framework import status, generics, permissions
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
+from bookings.permissions import IsAdminUser
+from . import revocation
+from .authentication import ClaimsRefreshToken
+from .bulk import import_report, import_users
 from .models import User
 from .serializers import (
     RegisterSerializer, 
     LoginSerializer, 
     UserSerializer,
-    ChangePasswordSerializer
+    ChangePasswordSerializer,
+    UserImportSerializer
 )
 
 
@@ -38,7 +47,7 @@ class LoginView(APIView):
         serializer.is_valid(raise_exception=True)
         
         user = serializer.validated_data['user']
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         
         return Response({
             'status': 'success',
@@ -53,20 +62,23 @@ class LogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        try:
-            refresh_token = request.data.get('refresh')
-            if refresh_token:
+        refresh_token = request.data.get('refresh')
+        if refresh_token:
+            try:
                 token = RefreshToken(refresh_token)
-                token.blacklist()
-            return Response({
-                'status': 'success',
-                'message': 'Выход выполнен успешно'
-            })
-        except Exception:
-            return Response({
-                'status': 'success',
-                'message': 'Выход выполнен успешно'
-            })
+            except TokenError:
+                # Недействительный или истёкший токен отзывать не нужно
+                token = None
+            if token is not None:
+                if token.get(api_settings.USER_ID_CLAIM) != request.user.pk:
+                    return Response({
+                        'error': 'Refresh-токен выдан другому пользователю'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                revocation.revoke(token)
+        return Response({
+            'status': 'success',
+            'message': 'Выход выполнен успешно'
+        })
 
 
 class MeView(generics.RetrieveUpdateAPIView):
@@ -75,7 +87,8 @@ class MeView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     
     def get_object(self):
-        return self.request.user
+        # request.user собран из токена и содержит не все поля
+        return User.objects.get(pk=self.request.user.pk)
 
 
 class ChangePasswordView(APIView):
@@ -83,11 +96,55 @@ class ChangePasswordView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        serializer = ChangePasswordSerializer(data=request.data, context={'request': request})
+        user = User.objects.get(pk=request.user.pk)
+        serializer = ChangePasswordSerializer(data=request.data, context={'request': request, 'user': user})
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        user = serializer.save()
         
+        # Смена пароля отзывает все выданные токены, включая текущие
+        refresh = ClaimsRefreshToken.for_user(user)
         return Response({
             'status': 'success',
-            'message': 'Пароль успешно изменён'
+            'message': 'Пароль успешно изменён',
+            'access': str(refresh.access_token),
+            'refresh': str(refresh)
         })
+
+
+class UserImportView(APIView):
+    """Массовая регистрация пользователей (только для админов).
+    
+    JSON со списком users или CSV-файл file (multipart) с заголовком:
+    username, email, password, first_name, last_name, patronymic,
+    group_name, phone_number, role. mode=atomic (по умолчанию): при любой
+    ошибке никто не создаётся; mode=partial: создаются записи без ошибок.
+    dry_run=true — только проверка.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [JSONParser, MultiPartParser]
+    
+    def post(self, request):
+        serializer = UserImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        dry_run = data['dry_run']
+        
+        try:
+            # Пароли хешируются в процессе воркера, без пула: запуск процессов
+            # в каждом запросе отнимал бы ядра у остальных воркеров
+            users, errors = import_users(
+                data['users'], partial=data['mode'] == 'partial', dry_run=dry_run,
+                group_name=data.get('group_name'), workers=1
+            )
+        except IntegrityError:
+            # Параллельная регистрация заняла username или email после проверки
+            return Response({
+                'error': 'Часть username или email уже заняты другим запросом, повторите попытку'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        report = import_report(users, errors, dry_run=dry_run)
+        if dry_run:
+            response_status = status.HTTP_200_OK if not errors else status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(report, status=response_status)
@@ -66,18 +66,38 @@ export const authAPI = {
   logout: (refreshToken) => api.post('/auth/logout/', { refresh: refreshToken }),
   getMe: () => api.get('/auth/me/'),
   updateMe: (data) => api.patch('/auth/me/', data),
-  changePassword: (data) => api.post('/auth/change-password/', data),
+  // Смена пароля отзывает прежние токены, ответ содержит новые
+  changePassword: async (data) => {
+    const response = await api.post('/auth/change-password/', data);
+    localStorage.setItem('access_token', response.data.access);
+    localStorage.setItem('refresh_token', response.data.refresh);
+    return response;
+  },
 };
 
 // Schedule API
 export const scheduleAPI = {
   getSchedule: (date) => api.get('/schedule/', { params: { date } }),
+  getScheduleRange: (dateFrom, dateTo) =>
+    api.get('/schedule/', { params: { date_from: dateFrom, date_to: dateTo } }),
+  // URL потока событий. EventSource не передаёт заголовки, поэтому в URL —
+  // короткоживущий билет только для потока, а не access-токен
+  eventsUrl: async (dateFrom, dateTo) => {
+    const response = await api.post('/schedule/events/ticket/');
+    const params = new URLSearchParams({
+      date_from: dateFrom,
+      date_to: dateTo,
+      ticket: response.data.ticket,
+    });
+    return `${API_URL}/schedule/events/?${params}`;
+  },
 };
 
 // Rooms API
 export const roomsAPI = {
   list: (params) => api.get('/rooms/', { params }),
   get: (id) => api.get(`/rooms/${id}/`),
+  available: (params) => api.get('/rooms/available/', { params }),
   create: (data) => api.post('/rooms/', data),
   update: (id, data) => api.patch(`/rooms/${id}/`, data),
   delete: (id) => api.delete(`/rooms/${id}/`),
@@ -90,14 +110,47 @@ export const bookingsAPI = {
   create: (data) => api.post('/bookings/', data),
   delete: (id) => api.delete(`/bookings/${id}/`),
   my: (params) => api.get('/bookings/my/', { params }),
+  // Следующая страница списка по ссылке next из ответа (постраничная выдача по курсору)
+  next: (url) => api.get(url),
+  changes: (since, params) => api.get('/bookings/changes/', { params: { ...params, since } }),
   getByToken: (token) => api.get(`/cancel/${token}/`),
   cancelByToken: (token) => api.delete(`/cancel/${token}/`),
 };
 
+// Booking Series API
+export const seriesAPI = {
+  list: (params) => api.get('/series/', { params }),
+  get: (id) => api.get(`/series/${id}/`),
+  create: (data) => api.post('/series/', data),
+  delete: (id) => api.delete(`/series/${id}/`),
+};
+
 // Admin Bookings API
 export const adminBookingsAPI = {
   list: (params) => api.get('/admin/bookings/', { params }),
+  changes: (since, params) => api.get('/admin/bookings/changes/', { params: { ...params, since } }),
   delete: (id) => api.delete(`/admin/bookings/${id}/`),
+  bulkCreate: (bookings, mode = 'atomic') =>
+    api.post('/admin/bookings/bulk-create/', { bookings, mode }),
+  bulkCancel: (data) => api.post('/admin/bookings/bulk-cancel/', data),
+  // Выгрузка файлом: params.output — 'csv' или 'ndjson', фильтры как у list
+  export: (params) => api.get('/admin/bookings/export/', { params, responseType: 'blob' }),
+};
+
+// Admin Users API
+export const adminUsersAPI = {
+  // Список пользователей (mode: 'atomic' | 'partial', dryRun — только проверка)
+  import: (users, { mode = 'atomic', dryRun = false, groupName } = {}) =>
+    api.post('/admin/users/import/', { users, mode, dry_run: dryRun, group_name: groupName }),
+  // CSV-файл с заголовком username, email, password, first_name, last_name, ...
+  importFile: (file, { mode = 'atomic', dryRun = false, groupName } = {}) => {
+    const data = new FormData();
+    data.append('file', file);
+    data.append('mode', mode);
+    data.append('dry_run', dryRun);
+    if (groupName) data.append('group_name', groupName);
+    return api.post('/admin/users/import/', data);
+  },
 };
 
 export default api;
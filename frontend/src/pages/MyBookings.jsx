@@ -12,10 +12,14 @@ const MyBookings = () => {
 
   const loadBookings = async () => {
     try {
-      const response = await bookingsAPI.my({ future_only: true, status: 'active' });
-      // API может вернуть bookings напрямую, или results (пагинация), или массив
-      const data = response.data.bookings || response.data.results || response.data;
-      setBookings(Array.isArray(data) ? data : []);
+      // Будущих бронирований немного: загружаем все страницы по ссылкам next
+      let response = await bookingsAPI.my({ future_only: true, status: 'active', page_size: 200 });
+      const data = [...response.data.bookings];
+      while (response.data.next) {
+        response = await bookingsAPI.next(response.data.next);
+        data.push(...response.data.bookings);
+      }
+      setBookings(data);
     } catch (err) {
       console.error('Ошибка загрузки бронирований:', err);
       setBookings([]);
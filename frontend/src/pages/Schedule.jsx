@@ -59,20 +59,32 @@ const Schedule = () => {
     loadRooms();
   }, []);
 
+  // Получение расписания на набор дат
+  const fetchSchedule = async (dates) => {
+    const bookingsData = {};
+    if (dates.length === 1) {
+      const dateStr = formatDate(dates[0]);
+      const response = await scheduleAPI.getSchedule(dateStr);
+      bookingsData[dateStr] = response.data;
+    } else {
+      // Один запрос на весь диапазон вместо запроса на каждый день
+      const response = await scheduleAPI.getScheduleRange(
+        formatDate(dates[0]),
+        formatDate(dates[dates.length - 1])
+      );
+      response.data.days.forEach((dayData) => {
+        bookingsData[dayData.date] = dayData;
+      });
+    }
+    return bookingsData;
+  };
+
   // Загрузка расписания
   useEffect(() => {
     const loadSchedule = async () => {
       setLoading(true);
       try {
-        const bookingsData = {};
-        await Promise.all(
-          datesToLoad.map(async (day) => {
-            const dateStr = formatDate(day);
-            const response = await scheduleAPI.getSchedule(dateStr);
-            bookingsData[dateStr] = response.data;
-          })
-        );
-        setBookings(bookingsData);
+        setBookings(await fetchSchedule(datesToLoad));
       } catch (err) {
         setError('Ошибка загрузки расписания');
         console.error(err);
@@ -83,6 +95,71 @@ const Schedule = () => {
     loadSchedule();
   }, [datesToLoad]);
 
+  // Live-обновление: сервер присылает события об изменениях бронирований,
+  // и перезагружаются только затронутые даты
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined;
+
+    let source = null;
+    let closed = false;
+    let reconnectTimer = null;
+    let reloadTimer = null;
+    const changedDates = new Set();
+
+    const reload = async () => {
+      const dates = changedDates.has('*')
+        ? datesToLoad
+        : datesToLoad.filter((d) => changedDates.has(formatDate(d)));
+      changedDates.clear();
+      if (dates.length === 0) return;
+      try {
+        const bookingsData = await fetchSchedule(dates);
+        setBookings((prev) => ({ ...prev, ...bookingsData }));
+      } catch (err) {
+        console.error('Ошибка обновления расписания:', err);
+      }
+    };
+
+    const connect = async () => {
+      let url;
+      try {
+        url = await scheduleAPI.eventsUrl(
+          formatDate(datesToLoad[0]),
+          formatDate(datesToLoad[datesToLoad.length - 1])
+        );
+      } catch (err) {
+        if (!closed) reconnectTimer = setTimeout(connect, 30000);
+        return;
+      }
+      if (closed) return;
+      source = new EventSource(url);
+      source.addEventListener('booking', (e) => {
+        const event = JSON.parse(e.data);
+        changedDates.add(event.type === 'resync' ? '*' : event.date);
+        // Несколько событий подряд — одна перезагрузка
+        clearTimeout(reloadTimer);
+        reloadTimer = setTimeout(reload, 300);
+      });
+      source.onerror = () => {
+        // Сам EventSource переподключился бы с тем же билетом, а он
+        // быстро истекает: новое подключение — с новым билетом
+        const refused = source.readyState === EventSource.CLOSED;
+        source.close();
+        if (!closed) {
+          reconnectTimer = setTimeout(connect, refused ? 30000 : 3000);
+        }
+      };
+    };
+    connect();
+
+    return () => {
+      closed = true;
+      source?.close();
+      clearTimeout(reconnectTimer);
+      clearTimeout(reloadTimer);
+    };
+  }, [datesToLoad]);
+
   const formatDate = (date) => {
     return date.toISOString().split('T')[0];
   };
@@ -172,15 +249,7 @@ const Schedule = () => {
     setShowModal(false);
     // Перезагружаем расписание
     const loadSchedule = async () => {
-      const bookingsData = {};
-      await Promise.all(
-        datesToLoad.map(async (day) => {
-          const dateStr = formatDate(day);
-          const response = await scheduleAPI.getSchedule(dateStr);
-          bookingsData[dateStr] = response.data;
-        })
-      );
-      setBookings(bookingsData);
+      setBookings(await fetchSchedule(datesToLoad));
     };
     loadSchedule();
   };